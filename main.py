@@ -1,9 +1,26 @@
+import os
 import sys
+from PyQt6.QtCore import QCoreApplication, Qt
 from PyQt6.QtWidgets import QApplication
+from src.startup import BENCHMARK_ENV, FIRST_PAINT_MARKER
 from ui.app import MainWindow
 
+
+def report_first_paint(app):
+    """Benchmark mode (see src/startup_benchmark.py): marks the first paint and quits."""
+    print(FIRST_PAINT_MARKER, file=sys.stderr, flush=True)
+    app.quit()
+
+
 if __name__ == "__main__":
+    # The plot view imports Qt's web engine on first use, after the application
+    # exists; the engine then needs OpenGL context sharing enabled up front
+    QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
     window = MainWindow()
+    if os.environ.get(BENCHMARK_ENV):
+        window.first_painted.connect(lambda: report_first_paint(app))
+    else:
+        window.first_painted.connect(window.warm_up)
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
@@ -0,0 +1,100 @@
+METRIC_GROUPS = 8  # Three tracking axes, PID balance, voltage, correlation, motors, runtime
+
+
+def compute_analysis_metrics(df, flight_time_s=None, progress=None):
+    """
+    Computes the tuning metrics shown in the analysis table.
+
+    Args:
+        df (pd.DataFrame): Cleaned log data (or a subset of its rows, e.g. one flight phase).
+        flight_time_s (float | None): Time covered by `df` in seconds. When None it is
+            taken from the first and last "time_ms" values.
+        progress (callable | None): Receives progress(groups_done, METRIC_GROUPS,
+            "Computing metrics", "groups") after each group of metrics.
+
+    Returns:
+        list[list[str]]: [metric, value] pairs ready for display.
+    """
+    analysis_results = []
+    report = progress or (lambda *args: None)
+    groups_done = 0
+
+    def group_done():
+        nonlocal groups_done
+        groups_done += 1
+        report(groups_done, METRIC_GROUPS, "Computing metrics", "groups")
+
+    # 1. Tracking Error (Setpoint vs Gyro) for all axes
+    for axis, axis_name in zip([0, 1, 2], ["Roll", "Pitch", "Yaw"]):
+        setpoint_col = f"setpoint[{axis}]"
+        gyro_col = f"gyroADC[{axis}]"
+        if setpoint_col in df.columns and gyro_col in df.columns:
+            # MAPE
+            setpoint = df[setpoint_col]
+            gyro = df[gyro_col]
+            # Avoid division by zero
+            nonzero_mask = setpoint != 0
+            if nonzero_mask.any():
+                mape = (abs((setpoint[nonzero_mask] - gyro[nonzero_mask]) / setpoint[nonzero_mask])).mean() * 100
+                analysis_results.append([f"MAPE ({axis_name})", f"{mape:.2f}%"])
+            else:
+                analysis_results.append([f"MAPE ({axis_name})", "N/A"])
+            # RMSE
+            rmse = ((setpoint - gyro) ** 2).mean() ** 0.5
+            analysis_results.append([f"RMSE ({axis_name})", f"{rmse:.2f}"])
+            # Max Overshoot
+            overshoot = (gyro - setpoint).max()
+            analysis_results.append([f"Max Overshoot ({axis_name})", f"{overshoot:.2f}"])
+            # Gyro Noise Std
+            noise_std = gyro.diff().std()
+            analysis_results.append([f"Gyro Noise Std ({axis_name})", f"{noise_std:.2f}"])
+        group_done()
+
+    # 2. PID Balance Metrics (for roll only, as before)
+    if all(col in df.columns for col in ["axisP[0]", "axisI[0]", "axisD[0]"]):
+        total_pid = df["axisP[0]"].abs().sum() + df["axisI[0]"].abs().sum() + df["axisD[0]"].abs().sum()
+        if total_pid:
+            p_contrib = df["axisP[0]"].abs().sum() / total_pid * 100
+            i_contrib = df["axisI[0]"].abs().sum() / total_pid * 100
+            d_contrib = df["axisD[0]"].abs().sum() / total_pid * 100
+            analysis_results.append(["P Contribution (%)", f"{p_contrib:.2f}%"])
+            analysis_results.append(["I Contribution (%)", f"{i_contrib:.2f}%"])
+            analysis_results.append(["D Contribution (%)", f"{d_contrib:.2f}%"])
+    group_done()
+
+    # 3. Battery Voltage Sag
+    if "vbatLatest (V)" in df.columns:
+        min_voltage = df["vbatLatest (V)"].min()
+        voltage_drop = df["vbatLatest (V)"].max() - min_voltage
+        analysis_results.append(["Min Voltage", f"{min_voltage:.2f}V"])
+        analysis_results.append(["Voltage Drop", f"{voltage_drop:.2f}V"])
+    group_done()
+
+    if "throttle" in df.columns and "vbatLatest (V)" in df.columns:
+        correlation = df["throttle"].corr(df["vbatLatest (V)"])
+        analysis_results.append(["Throttle-Voltage Correlation", f"{correlation:.2f}"])
+    group_done()
+
+    # 5. Motor Output Symmetry
+    motor_columns = [col for col in df.columns if col.startswith("motor[")]
+    if motor_columns:
+        motor_imbalance = df[motor_columns].std(axis=1).mean()
+        analysis_results.append(["Motor Imbalance (Std)", f"{motor_imbalance:.2f}"])
+    group_done()
+
+    # 6. Runtime Statistics
+    if flight_time_s is None and "time_ms" in df.columns and len(df):
+        flight_time_s = (df["time_ms"].iloc[-1] - df["time_ms"].iloc[0]) / 1000  # Convert to seconds
+    if flight_time_s is not None:
+        analysis_results.append(["Flight Time (s)", f"{flight_time_s:.2f}s"])
+
+    if "throttle" in df.columns:
+        avg_throttle = df["throttle"].mean()
+        analysis_results.append(["Avg Throttle", f"{avg_throttle:.2f}"])
+
+    if "amperageLatest (A)" in df.columns:
+        max_current = df["amperageLatest (A)"].max()
+        analysis_results.append(["Max Current", f"{max_current:.2f}A"])
+    group_done()
+
+    return analysis_results
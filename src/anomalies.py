@@ -0,0 +1,239 @@
+import numpy as np
+import pandas as pd
+
+# Severity names follow the table colors: red cells are critical, yellow cells are warnings
+CRITICAL = "critical"
+WARNING = "warning"
+
+
+def _column(df, name):
+    return df[name].to_numpy(dtype=float) if name in df.columns else None
+
+
+def _prev(values):
+    """Values shifted down one row; the first row compares with itself."""
+    return np.concatenate((values[:1], values[:-1]))
+
+
+def _next(values):
+    return np.concatenate((values[1:], values[-1:]))
+
+
+class _RuleSet:
+    """
+    Collects (column, severity, reason, mask) rules in table order.
+
+    Like the early returns in paint_table_item, a row already matched by an earlier
+    rule of the same column is not claimed by later ones.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.rules = []
+        self._claimed = {}
+
+    def add(self, column, severity, reason, mask):
+        mask = np.asarray(mask, dtype=bool)
+        claimed = self._claimed.setdefault(column, np.zeros(self.n, dtype=bool))
+        mask = mask & ~claimed
+        claimed |= mask
+        self.rules.append((column, severity, reason, mask))
+
+
+def anomaly_rules(df):
+    """
+    Evaluates the cell painting rules of paint_table_item over whole columns at once.
+
+    The thresholds and reasons are the ones the table shows as red (critical) and
+    yellow (warning) tooltips, so reports and the assistant describe the same
+    anomalies a user sees in the raw table.
+
+    Args:
+        df (pd.DataFrame): Cleaned log data.
+
+    Returns:
+        list[tuple[str, str, str, np.ndarray]]: (column, severity, reason, row mask).
+    """
+    n = len(df)
+    rules = _RuleSet(n)
+    if not n:
+        return rules.rules
+    with np.errstate(invalid="ignore"):
+        for name in ("rxSignalReceived", "rxFlightChannelsValid"):
+            v = _column(df, name)
+            if v is not None:
+                rules.add(name, CRITICAL, "Signal not received (0 = no, 1 = yes)", v == 0)
+
+        rssi = _column(df, "rssi")
+        if rssi is not None and np.nanmax(rssi) > 0:
+            rules.add("rssi", WARNING, "RSSI is low (≤60% of max)", rssi / np.nanmax(rssi) <= 0.6)
+
+        for axis in range(3):
+            setpoint = _column(df, f"setpoint[{axis}]")
+            gyro = _column(df, f"gyroADC[{axis}]")
+
+            p = _column(df, f"axisP[{axis}]")
+            if p is not None:
+                rules.add(f"axisP[{axis}]", CRITICAL, "P-term spike (>250)", np.abs(p) > 250)
+                if setpoint is not None and gyro is not None:
+                    expected = setpoint - gyro
+                    rules.add(f"axisP[{axis}]", WARNING, "P-term high but opposite sign to setpoint",
+                              (expected != 0) & (p * expected < 0) & (np.abs(p) > 100))
+
+            i = _column(df, f"axisI[{axis}]")
+            if i is not None:
+                rules.add(f"axisI[{axis}]", CRITICAL, "Large I-term value (>200)", np.abs(i) > 200)
+                if setpoint is not None:
+                    rules.add(f"axisI[{axis}]", WARNING, "I-term accumulating with zero setpoint (possible wind-up)",
+                              (np.abs(setpoint) < 1) & (np.abs(i) > 50))
+
+            d = _column(df, f"axisD[{axis}]")
+            if d is not None and axis != 2:
+                rules.add(f"axisD[{axis}]", CRITICAL, "D-term spike (>200)", np.abs(d) > 200)
+
+            f = _column(df, f"axisF[{axis}]")
+            rc = _column(df, f"rcCommand[{axis}]")
+            if f is not None and rc is not None:
+                rules.add(f"axisF[{axis}]", CRITICAL, "Feedforward with no stick input", (np.abs(rc) < 1) & (np.abs(f) > 10))
+
+        motors = [_column(df, f"motor[{i}]") for i in range(4)]
+        all_motors = all(m is not None for m in motors)
+        if all_motors:
+            motor_max = np.max(np.stack(motors), axis=0)
+            motor_min = np.min(np.stack(motors), axis=0)
+        for idx, motor in enumerate(motors):
+            if motor is None:
+                continue
+            name = f"motor[{idx}]"
+            erpm = _column(df, f"eRPM[{idx}]")
+            if erpm is not None:
+                rules.add(name, CRITICAL, "Motor high, eRPM low (possible desync/failure)", (motor > 1200) & (erpm < 100))
+                rules.add(name, CRITICAL, "eRPM dropped to 0 while motor command is high", (erpm == 0) & (motor > 1100))
+            if all_motors:
+                rules.add(name, CRITICAL, "Motor struck min value (possible desync)", (motor < 50) & (motor_max >= 1000))
+                rules.add(name, CRITICAL, "Motor struck max value (possible desync)", (motor > 2000) & (motor_min < 1000))
+                rules.add(name, WARNING, "Persistent large difference between motors (>750)", motor_max - motor_min > 750)
+            rules.add(name, WARNING, "Fast oscillation in motor output", np.abs(motor - _prev(motor)) > 100)
+
+        for idx in range(4):
+            erpm = _column(df, f"eRPM[{idx}]")
+            if erpm is None:
+                continue
+            name = f"eRPM[{idx}]"
+            motor = motors[idx]
+            if motor is not None:
+                rules.add(name, CRITICAL, "Motor high, eRPM low (possible desync/failure)", (motor > 1200) & (erpm < 100))
+                rules.add(name, CRITICAL, "eRPM dropped to 0 while motor command is high", (erpm == 0) & (motor > 1100))
+            rules.add(name, WARNING, "Big fluctuation in eRPM (possible mechanical issue)", np.abs(erpm - _prev(erpm)) > 200)
+
+        gyros = [_column(df, f"gyroADC[{i}]") for i in range(3)]
+        for axis in range(3):
+            raw = _column(df, f"gyroUnfilt[{axis}]")
+            if raw is not None:
+                noisy = np.zeros(n, dtype=bool)
+                for offset in (-2, -1, 1, 2):
+                    neighbor = np.roll(raw, -offset)
+                    valid = np.zeros(n, dtype=bool)
+                    valid[max(0, -offset):n - max(0, offset)] = True
+                    noisy |= valid & (np.abs(raw - neighbor) > 80) & (raw * neighbor < 0)
+                rules.add(f"gyroUnfilt[{axis}]", CRITICAL, "Rapid sign-changing jumps (noise/vibration)", noisy)
+
+            v = gyros[axis]
+            if v is None:
+                continue
+            name = f"gyroADC[{axis}]"
+            if raw is not None:
+                rules.add(name, WARNING, "Filtered and unfiltered gyro very similar (under-filtered)",
+                          (np.abs(v - raw) < 5) & (np.abs(raw) > 1) & (np.abs(v) > 1))
+                rules.add(name, WARNING, "Filtered gyro much flatter than unfiltered (over-filtered)",
+                          (np.abs(v) < 0.5 * np.abs(raw)) & (np.abs(raw) > 30))
+            prev, nxt = _prev(v), _next(v)
+            inner = np.zeros(n, dtype=bool)
+            inner[1:-1] = True
+            peak = ((v > prev) & (v > nxt)) | ((v < prev) & (v < nxt))
+            rules.add(name, WARNING, "Oscillatory pattern detected in gyroADC",
+                      inner & peak & (np.abs(v - prev) > 20) & (np.abs(v - nxt) > 20))
+            rules.add(name, CRITICAL, "Sudden spike in gyroADC", np.abs(v - prev) > 60)
+            if all(g is not None for g in gyros):
+                others = [gyros[i] for i in range(3) if i != axis]
+                rules.add(name, WARNING, "Erratic value on one gyro axis (possible mechanical issue)",
+                          (np.abs(v) > 40) & np.logical_and.reduce([np.abs(v) > 2 * np.abs(o) for o in others]))
+            pid_spike = np.zeros(n, dtype=bool)
+            for pid_col in (f"axisP[{axis}]", f"axisD[{axis}]"):
+                pid = _column(df, pid_col)
+                if pid is not None:
+                    pid_spike |= (np.abs(v) > 40) & (np.abs(pid) > 40)
+            rules.add(name, WARNING, "Gyro spike correlates with PID spike (possible instability)", pid_spike)
+
+        for axis in range(3):
+            acc = _column(df, f"accSmooth[{axis}]")
+            if acc is None:
+                continue
+            name = f"accSmooth[{axis}]"
+            deviation = np.abs(acc / 100.0) if axis < 2 else np.abs(acc / 100.0 - 20.48)
+            if axis < 2:
+                rules.add(name, CRITICAL, "Accelerometer axis value is high (possible misalignment or vibration)", deviation > 10)
+                rules.add(name, WARNING, "Accelerometer axis value is moderately high", deviation >= 2)
+            else:
+                rules.add(name, CRITICAL, "Z-axis not near freefall accelearation (possible calibration/orientation error)", deviation > 10)
+                rules.add(name, WARNING, "Z-axis moderately off from freefall accelearation", deviation >= 2)
+
+        # The jump rules are checked last in the table but override the level color
+        vbat = _column(df, "vbatLatest (V)")
+        if vbat is not None:
+            rules.add("vbatLatest (V)", CRITICAL, "Sudden voltage drop detected", np.abs(vbat - _prev(vbat)) > 2)
+            rules.add("vbatLatest (V)", CRITICAL, "Voltage very low (<14V)", vbat < 14)
+            rules.add("vbatLatest (V)", WARNING, "Voltage is in warning range", vbat <= 16)
+
+        amps = _column(df, "amperageLatest (A)")
+        if amps is not None:
+            rules.add("amperageLatest (A)", CRITICAL, "Sudden spike in current draw", np.abs(amps - _prev(amps)) > 40)
+            rules.add("amperageLatest (A)", CRITICAL, "Negative current (sensor error)", amps < 0)
+            rules.add("amperageLatest (A)", CRITICAL, "Very high current draw (>120A)", amps > 120)
+            rules.add("amperageLatest (A)", WARNING, "High current draw", amps >= 10)
+
+        spread = _column(df, "motorSpread")
+        if spread is not None:
+            rules.add("motorSpread", WARNING, "Persistent large difference between motors (>750)", spread > 750)
+
+        for axis in range(3):
+            error = _column(df, f"trackingError[{axis}]")
+            if error is not None:
+                name = f"trackingError[{axis}]"
+                rules.add(name, CRITICAL, "Gyro far from setpoint (>200 deg/s tracking error)", np.abs(error) > 200)
+                rules.add(name, WARNING, "Gyro lagging setpoint (>100 deg/s tracking error)", np.abs(error) > 100)
+    return rules.rules
+
+
+def summarize_anomalies(df, rules=None):
+    """
+    Counts the rows flagged by each painting rule.
+
+    Args:
+        df (pd.DataFrame): Cleaned log data.
+        rules (list | None): Output of anomaly_rules, computed from df if None.
+
+    Returns:
+        pd.DataFrame: One row per rule that fired, with column, severity, reason,
+        rows, first_time_ms and last_time_ms; critical rules first, then by count.
+    """
+    rules = anomaly_rules(df) if rules is None else rules
+    time_ms = _column(df, "time_ms")
+    records = []
+    for column, severity, reason, mask in rules:
+        hits = np.flatnonzero(mask)
+        if not len(hits):
+            continue
+        records.append({
+            "column": column,
+            "severity": severity,
+            "reason": reason,
+            "rows": len(hits),
+            "first_time_ms": time_ms[hits[0]] if time_ms is not None else np.nan,
+            "last_time_ms": time_ms[hits[-1]] if time_ms is not None else np.nan,
+        })
+    summary = pd.DataFrame(records, columns=["column", "severity", "reason", "rows", "first_time_ms", "last_time_ms"])
+    if len(summary):
+        summary["_order"] = (summary["severity"] != CRITICAL).astype(int)
+        summary = summary.sort_values(["_order", "rows"], ascending=[True, False]).drop(columns="_order")
+    return summary.reset_index(drop=True)
@@ -1,13 +1,80 @@
 import os
-from dotenv import load_dotenv
-import openai
-
-def ask_chatgpt(messages, model="gpt-3.5-turbo", temperature=0.7):
-    load_dotenv()
-    client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=temperature,
-    )
-    return response.choices[0].message.content.strip()
\ No newline at end of file
+import threading
+
+DEFAULT_TEMPERATURE = 0.7
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the process-wide OpenAI client, created on first use.
+
+    The .env file is read once. Reusing one client keeps its HTTP connection pool
+    alive, so later requests skip the connection and TLS setup. OPENAI_BASE_URL
+    points the client at any server speaking the same API, e.g. a local stub.
+    The openai package is imported here too, so it does not delay startup.
+    """
+    import openai
+    from dotenv import load_dotenv
+
+    global _client
+    with _client_lock:
+        if _client is None:
+            load_dotenv()
+            _client = openai.OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=os.getenv("OPENAI_BASE_URL") or None,
+            )
+        return _client
+
+
+def configure_client(api_key=None, base_url=None):
+    """Replaces the shared client, e.g. to talk to a local stub server."""
+    import openai
+
+    global _client
+    with _client_lock:
+        previous, _client = _client, openai.OpenAI(api_key=api_key or "unused", base_url=base_url)
+    if previous is not None:
+        previous.close()
+
+
+def stream_chatgpt(messages, model="gpt-3.5-turbo", temperature=DEFAULT_TEMPERATURE, tools=None, tool_calls=None):
+    """
+    Streams a chat completion.
+
+    Args:
+        tools (list[dict] | None): Tool specifications the model may call.
+        tool_calls (list | None): Receives the calls the model made, as
+            {"id", "name", "arguments"} dicts, once the stream is exhausted.
+
+    Yields:
+        str: Text fragments in the order the server sends them.
+    """
+    request = {"model": model, "messages": messages, "temperature": temperature, "stream": True}
+    if tools:
+        request["tools"] = tools
+    stream = get_client().chat.completions.create(**request)
+    calls = {}
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                yield delta.content
+            # Tool calls arrive in pieces: the id and name first, then the arguments in fragments
+            for part in delta.tool_calls or []:
+                call = calls.setdefault(part.index, {"id": None, "name": "", "arguments": ""})
+                if part.id:
+                    call["id"] = part.id
+                if part.function and part.function.name:
+                    call["name"] += part.function.name
+                if part.function and part.function.arguments:
+                    call["arguments"] += part.function.arguments
+    finally:
+        stream.close()
+    if tool_calls is not None:
+        tool_calls.extend(calls[index] for index in sorted(calls))
@@ -0,0 +1,226 @@
+import fnmatch
+import json
+import numpy as np
+from src.analysis import compute_analysis_metrics
+from src.anomalies import anomaly_rules, summarize_anomalies
+from src.decimation import min_max_indices
+from src.derived_channels import available_channels, get_channel, is_derived, log_key_for
+from src.log_headers import headers_file_for, load_log_headers
+
+MAX_TOOL_ROUNDS = 6        # Model turns that may call tools before it has to answer
+MAX_SUMMARY_POINTS = 200   # Upper bound on the points a channel summary returns
+MAX_HEADER_VALUES = 60
+MAX_ANOMALY_RULES = 25
+
+TOOL_SPECS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "list_channels",
+            "description": "Lists the channels (columns) of the open log, the flight phases and the logged time span.",
+            "parameters": {"type": "object", "properties": {}},
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_metrics",
+            "description": "Returns the tuning metrics of the analysis table (tracking error, PID balance, noise, "
+                           "motor and battery figures) for the whole log or one flight phase.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "phase": {"type": "string", "description": "Flight phase name from list_channels; omit for the whole log."},
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_anomalies",
+            "description": "Counts the rows the table's anomaly rules flag (red = critical, yellow = warning), "
+                           "optionally within a time range.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "start_ms": {"type": "number", "description": "Range start in milliseconds."},
+                    "end_ms": {"type": "number", "description": "Range end in milliseconds."},
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_channel_summary",
+            "description": "Summarizes one channel: min, max, mean and std plus a min/max-decimated series of "
+                           "[time_ms, value] points that keeps spikes.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "channel": {"type": "string", "description": "Channel name from list_channels, e.g. gyroADC[0]."},
+                    "start_ms": {"type": "number"},
+                    "end_ms": {"type": "number"},
+                    "points": {"type": "integer", "description": f"Approximate number of points, at most {MAX_SUMMARY_POINTS}."},
+                },
+                "required": ["channel"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_header_values",
+            "description": "Reads flight controller settings from the log header (PIDs, filters, rates, motor setup).",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "names": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Header names or wildcard patterns such as *PID or gyro_lpf*.",
+                    },
+                },
+                "required": ["names"],
+            },
+        },
+    },
+]
+
+
+def _number(value):
+    value = float(value)
+    return None if np.isnan(value) else round(value, 4)
+
+
+class LogToolbox:
+    """
+    Answers the assistant's tool calls from a log that is already loaded.
+
+    Args:
+        csv_file (str): Path of the log, used for its header file and cache key.
+        df (pd.DataFrame): Cleaned log data.
+        time_index (TimeIndex): Index over df's "time_ms" column.
+        phases (FlightPhases | None): Flight phases of df.
+    """
+
+    def __init__(self, csv_file, df, time_index, phases=None):
+        self.csv_file = csv_file
+        self.df = df
+        self.time_index = time_index
+        self.phases = phases
+        self.log_key = log_key_for(csv_file)
+        self._headers = None
+        self._tools = {
+            "list_channels": self.list_channels,
+            "get_metrics": self.get_metrics,
+            "get_anomalies": self.get_anomalies,
+            "get_channel_summary": self.get_channel_summary,
+            "get_header_values": self.get_header_values,
+        }
+
+    def call(self, name, arguments):
+        """
+        Runs one tool call.
+
+        Args:
+            name (str): Tool name from TOOL_SPECS.
+            arguments (str): JSON object of arguments, as sent by the model.
+
+        Returns:
+            str: JSON result; failures are reported as {"error": ...} so the model
+            can correct the call.
+        """
+        tool = self._tools.get(name)
+        if tool is None:
+            return json.dumps({"error": f"Unknown tool '{name}'."})
+        try:
+            kwargs = json.loads(arguments or "{}")
+            return json.dumps(tool(**kwargs), ensure_ascii=False)
+        except Exception as e:
+            return json.dumps({"error": str(e)})
+
+    def _rows(self, start_ms=None, end_ms=None):
+        if start_ms is None and end_ms is None:
+            return 0, len(self.df)
+        start = self.time_index.start_ms if start_ms is None else start_ms
+        end = self.time_index.end_ms if end_ms is None else end_ms
+        return self.time_index.row_range(start, end)
+
+    def list_channels(self):
+        columns = [col for col in self.df.columns if col != "time_ms"]
+        return {
+            "log": self.csv_file,
+            "start_ms": self.time_index.start_ms,
+            "end_ms": self.time_index.end_ms,
+            "rows": len(self.df),
+            "channels": columns,
+            "derived_channels": available_channels(self.df.columns),
+            "phases": self.phases.names() if self.phases is not None else [],
+        }
+
+    def get_metrics(self, phase=None):
+        if phase:
+            if self.phases is None or phase not in self.phases.names():
+                raise ValueError(f"Unknown phase '{phase}'.")
+            metrics = compute_analysis_metrics(self.df.iloc[self.phases.rows(phase)], self.phases.duration_s(phase))
+        else:
+            metrics = compute_analysis_metrics(self.df)
+        return {metric: value for metric, value in metrics}
+
+    def get_anomalies(self, start_ms=None, end_ms=None):
+        start, stop = self._rows(start_ms, end_ms)
+        frame = self.df.iloc[start:stop]
+        summary = summarize_anomalies(frame, anomaly_rules(frame)).head(MAX_ANOMALY_RULES)
+        return {
+            "start_ms": _number(self.time_index.time_at(start)) if stop > start else None,
+            "end_ms": _number(self.time_index.time_at(stop - 1)) if stop > start else None,
+            "anomalies": [
+                {
+                    "column": row.column,
+                    "severity": row.severity,
+                    "reason": row.reason,
+                    "rows": int(row.rows),
+                    "first_time_ms": _number(row.first_time_ms),
+                    "last_time_ms": _number(row.last_time_ms),
+                }
+                for row in summary.itertuples()
+            ],
+        }
+
+    def get_channel_summary(self, channel, start_ms=None, end_ms=None, points=50):
+        if channel in self.df.columns:
+            series = self.df[channel]
+        elif is_derived(channel) and channel in available_channels(self.df.columns):
+            series = get_channel(self.df, channel, self.log_key)
+        else:
+            raise ValueError(f"Unknown channel '{channel}'; call list_channels for the names.")
+        start, stop = self._rows(start_ms, end_ms)
+        values = np.asarray(series, dtype=float)[start:stop]
+        times = self.time_index.time_ms[start:stop]
+        if not len(values):
+            return {"channel": channel, "rows": 0}
+        points = int(min(max(points, 2), MAX_SUMMARY_POINTS))
+        picked = min_max_indices(values, points // 2)
+        return {
+            "channel": channel,
+            "rows": int(len(values)),
+            "min": _number(np.nanmin(values)),
+            "max": _number(np.nanmax(values)),
+            "mean": _number(np.nanmean(values)),
+            "std": _number(np.nanstd(values)),
+            "points": [[_number(times[i]), _number(values[i])] for i in picked],
+        }
+
+    def get_header_values(self, names):
+        if self._headers is None:
+            self._headers = load_log_headers(headers_file_for(self.csv_file))
+        if not self._headers:
+            raise ValueError("This log has no headers.txt.")
+        found = {}
+        for pattern in names:
+            for name, value in self._headers.items():
+                if fnmatch.fnmatch(name, pattern) and len(found) < MAX_HEADER_VALUES:
+                    found[name] = value
+        return {"values": found, "missing": [p for p in names if not any(fnmatch.fnmatch(n, p) for n in found)]}
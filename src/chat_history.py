@@ -0,0 +1,78 @@
+import re
+import threading
+from src.token_budget import CHARS_PER_TOKEN, estimate_tokens
+
+HISTORY_TOKEN_BUDGET = 1500  # Recent turns sent verbatim with each question
+DIGEST_TOKEN_BUDGET = 400    # Digest of older turns
+QUESTION_CHARS = 160         # Characters of a folded question kept in the digest
+ANSWER_CHARS = 240           # Characters of a folded answer kept in the digest
+
+
+def _clip(text, limit):
+    """Collapses whitespace and cuts `text` at a word boundary near `limit` characters."""
+    text = re.sub(r"\s+", " ", text).strip()
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > limit // 2 else limit] + " ..."
+
+
+class ChatHistory:
+    """
+    The conversation sent along with each new question, within a token budget.
+
+    Recent turns are kept verbatim. When they exceed `budget`, the oldest turns are
+    folded into a digest of one clipped question/answer line each, and the oldest
+    digest lines are dropped once the digest exceeds `digest_budget`. Follow-ups
+    therefore see the recent exchange word for word and the older one in outline,
+    at a bounded cost per request. The digest is built locally, without a model call.
+
+    Turns may be added from any thread; requests running in parallel each see the
+    history as it was when they were sent.
+    """
+
+    def __init__(self, budget=HISTORY_TOKEN_BUDGET, digest_budget=DIGEST_TOKEN_BUDGET):
+        self.budget = budget
+        self.digest_budget = digest_budget
+        self.turns = []    # (question, answer) kept verbatim
+        self.digest = []   # One line per folded turn
+        self.dropped = 0   # Turns folded out of the digest as well
+        self._lock = threading.Lock()
+
+    def add(self, question, answer):
+        # A single answer longer than the whole budget is clipped rather than kept whole
+        if estimate_tokens(answer) > self.budget:
+            answer = answer[:self.budget * CHARS_PER_TOKEN] + " ..."
+        with self._lock:
+            self.turns.append((question, answer))
+            while len(self.turns) > 1 and self._turn_tokens() > self.budget:
+                self._fold(*self.turns.pop(0))
+
+    def clear(self):
+        with self._lock:
+            self.turns.clear()
+            self.digest.clear()
+            self.dropped = 0
+
+    def messages(self):
+        """Returns the history as chat messages, digest first."""
+        with self._lock:
+            messages = []
+            if self.digest:
+                header = "Summary of the earlier conversation"
+                if self.dropped:
+                    header += f" ({self.dropped} older turns omitted)"
+                messages.append({"role": "system", "content": header + ":\n" + "\n".join(self.digest)})
+            for question, answer in self.turns:
+                messages.append({"role": "user", "content": question})
+                messages.append({"role": "assistant", "content": answer})
+            return messages
+
+    def _turn_tokens(self):
+        return sum(estimate_tokens(question) + estimate_tokens(answer) for question, answer in self.turns)
+
+    def _fold(self, question, answer):
+        self.digest.append(f"- Q: {_clip(question, QUESTION_CHARS)} A: {_clip(answer, ANSWER_CHARS)}")
+        while len(self.digest) > 1 and estimate_tokens("\n".join(self.digest)) > self.digest_budget:
+            self.digest.pop(0)
+            self.dropped += 1
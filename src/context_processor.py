@@ -1,11 +1,260 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from src.anomalies import CRITICAL, anomaly_rules, summarize_anomalies
+from src.decimation import min_max_indices
+from src.token_budget import CHARS_PER_TOKEN, DEFAULT_TOKEN_BUDGET, estimate_tokens
+
+FLAG_MAX_VALUES = 4         # Numeric columns with this few distinct values are collapsed into runs
+MAX_RUNS_PER_COLUMN = 8     # Runs listed per collapsed column before the rest is counted
+MAX_ANOMALY_RULES = 12      # Rows of the anomaly summary
+EXCERPT_CONTEXT_ROWS = 2    # Rows kept before and after each flagged row
+EXCERPT_SHARE = 0.4         # Part of the row budget spent on anomaly excerpts
+CACHE_SIZE = 16             # Compressed selections kept for follow-up questions
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
 def tsv_to_markdown(tsv_str):
     lines = tsv_str.strip().split('\n')
     if not lines:
         return ""
     header = lines[0].split('\t')
     rows = [line.split('\t') for line in lines[1:]]
+    return _table(header, rows)
+
+
+def _table(header, rows):
     md = "| " + " | ".join(header) + " |\n"
     md += "| " + " | ".join("---" for _ in header) + " |\n"
     for row in rows:
         md += "| " + " | ".join(row) + " |\n"
-    return md
\ No newline at end of file
+    return md
+
+
+def _fmt(value):
+    return "" if pd.isna(value) else f"{value:.4g}"
+
+
+def _largest_fitting(render, limit, budget):
+    """Largest k in [0, limit] whose render(k) fits `budget` tokens, by bisection."""
+    low, high = 0, limit
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(render(mid)) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+class _Selection:
+    """A pasted table selection split into time, run-length and numeric columns."""
+
+    def __init__(self, tsv_str):
+        self.text = pd.read_csv(io.StringIO(tsv_str.strip()), sep="\t", dtype=str, keep_default_na=False)
+        self.text.columns = [str(col).strip() for col in self.text.columns]
+        self.numeric = pd.DataFrame(index=self.text.index)
+        self.flags = []
+        self.series = []
+        for col in self.text.columns:
+            values = pd.to_numeric(self.text[col].replace("", np.nan), errors="coerce")
+            is_numeric = values.notna().sum() == (self.text[col] != "").sum()
+            if is_numeric:
+                self.numeric[col] = values
+            if not is_numeric or values.nunique() <= FLAG_MAX_VALUES:
+                self.flags.append(col)
+            else:
+                self.series.append(col)
+        self.time_column = next((col for col in self.series if col.startswith("time")), None)
+        if self.time_column:
+            self.series.remove(self.time_column)
+
+    def row_label(self, row):
+        if self.time_column:
+            return f"{self.time_column} {self.text[self.time_column].iat[row]}"
+        return f"row {row + 1}"
+
+    def runs(self, col):
+        """Consecutive stretches of equal values as (value, first row, last row)."""
+        values = self.text[col].str.strip().to_numpy()
+        starts = np.flatnonzero(np.concatenate(([True], values[1:] != values[:-1])))
+        ends = np.concatenate((starts[1:], [len(values)])) - 1
+        return [(values[s], s, e) for s, e in zip(starts, ends)]
+
+    def rows_table(self, rows, columns=None):
+        columns = [self.time_column] * bool(self.time_column) + (columns if columns is not None else self.series)
+        body = self.text.iloc[rows][columns].to_numpy()
+        return _table(columns, [list(row) for row in body])
+
+
+def _runs_section(sel):
+    lines = []
+    for col in sel.flags:
+        runs = sel.runs(col)
+        if len(runs) == 1:
+            lines.append(f"- {col}: {runs[0][0] or '(empty)'} throughout")
+            continue
+        parts = [f"{value or '(empty)'} ({sel.row_label(s)}" + (f" to {sel.row_label(e)})" if e > s else ")")
+                 for value, s, e in runs[:MAX_RUNS_PER_COLUMN]]
+        more = len(runs) - MAX_RUNS_PER_COLUMN
+        lines.append(f"- {col}: " + "; ".join(parts) + (f"; ... {more} more changes" if more > 0 else ""))
+    return "Flag and constant columns (run-length):\n" + "\n".join(lines) + "\n" if lines else ""
+
+
+def _stats_section(sel, columns):
+    if not columns:
+        return ""
+    rows = []
+    for col in columns:
+        values = sel.numeric[col]
+        rows.append([col, _fmt(values.min()), _fmt(values.max()), _fmt(values.mean()), _fmt(values.std()),
+                     _fmt(values.iat[0]), _fmt(values.iat[-1])])
+    return "Per-column statistics:\n" + _table(["column", "min", "max", "mean", "std", "first", "last"], rows)
+
+
+def _anomaly_sections(sel):
+    """
+    The anomaly summary and the flagged rows, most severe first.
+
+    Returns:
+        tuple[str, list[int], list[str]]: Summary section, flagged row positions in
+        priority order and the columns that were flagged.
+    """
+    df = sel.numeric.copy()
+    if sel.time_column and sel.time_column not in df.columns:
+        df[sel.time_column] = pd.to_numeric(sel.text[sel.time_column], errors="coerce")
+    rules = [rule for rule in anomaly_rules(df) if rule[3].any()]
+    if not rules:
+        return "", [], []
+    first_hits = {(col, reason): int(np.flatnonzero(mask)[0]) for col, _, reason, mask in rules}
+    summary = summarize_anomalies(df, rules).head(MAX_ANOMALY_RULES)
+    lines = [[row.column, row.severity, row.reason, str(row.rows), sel.row_label(first_hits[(row.column, row.reason)])]
+             for row in summary.itertuples()]
+    section = "Flagged anomalies (table painting rules):\n" + _table(
+        ["column", "severity", "reason", "rows", "first at"], lines)
+
+    ordered = sorted(rules, key=lambda rule: (rule[1] != CRITICAL, -int(rule[3].sum())))
+    hits = []
+    seen = set()
+    # Round-robin over the rules so every kind of anomaly gets an excerpt
+    queues = [list(np.flatnonzero(rule[3])) for rule in ordered]
+    while any(queues):
+        for queue in queues:
+            if queue:
+                row = int(queue.pop(0))
+                if row not in seen:
+                    seen.add(row)
+                    hits.append(row)
+    columns = list(dict.fromkeys(rule[0] for rule in ordered if rule[0] in sel.series))
+    return section, hits, columns
+
+
+def _excerpt_rows(hits, count, n):
+    rows = set()
+    for row in hits[:count]:
+        rows.update(range(max(0, row - EXCERPT_CONTEXT_ROWS), min(n, row + EXCERPT_CONTEXT_ROWS + 1)))
+    return sorted(rows)
+
+
+def _activity(sel):
+    """
+    Per row, the largest deviation of any numeric column from its median, in units of
+    that column's spread. Decimating this one series keeps a spike in any column.
+    """
+    values = sel.numeric[sel.series].to_numpy(dtype=float)
+    median = np.nanmedian(values, axis=0)
+    spread = np.nanstd(values, axis=0)
+    spread[~(spread > 0)] = 1.0
+    with np.errstate(invalid="ignore"):
+        return np.nan_to_num(np.nanmax(np.abs(values - median) / spread, axis=1))
+
+
+def compress_context(tsv_str, budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Turns a pasted table selection into markdown that fits a token budget.
+
+    Selections that fit are sent verbatim. Larger ones are summarized, most
+    informative parts first: flag and constant columns collapse into runs, numeric
+    columns get min/max/mean/std, the table's anomaly rules are summarized with
+    excerpts around the flagged rows, and the remaining budget goes to rows picked by
+    min/max decimation, so spikes survive the cut.
+
+    Args:
+        tsv_str (str): Tab-separated selection with a header row.
+        budget (int): Token budget for the returned text.
+
+    Returns:
+        str: Markdown for the prompt.
+    """
+    verbatim = tsv_to_markdown(tsv_str)
+    if estimate_tokens(verbatim) <= budget:
+        return verbatim
+
+    sel = _Selection(tsv_str)
+    n = len(sel.text)
+    note = (f"Selection of {n} rows x {len(sel.text.columns)} columns, compressed to about "
+            f"{budget} tokens. Row tables are excerpts, not the full data.\n\n")
+    runs = _runs_section(sel)
+    anomalies, hits, flagged_columns = _anomaly_sections(sel)
+    head = note + runs
+
+    def stats(count):
+        return _stats_section(sel, sel.series[:count])
+
+    # Statistics for every column come first; if even they do not fit, keep as many columns as fit
+    count = _largest_fitting(lambda k: head + stats(k), len(sel.series), budget)
+    head += stats(count)
+    if count < len(sel.series):
+        return head + f"\n({len(sel.series) - count} more numeric columns left out to fit the budget)\n"
+    if anomalies and estimate_tokens(head + "\n" + anomalies) <= budget:
+        head += "\n" + anomalies
+    remaining = budget - estimate_tokens(head)
+
+    excerpt = ""
+    if hits and sel.series:
+        def render_excerpt(k):
+            return "\nRows around flagged anomalies:\n" + sel.rows_table(_excerpt_rows(hits, k, n), flagged_columns or None)
+        count = _largest_fitting(render_excerpt, len(hits), int(remaining * EXCERPT_SHARE))
+        if count:
+            excerpt = render_excerpt(count)
+    remaining -= estimate_tokens(excerpt)
+
+    sampled = ""
+    if sel.series:
+        activity = _activity(sel)
+
+        def render_sampled(k):
+            return ("\nRows kept by min/max decimation (calmest and most extreme row of each of "
+                    f"{k} equal stretches):\n" + sel.rows_table(min_max_indices(activity, k)))
+        count = _largest_fitting(render_sampled, n, remaining)
+        if count:
+            sampled = render_sampled(count)
+    return head + excerpt + sampled
+
+
+def fit_context(tsv_str, budget=DEFAULT_TOKEN_BUDGET):
+    """
+    compress_context, reusing the result for a selection compressed recently.
+
+    Further questions about the same selection then cost no work. Entries are keyed
+    by a digest of the selection rather than the selection itself, and only the
+    most recent CACHE_SIZE are kept. Safe to call from any thread.
+    """
+    key = (hashlib.sha1(tsv_str.encode("utf-8")).hexdigest(), budget)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    result = compress_context(tsv_str, budget)
+
+    with _lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
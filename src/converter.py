@@ -1,8 +1,51 @@
 import os
+import re
 import subprocess
 import shutil
+import tempfile
+import time
 
-def convert_bbl_to_csv(bbl_file: str, output_dir: str) -> str | None:
+CSV_BYTES_PER_LOG_BYTE = 5.5  # Typical size of the decoded CSV relative to the log it came from
+POLL_INTERVAL_S = 0.2         # How often the decoder's output is checked for progress
+
+def _decoded_bytes(bbl_file, log_starts, size):
+    """
+    Estimates how many bytes of the .bbl file the decoder has consumed.
+
+    blackbox_decode writes one "<name>.NN.csv" per log, in order, so the newest CSV
+    tells which log is being decoded; its size relative to the usual CSV/log ratio
+    tells how far into that log the decoder is.
+    """
+    folder, name = os.path.split(bbl_file)
+    pattern = re.compile(re.escape(os.path.splitext(name)[0]) + r"\.(\d+)\.csv$")
+    newest = 0
+    newest_size = 0
+    for file in os.listdir(folder):
+        match = pattern.match(file)
+        if match and int(match.group(1)) > newest:
+            try:
+                newest_size = os.path.getsize(os.path.join(folder, file))
+            except OSError:
+                continue
+            newest = int(match.group(1))
+    if not newest:
+        return 0
+    index = min(newest, len(log_starts)) - 1
+    log_end = log_starts[index + 1] if index + 1 < len(log_starts) else size
+    return min(log_starts[index] + newest_size / CSV_BYTES_PER_LOG_BYTE, log_end)
+
+def _remove_partial_output(bbl_file):
+    """Deletes the .csv and .event files a stopped decoder left next to `bbl_file`."""
+    folder, name = os.path.split(bbl_file)
+    pattern = re.compile(re.escape(os.path.splitext(name)[0]) + r"\.\d+\.(csv|event)$")
+    for file in os.listdir(folder):
+        if pattern.match(file):
+            try:
+                os.remove(os.path.join(folder, file))
+            except OSError:
+                pass
+
+def convert_bbl_to_csv(bbl_file: str, output_dir: str, progress=None, check=None) -> str | None:
     """
     Converts a .bbl file to multiple output files (.csv and .event) using blackbox_decode.exe.
     Extracts unique header lines into a headers.txt file, skipping the first header.
@@ -10,6 +53,12 @@ def convert_bbl_to_csv(bbl_file: str, output_dir: str) -> str | None:
     Args:
         bbl_file (str): Full path to the .bbl file (e.g., "D:\\path\\to\\log.bbl")
         output_dir (str): Path to the folder where the decoded files should be saved.
+        progress (callable | None): Receives progress(bytes_done, bbl_size, stage) while
+            the headers are read and, estimated from the decoder's output, while the
+            logs are decoded.
+        check (callable | None): Raises to stop the conversion; called for every
+            header line and on every poll of the decoder, which is then killed and its
+            partial output deleted.
 
     Returns:
         str | None: Path to the folder containing the generated files or None if failed.
@@ -23,14 +72,27 @@ def convert_bbl_to_csv(bbl_file: str, output_dir: str) -> str | None:
     decoder_exe_path = os.path.join(script_dir, "..", "util", "blackbox_decode.exe")
     decoder_exe_path = os.path.abspath(decoder_exe_path)  # Normalize the path
 
+    report = progress or (lambda *args: None)
+    check = check or (lambda: None)
+
     try:
+        size = os.path.getsize(bbl_file)
         # Extract unique headers from the .bbl file
         headers_file_path = os.path.join(output_dir, "headers.txt")
         seen_headers = set()  # Track unique headers
         first_header_skipped = False  # Flag to skip the first header
+        log_starts = []  # Byte offset of each log in the file
+        offset = 0  # latin-1 maps bytes to characters one to one; only "\r\n" is read as one
         with open(bbl_file, "r", encoding="latin-1") as bbl:  # Use 'latin-1' encoding
             with open(headers_file_path, "w", encoding="utf-8") as headers_file:
                 for line in bbl:
+                    # A log's first header follows the previous log's binary frames on the same "line"
+                    product = line.find("H Product:")
+                    if product >= 0:
+                        log_starts.append(offset + product)
+                    offset += len(line)
+                    check()
+                    report(offset, size, "Reading headers")
                     if line.startswith("H "):
                         if not first_header_skipped:
                             first_header_skipped = True  # Skip the first header
@@ -40,8 +102,27 @@ def convert_bbl_to_csv(bbl_file: str, output_dir: str) -> str | None:
                             headers_file.write(header_content + "\n")
                             seen_headers.add(header_content)  # Add to the set
 
-        # Run the decoder
-        subprocess.run([decoder_exe_path, bbl_file], stderr=subprocess.PIPE, check=True)
+        report(size, size, "Reading headers")
+
+        # Run the decoder; its stderr goes to a file so a chatty decoder cannot fill the pipe
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen([decoder_exe_path, bbl_file], stderr=stderr)
+            done = 0
+            try:
+                while process.poll() is None:
+                    check()
+                    done = max(done, _decoded_bytes(bbl_file, log_starts or [0], size))
+                    report(done, size, "Decoding")
+                    time.sleep(POLL_INTERVAL_S)
+            except BaseException:
+                process.kill()
+                process.wait()
+                _remove_partial_output(bbl_file)
+                raise
+            if process.returncode:
+                stderr.seek(0)
+                raise subprocess.CalledProcessError(process.returncode, process.args, stderr=stderr.read())
+        report(size, size, "Decoding")
 
         # Move all generated files to the output folder
         for file in os.listdir(os.path.dirname(bbl_file)):
@@ -57,4 +138,19 @@ def convert_bbl_to_csv(bbl_file: str, output_dir: str) -> str | None:
     except FileNotFoundError:
         print("Executable or .bbl file not found.")
 
-    return None
\ No newline at end of file
+    return None
+
+def decode_bbl(bbl_file, output_dir, progress=None, check=None):
+    """
+    Runs convert_bbl_to_csv as a background job; cancelling it stops the decoder.
+
+    Returns:
+        str: Folder with the generated files.
+
+    Raises:
+        RuntimeError: If the conversion failed.
+    """
+    generated_dir = convert_bbl_to_csv(bbl_file, output_dir, progress, check)
+    if not generated_dir:
+        raise RuntimeError("Failed to convert the .bbl file. Please check the file and try again.")
+    return generated_dir
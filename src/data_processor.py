@@ -1,9 +1,14 @@
-from bokeh.plotting import figure, show
-from bokeh.palettes import Category10
 from itertools import cycle
 import pandas as pd
+from src.time_index import build_time_index, load_events
+from src.decimation import decimated_columns
+from src.progress import ProgressFile
 
-def load_and_clean_csv(csv_file, load_non_numeric=False):
+def read_csv_columns(csv_file):
+    """Returns the stripped column names of a CSV file without reading its rows."""
+    return [col.strip() for col in pd.read_csv(csv_file, nrows=0).columns]
+
+def load_and_clean_csv(csv_file, load_non_numeric=False, columns=None, progress=None):
     """
     Loads a CSV file, removes all non-numeric columns, and converts time_us to milliseconds.
     Adds a calculated "throttle" column based on motor outputs.
@@ -11,11 +16,23 @@ def load_and_clean_csv(csv_file, load_non_numeric=False):
     Args:
         csv_file (str): Path to the CSV file.
         load_non_numeric (bool): Whether to include non-numeric columns.
+        columns (Iterable[str] | None): Stripped names of the columns to read; the time
+            column is always read. All columns are read if None.
+        progress (callable | None): Receives progress(bytes_read, file_size, "Reading CSV")
+            while the file is parsed.
 
     Returns:
         pd.DataFrame: Cleaned DataFrame with only numeric columns.
     """
-    df = pd.read_csv(csv_file)
+    usecols = None
+    if columns is not None:
+        wanted = set(columns) | {"time (us)"}
+        usecols = lambda col: col.strip() in wanted
+    if progress is None:
+        df = pd.read_csv(csv_file, usecols=usecols)
+    else:
+        with ProgressFile(csv_file, progress, "Reading CSV") as f:
+            df = pd.read_csv(f, usecols=usecols)
 
     # Remove non-numeric columns
     if not load_non_numeric:
@@ -38,114 +55,94 @@ def load_and_clean_csv(csv_file, load_non_numeric=False):
 
     return df
 
-def plot_pid_loop_analysis(csv_file):
-    """Plots PID Loop Analysis."""
-    df = load_and_clean_csv(csv_file)
-
-    # Ensure required columns exist
-    y_columns = ["gyroADC[0]", "setpoint[0]", "axisP[0]", "axisI[0]", "axisD[0]", "axisF[0]"]
-    valid_columns = [col for col in y_columns if col in df.columns]
-
-    if not valid_columns:
-        print("Error: No valid columns for PID Loop Analysis.")
-        return
-
-    # Create a Bokeh figure
-    p = figure(title="PID Loop Analysis (Roll)", x_axis_label="Time (ms)", y_axis_label="Values", width=900, height=600)
-
-    # Assign colors to each column
-    colors = cycle(Category10[10])  # Cycle through Category10 palette
-
-    for column, color in zip(valid_columns, colors):
-        p.line(df["time_ms"], df[column], legend_label=column, line_width=2, color=color)
-
-    # Customize the legend
-    p.legend.title = "PID Components"
-    p.legend.location = "top_left"
-
-    # Show the plot
-    show(p)
-
-def plot_throttle_voltage(csv_file):
-    """Plots Throttle and Voltage Drop."""
-    df = load_and_clean_csv(csv_file)
-
-    # Ensure required columns exist
-    y_columns = ["motor[0]", "motor[1]", "motor[2]", "motor[3]", "vbatLatest (V)"]
-    valid_columns = [col for col in y_columns if col in df.columns]
-
-    if not valid_columns:
-        print("Error: No valid columns for Throttle and Voltage Drop.")
-        return
-
-    # Create a Bokeh figure
-    p = figure(title="Throttle and Voltage Drop", x_axis_label="Time (ms)", y_axis_label="Values", width=900, height=600)
-
-    # Assign colors to each column
-    colors = cycle(Category10[10])  # Cycle through Category10 palette
-
-    for column, color in zip(valid_columns, colors):
-        p.line(df["time_ms"], df[column], legend_label=column, line_width=2, color=color)
-
-    # Customize the legend
-    p.legend.title = "Throttle and Voltage"
-    p.legend.location = "top_left"
-
-    # Show the plot
-    show(p)
-
-def plot_motor_desync(csv_file):
-    """Plots Motor Desync or Oscillations."""
-    df = load_and_clean_csv(csv_file)
-
-    # Dynamically find motor columns
-    motor_columns = [col for col in df.columns if col.startswith("motor")]
-
-    if not motor_columns:
-        print("Error: No valid motor columns for Motor Desync or Oscillations.")
-        return
-
-    # Create a Bokeh figure
-    p = figure(title="Motor Desync or Oscillations", x_axis_label="Time (ms)", y_axis_label="Motor Outputs", width=900, height=600)
-
-    # Assign colors to each column
-    colors = cycle(Category10[10])  # Cycle through Category10 palette
-
-    for column, color in zip(motor_columns, colors):
-        p.line(df["time_ms"], df[column], legend_label=column, line_width=2, color=color)
-
-    # Customize the legend
-    p.legend.title = "Motor Outputs"
-    p.legend.location = "top_left"
-
-    # Show the plot
-    show(p)
-
-def plot_stick_input_vs_movement(csv_file):
-    """Plots Stick Input vs. Actual Movement."""
-    df = load_and_clean_csv(csv_file)
+def add_event_markers(p, csv_file, df):
+    """
+    Draws the entries of the log's .event file (e.g. "Log clean end") as vertical markers.
 
-    # Ensure required columns exist
-    y_columns = ["rcCommand[0]", "rcCommand[1]", "rcCommand[2]",
-                 "gyroADC[0]", "gyroADC[1]", "gyroADC[2]"]
-    valid_columns = [col for col in y_columns if col in df.columns]
+    Args:
+        p (bokeh.plotting.figure): Figure with "time_ms" on the x axis.
+        csv_file (str): Path to the CSV file; the .event file next to it is used.
+        df (pd.DataFrame): Cleaned log data, used to map events onto the logged time span.
+    """
+    draw_event_markers(p, load_log_events(csv_file, df))
 
-    if not valid_columns:
-        print("Error: No valid columns for Stick Input vs. Actual Movement.")
-        return
+def load_log_events(csv_file, df):
+    """
+    Returns the (name, time_ms) pairs of the .event entries that fall inside the log.
 
-    # Create a Bokeh figure
-    p = figure(title="Stick Input vs. Actual Movement", x_axis_label="Time (ms)", y_axis_label="Values", width=900, height=600)
+    Args:
+        csv_file (str): Path to the CSV file; the .event file next to it is used.
+        df (pd.DataFrame): Cleaned log data with a "time_ms" column.
 
-    # Assign colors to each column
-    colors = cycle(Category10[10])  # Cycle through Category10 palette
+    Returns:
+        list[tuple[str, float]]: Event names and times, empty if there are none.
+    """
+    time_index = build_time_index(df)
+    if time_index is None or not len(time_index):
+        return []
+    events = load_events(csv_file, time_index)
+    return list(events.loc[events["in_log"], ["name", "time_ms"]].itertuples(index=False, name=None))
+
+def draw_event_markers(p, events):
+    """Draws (name, time_ms) events as labelled vertical markers on a time-axis figure."""
+    from bokeh.models import Span, Label
+
+    for name, time_ms in events:
+        p.add_layout(Span(location=time_ms, dimension="height", line_color="gray", line_dash="dashed", line_width=1))
+        p.add_layout(Label(x=time_ms, y=5, y_units="screen", text=name, text_font_size="9pt", text_color="gray"))
+
+def build_line_figure(df, columns, title, labels=None, colors=None, legend_title=None,
+                      log_key=None, y_axis_label="Values", width=900, height=600, x_range=None, data=None):
+    """
+    Builds a line plot of several columns against "time_ms" from one shared data source.
 
-    for column, color in zip(valid_columns, colors):
-        p.line(df["time_ms"], df[column], legend_label=column, line_width=2, color=color)
+    All series live in a single ColumnDataSource of float64 NumPy arrays, so the time
+    axis is stored once and Bokeh serializes the arrays with its binary encoding.
 
-    # Customize the legend
-    p.legend.title = "Stick Input and Movement"
-    p.legend.location = "top_left"
+    Args:
+        df (pd.DataFrame): Cleaned log data.
+        columns (list[str]): Columns to plot (must exist in df).
+        title (str): Plot title.
+        labels (dict | None): Legend label per column.
+        colors (Iterable[str] | None): Line colors; Category10 is cycled if None.
+        legend_title (str | None): Title shown above the legend.
+        log_key (tuple | None): Cache key of the log for decimation.
+        y_axis_label (str): Label of the y axis.
+        width (int): Plot width in pixels, also the decimation target.
+        height (int): Plot height in pixels.
+        x_range (bokeh.models.Range | None): Range shared with other figures, so panning
+            or zooming one of them moves all of them.
+        data (dict | None): Already decimated arrays (see decimated_columns); df is not
+            read when given.
 
-    # Show the plot
-    show(p)
\ No newline at end of file
+    Returns:
+        bokeh.plotting.figure: The figure.
+    """
+    from bokeh.models import ColumnDataSource, HoverTool
+    from bokeh.palettes import Category10
+    from bokeh.plotting import figure
+
+    labels = labels or {}
+    colors = colors if colors is not None else cycle(Category10[10])
+    extra = {"x_range": x_range} if x_range is not None else {}
+    p = figure(title=title, x_axis_label="Time (ms)", y_axis_label=y_axis_label, width=width, height=height, **extra)
+    source = ColumnDataSource(data=data if data is not None else decimated_columns(df, columns, p.width, log_key))
+
+    renderers = []
+    for column, color in zip(columns, colors):
+        label = labels.get(column, column)
+        renderers.append(p.line("time_ms", column, source=source, legend_label=label, name=label,
+                                line_width=2, color=color))
+
+    # $name is the renderer name, so one hover tool serves every series
+    p.add_tools(HoverTool(renderers=renderers, tooltips=[
+        ("Column", "$name"),
+        ("Time (ms)", "$snap_x"),
+        ("Value", "$snap_y"),
+    ]))
+
+    if renderers:
+        if legend_title:
+            p.legend.title = legend_title
+        p.legend.location = "top_left"
+    return p
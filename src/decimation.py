@@ -0,0 +1,295 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+POINTS_PER_PIXEL = 2   # One min and one max per horizontal pixel
+CACHE_SIZE = 512       # Number of (log, column, width) index arrays kept
+PYRAMID_BLOCK = 64     # Rows per block on the finest level of a MinMaxPyramid
+PYRAMID_CACHE_SIZE = 16   # Pyramids kept; each takes about half a byte per row
+
+_cache = OrderedDict()
+_pyramids = OrderedDict()
+_lock = threading.Lock()
+
+
+def bucket_bounds(n, buckets):
+    """Edges of `buckets` near-equal row buckets over `n` rows; bucket i is rows [b[i], b[i + 1])."""
+    return np.linspace(0, n, buckets + 1).round().astype(np.int64)
+
+
+def _first_position(values, extremes, bounds):
+    """Row of the first sample in each bucket equal to that bucket's extreme."""
+    n = len(values)
+    hits = np.where(values == np.repeat(extremes, np.diff(bounds)), np.arange(n), n)
+    return np.minimum.reduceat(hits, bounds[:-1])
+
+
+def bucket_extremes(values, bounds):
+    """
+    Returns the rows of the minimum and the maximum of each bucket, in row order.
+
+    Args:
+        values (np.ndarray): Samples of one series.
+        bounds (np.ndarray): Bucket edges from bucket_bounds; no bucket may be empty.
+
+    Returns:
+        np.ndarray: 2 * buckets row positions, the earlier extreme of each bucket first.
+        A bucket whose minimum and maximum are the same row lists it twice.
+    """
+    values = np.asarray(values, dtype=float)
+    # Missing values never win the min/max contest
+    missing = np.isnan(values)
+    low = np.where(missing, np.inf, values)
+    high = np.where(missing, -np.inf, values)
+    starts = bounds[:-1]
+    lows = _first_position(low, np.minimum.reduceat(low, starts), bounds)
+    highs = _first_position(high, np.maximum.reduceat(high, starts), bounds)
+    return np.stack((np.minimum(lows, highs), np.maximum(lows, highs)), axis=1).ravel()
+
+
+def min_max_pairs(values, buckets):
+    """
+    Picks two rows per bucket that keep a series' shape when drawn `buckets` pixels wide.
+
+    Unlike min_max_indices, every bucket contributes exactly two rows, so series
+    decimated to the same width line up point for point and can share one x array
+    (see bucket_x). Series with no more than two samples per bucket are kept whole.
+
+    Args:
+        values (np.ndarray): Samples of one series.
+        buckets (int): Number of buckets, usually the plot width in pixels.
+
+    Returns:
+        np.ndarray: Non-decreasing row positions, 2 * buckets of them or all rows.
+    """
+    n = len(values)
+    if buckets <= 0 or n <= POINTS_PER_PIXEL * buckets:
+        return np.arange(n)
+    return bucket_extremes(values, bucket_bounds(n, buckets))
+
+
+def bucket_x(x, buckets):
+    """
+    Returns the shared x array that goes with min_max_pairs of the same length and width.
+
+    Each bucket's two points are placed at the bucket's first and last x, so a spike
+    is drawn at most one bucket (one pixel) away from its true time.
+
+    Args:
+        x (np.ndarray): x values of the undecimated series, sorted.
+        buckets (int): Number of buckets, usually the plot width in pixels.
+
+    Returns:
+        np.ndarray: x itself when min_max_pairs keeps all rows, else 2 * buckets values.
+    """
+    n = len(x)
+    if buckets <= 0 or n <= POINTS_PER_PIXEL * buckets:
+        return x
+    bounds = bucket_bounds(n, buckets)
+    return np.stack((x[bounds[:-1]], x[bounds[1:] - 1]), axis=1).ravel()
+
+
+def min_max_indices(values, buckets):
+    """
+    Picks the rows that keep a series' shape when drawn `buckets` pixels wide.
+
+    The series is split into near-equal buckets and the position of the minimum and
+    the maximum of each bucket is kept, so single-sample spikes always survive. The
+    first and last rows are kept as well.
+
+    Args:
+        values (np.ndarray): Samples of one series.
+        buckets (int): Number of buckets, usually the plot width in pixels.
+
+    Returns:
+        np.ndarray: Sorted row positions, at most 2 * buckets + 2 of them.
+    """
+    n = len(values)
+    if buckets <= 0 or n <= POINTS_PER_PIXEL * buckets:
+        return np.arange(n)
+    return np.unique(np.concatenate((min_max_pairs(values, buckets), [0, n - 1])))
+
+
+def decimation_indices(df, column, width, log_key=None):
+    """
+    Returns the rows of `column` to draw in a plot `width` pixels wide (see min_max_pairs).
+
+    Results are cached per (log, column, width) when a log key is given.
+
+    Args:
+        df (pd.DataFrame): Cleaned log data.
+        column (str): Column to decimate.
+        width (int): Plot width in pixels.
+        log_key (tuple | None): Identifies the log (see derived_channels.log_key_for).
+
+    Returns:
+        np.ndarray: Non-decreasing row positions.
+    """
+    key = (log_key, column, int(width), len(df)) if log_key is not None else None
+    if key is not None:
+        with _lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                return _cache[key]
+
+    indices = min_max_pairs(df[column].to_numpy(dtype=float), int(width))
+
+    if key is not None:
+        with _lock:
+            _cache[key] = indices
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return indices
+
+
+def decimate_series(df, column, width, log_key=None, x_column="time_ms"):
+    """
+    Returns the decimated (x, y) arrays of one series for plotting.
+
+    Args:
+        df (pd.DataFrame): Cleaned log data.
+        column (str): Column plotted on the y axis.
+        width (int): Plot width in pixels.
+        log_key (tuple | None): Cache key of the log.
+        x_column (str): Column plotted on the x axis.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: x and y values.
+    """
+    indices = decimation_indices(df, column, width, log_key)
+    return df[x_column].to_numpy()[indices], df[column].to_numpy()[indices]
+
+
+def decimated_columns(df, columns, width, log_key=None, x_column="time_ms"):
+    """
+    Returns decimated data for several series sharing one x array.
+
+    Every series keeps two rows (its minimum and maximum) per pixel bucket, so each
+    is drawn from exactly 2 * width points however many series share the plot, and
+    all of them line up with one x array of the buckets' first and last x (see bucket_x).
+
+    Args:
+        df (pd.DataFrame): Cleaned log data.
+        columns (list[str]): Columns plotted on the y axis.
+        width (int): Plot width in pixels.
+        log_key (tuple | None): Cache key of the log.
+        x_column (str): Column plotted on the x axis.
+
+    Returns:
+        dict[str, np.ndarray]: float64 arrays for x_column and each column.
+    """
+    data = {x_column: bucket_x(df[x_column].to_numpy(dtype=np.float64), int(width))}
+    for column in columns:
+        data[column] = df[column].to_numpy(dtype=np.float64)[decimation_indices(df, column, width, log_key)]
+    return data
+
+
+def _pick(values, first, second, better):
+    """Per pair of blocks, the row whose value is `better`; missing values never win."""
+    a, b = values[first], values[second]
+    return np.where(better(b, a) | (np.isnan(a) & ~np.isnan(b)), second, first)
+
+
+def _edge_extremes(values, start, stop):
+    """Rows of the minimum and maximum of a partial block at a window's edge."""
+    if stop <= start:
+        return []
+    part = values[start:stop]
+    if np.isnan(part).all():
+        return [start]
+    return [start + int(np.nanargmin(part)), start + int(np.nanargmax(part))]
+
+
+class MinMaxPyramid:
+    """
+    Rows of the minimum and maximum of every block of a series, at doubling block sizes.
+
+    Level k holds one (min row, max row) pair per block of PYRAMID_BLOCK * 2**k rows,
+    so the extremes of any window at any zoom are read from about as many blocks as
+    the window has pixels instead of being searched for in every visible sample.
+    Building it is one pass over the series. Only row positions are stored, so the
+    series itself is passed again to extremes().
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        blocks = len(values) // PYRAMID_BLOCK
+        self.levels = []
+        if not blocks:
+            return
+        head = values[:blocks * PYRAMID_BLOCK].reshape(blocks, PYRAMID_BLOCK)
+        missing = np.isnan(head)
+        offsets = np.arange(blocks) * PYRAMID_BLOCK
+        lows = np.where(missing, np.inf, head).argmin(axis=1) + offsets
+        highs = np.where(missing, -np.inf, head).argmax(axis=1) + offsets
+        self.levels.append((lows, highs))
+        while len(lows) >= 2:
+            pairs = len(lows) // 2
+            lows = _pick(values, lows[0:2 * pairs:2], lows[1:2 * pairs:2], np.less)
+            highs = _pick(values, highs[0:2 * pairs:2], highs[1:2 * pairs:2], np.greater)
+            self.levels.append((lows, highs))
+
+    def extremes(self, values, start, stop, buckets):
+        """
+        Returns rows that hold the extremes of [start, stop) at `buckets` pixels wide.
+
+        Uses the coarsest level whose blocks are at most half a pixel, so every pixel
+        column gets the min and max of the blocks inside it; the partial blocks at
+        both ends of the window are searched directly.
+
+        Args:
+            values (np.ndarray): The series the pyramid was built from.
+            start (int): First row of the window.
+            stop (int): Row after the last one.
+            buckets (int): Window width in pixels.
+
+        Returns:
+            np.ndarray: Sorted absolute row positions, two to four per pixel.
+        """
+        target = (stop - start) / max(buckets, 1) / 2
+        level = int(np.floor(np.log2(target / PYRAMID_BLOCK))) if target >= PYRAMID_BLOCK else -1
+        level = min(level, len(self.levels) - 1)
+        if level < 0:
+            return start + min_max_indices(values[start:stop], buckets)
+        size = PYRAMID_BLOCK << level
+        lows, highs = self.levels[level]
+        first = -(-start // size)
+        last = max(first, min(stop // size, len(lows)))
+        rows = np.concatenate((lows[first:last], highs[first:last],
+                               _edge_extremes(values, start, min(first * size, stop)),
+                               _edge_extremes(values, last * size, stop)))
+        return np.unique(rows.astype(np.int64))
+
+
+def min_max_pyramid(values, key=None):
+    """
+    Returns the MinMaxPyramid of a series, cached per key when one is given.
+
+    Args:
+        values (np.ndarray): Samples of one series.
+        key (tuple | None): Identifies the series, e.g. (log key, column).
+
+    Returns:
+        MinMaxPyramid: The pyramid.
+    """
+    if key is not None:
+        key = key + (len(values),)
+        with _lock:
+            if key in _pyramids:
+                _pyramids.move_to_end(key)
+                return _pyramids[key]
+
+    pyramid = MinMaxPyramid(values)
+
+    if key is not None:
+        with _lock:
+            _pyramids[key] = pyramid
+            while len(_pyramids) > PYRAMID_CACHE_SIZE:
+                _pyramids.popitem(last=False)
+    return pyramid
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+        _pyramids.clear()
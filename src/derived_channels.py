@@ -0,0 +1,226 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+
+CACHE_BUDGET_BYTES = 256 * 1024 * 1024  # Evict least recently used channels above this
+
+_COLUMN_REFERENCE = re.compile(r"\{([^{}]+)\}")
+
+
+def _python_expression(expression):
+    """Rewrites {column} references into lookups in the evaluation namespace."""
+    return _COLUMN_REFERENCE.sub(lambda m: f"_col({m.group(1)!r})", expression)
+
+
+def _row_max(*columns):
+    return np.max(np.stack(columns), axis=0)
+
+
+def _row_min(*columns):
+    return np.min(np.stack(columns), axis=0)
+
+
+def _row_mean(*columns):
+    return np.mean(np.stack(columns), axis=0)
+
+
+# Names usable inside expressions besides {column} references
+EXPRESSION_FUNCTIONS = {
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "sign": np.sign,
+    "minimum": np.minimum,
+    "maximum": np.maximum,
+    "rowmax": _row_max,
+    "rowmin": _row_min,
+    "rowmean": _row_mean,
+    "where": np.where,
+}
+
+# name -> (expression, description). Columns are referenced as {column name}.
+DERIVED_CHANNELS = {}
+
+
+def register_derived_channel(name, expression, description=""):
+    """
+    Registers a derived channel defined as a vectorized expression over other columns.
+
+    Args:
+        name (str): Channel name shown next to the raw columns.
+        expression (str): Expression such as "{vbatLatest (V)} * {amperageLatest (A)}".
+            References may point at raw columns or at other derived channels.
+        description (str): Friendly description for column lists and tooltips.
+    """
+    compile(_python_expression(expression), name, "eval")  # fail early on syntax errors
+    DERIVED_CHANNELS[name] = (expression, description or name)
+
+
+for _axis, _axis_name in enumerate(["roll", "pitch", "yaw"]):
+    register_derived_channel(
+        f"trackingError[{_axis}]", f"{{setpoint[{_axis}]}} - {{gyroADC[{_axis}]}}",
+        f"Setpoint minus filtered gyro (tracking error) {_axis_name}")
+    register_derived_channel(
+        f"gyroNoise[{_axis}]", f"{{gyroUnfilt[{_axis}]}} - {{gyroADC[{_axis}]}}",
+        f"Noise removed by the gyro filters {_axis_name}")
+    register_derived_channel(
+        f"pidSum[{_axis}]", f"{{axisP[{_axis}]}} + {{axisI[{_axis}]}} + {{axisD[{_axis}]}} + {{axisF[{_axis}]}}",
+        f"Sum of P, I, D and feedforward terms {_axis_name}")
+register_derived_channel(
+    "motorSpread", "rowmax({motor[0]}, {motor[1]}, {motor[2]}, {motor[3]}) - rowmin({motor[0]}, {motor[1]}, {motor[2]}, {motor[3]})",
+    "Difference between the highest and lowest motor output")
+register_derived_channel(
+    "power (W)", "{vbatLatest (V)} * {amperageLatest (A)}",
+    "Electrical power (voltage x current)")
+
+
+def is_derived(name):
+    return name in DERIVED_CHANNELS
+
+
+def dependencies(name):
+    """Returns the columns a derived channel references directly."""
+    return _COLUMN_REFERENCE.findall(DERIVED_CHANNELS[name][0])
+
+
+def raw_dependencies(name):
+    """Returns the raw columns a channel needs, following derived channels recursively."""
+    if not is_derived(name):
+        return [name]
+    raw = []
+    for dep in dependencies(name):
+        raw += [col for col in raw_dependencies(dep) if col not in raw]
+    return raw
+
+
+def available_channels(columns):
+    """
+    Lists the derived channels that can be computed from a set of columns.
+
+    Args:
+        columns (Iterable[str]): Raw column names of a log.
+
+    Returns:
+        list[str]: Derived channel names in registration order.
+    """
+    available = []
+    resolved = set(columns)
+    # Repeat so channels built on other derived channels are resolved too
+    changed = True
+    while changed:
+        changed = False
+        for name in DERIVED_CHANNELS:
+            if name not in resolved and all(dep in resolved for dep in dependencies(name)):
+                resolved.add(name)
+                available.append(name)
+                changed = True
+    return [name for name in DERIVED_CHANNELS if name in available]
+
+
+def describe(name):
+    return DERIVED_CHANNELS[name][1]
+
+
+class _ChannelCache:
+    """Least-recently-used store of evaluated channels, bounded by total array bytes."""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            values = self._entries.get(key)
+            if values is not None:
+                self._entries.move_to_end(key)
+            return values
+
+    def put(self, key, values):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key).nbytes
+            self._entries[key] = values
+            self._bytes += values.nbytes
+            while self._bytes > self.budget_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def clear(self, log_key=None):
+        with self._lock:
+            for key in [k for k in self._entries if log_key is None or k[0] == log_key]:
+                self._bytes -= self._entries.pop(key).nbytes
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+
+_cache = _ChannelCache(CACHE_BUDGET_BYTES)
+
+
+def log_key_for(csv_file):
+    """Returns a cache key that changes when the CSV file is rewritten."""
+    stat = os.stat(csv_file)
+    return (os.path.abspath(csv_file), stat.st_size, stat.st_mtime_ns)
+
+
+def get_channel(df, name, log_key=None):
+    """
+    Evaluates a derived channel, memoized per log.
+
+    Args:
+        df (pd.DataFrame): Cleaned log data.
+        name (str): Derived channel name.
+        log_key (tuple | None): Identifies the log for memoization (see log_key_for).
+            Without a key the channel is computed but not cached.
+
+    Returns:
+        np.ndarray: One value per row.
+    """
+    if log_key is not None:
+        cached = _cache.get((log_key, name))
+        if cached is not None and len(cached) == len(df):
+            return cached
+
+    expression, _ = DERIVED_CHANNELS[name]
+
+    def column(ref):
+        if ref in df.columns:
+            return df[ref].to_numpy(dtype=float)
+        if is_derived(ref):
+            return get_channel(df, ref, log_key)
+        raise KeyError(f"Derived channel '{name}' needs missing column '{ref}'.")
+
+    namespace = dict(EXPRESSION_FUNCTIONS, _col=column)
+    values = np.asarray(eval(_python_expression(expression), {"__builtins__": {}}, namespace), dtype=float)
+    values = np.broadcast_to(values, (len(df),)).copy() if values.ndim == 0 else values
+
+    if log_key is not None:
+        _cache.put((log_key, name), values)
+    return values
+
+
+def add_derived_columns(df, names, log_key=None):
+    """
+    Materializes the requested derived channels as DataFrame columns.
+
+    Args:
+        df (pd.DataFrame): Cleaned log data; modified in place.
+        names (Iterable[str]): Column names; those that are not derived are ignored.
+        log_key (tuple | None): Memoization key, see get_channel.
+
+    Returns:
+        pd.DataFrame: The same DataFrame.
+    """
+    for name in names:
+        if is_derived(name) and name not in df.columns:
+            df[name] = get_channel(df, name, log_key)
+    return df
+
+
+def clear_cache(log_key=None):
+    """Drops memoized channels of one log, or of all logs when no key is given."""
+    _cache.clear(log_key)
@@ -0,0 +1,255 @@
+import itertools
+import numpy as np
+import pandas as pd
+
+DEFAULT_BIQUAD_Q = 1 / np.sqrt(2)   # Butterworth, as used by Betaflight's biquad lowpass
+DEFAULT_NOTCH_Q = 5.0               # Betaflight dyn_notch_q / rpm_filter_q of 500
+NOISE_FLOOR_HZ = 100.0              # Energy above this frequency is treated as noise
+SIGNAL_BAND_HZ = (10.0, 60.0)       # Band used to measure phase delay on real stick motion
+MAX_CHUNK_ELEMENTS = 2_000_000      # Bounds the (candidates x frequencies) working array
+
+
+def _z_inverse(freqs, sample_rate):
+    """Returns e^(-jw) for each frequency, the unit-delay operator on the frequency grid."""
+    return np.exp(-2j * np.pi * freqs / sample_rate)
+
+
+def pt1_response(cutoff_hz, freqs, sample_rate, q=None):
+    """
+    Frequency response of Betaflight's PT1 lowpass: y += k * (x - y).
+
+    Args:
+        cutoff_hz (np.ndarray): Cutoff frequencies, broadcastable against `freqs`.
+        freqs (np.ndarray): Frequencies in Hz at which to evaluate the response.
+        sample_rate (float): Sample rate in Hz.
+        q (None): Unused; present so all stage responses share one signature.
+
+    Returns:
+        np.ndarray: Complex response.
+    """
+    dt = 1.0 / sample_rate
+    rc = 1.0 / (2 * np.pi * cutoff_hz)
+    k = dt / (rc + dt)
+    return k / (1 - (1 - k) * _z_inverse(freqs, sample_rate))
+
+
+def _biquad(b0, b1, b2, a0, a1, a2, freqs, sample_rate):
+    z1 = _z_inverse(freqs, sample_rate)
+    z2 = z1 * z1
+    return (b0 + b1 * z1 + b2 * z2) / (a0 + a1 * z1 + a2 * z2)
+
+
+def biquad_response(cutoff_hz, freqs, sample_rate, q=None):
+    """Frequency response of a biquad lowpass (RBJ cookbook, as in Betaflight)."""
+    q = DEFAULT_BIQUAD_Q if q is None else q
+    omega = 2 * np.pi * cutoff_hz / sample_rate
+    sn, cs = np.sin(omega), np.cos(omega)
+    alpha = sn / (2 * q)
+    b0 = (1 - cs) / 2
+    return _biquad(b0, 1 - cs, b0, 1 + alpha, -2 * cs, 1 - alpha, freqs, sample_rate)
+
+
+def notch_response(center_hz, freqs, sample_rate, q=None):
+    """Frequency response of a biquad notch centred on `center_hz`."""
+    q = DEFAULT_NOTCH_Q if q is None else q
+    omega = 2 * np.pi * center_hz / sample_rate
+    sn, cs = np.sin(omega), np.cos(omega)
+    alpha = sn / (2 * q)
+    return _biquad(1.0, -2 * cs, 1.0, 1 + alpha, -2 * cs, 1 - alpha, freqs, sample_rate)
+
+
+FILTER_RESPONSES = {
+    "pt1": pt1_response,
+    "biquad": biquad_response,
+    "notch": notch_response,
+}
+
+
+def _normalize_chain(chain):
+    """
+    Turns a chain description into (kind, cutoff array, q) triples.
+
+    Each stage is (kind, cutoffs) or (kind, cutoffs, q), where kind is a key of
+    FILTER_RESPONSES and cutoffs is a single frequency or a list of candidates.
+    """
+    stages = []
+    for stage in chain:
+        kind, cutoffs = stage[0], stage[1]
+        q = stage[2] if len(stage) > 2 else None
+        if kind not in FILTER_RESPONSES:
+            raise ValueError(f"Unknown filter type '{kind}'. Expected one of {sorted(FILTER_RESPONSES)}.")
+        stages.append((kind, np.atleast_1d(np.asarray(cutoffs, dtype=float)), q))
+    return stages
+
+
+def _candidate_grid(stages):
+    """Returns every combination of stage cutoffs as a (candidates, stages) array."""
+    grid = np.array(list(itertools.product(*(cutoffs for _, cutoffs, _ in stages))), dtype=float)
+    return grid.reshape(-1, len(stages))
+
+
+def chain_response(chain, freqs, sample_rate):
+    """
+    Evaluates a filter chain for every combination of candidate cutoffs.
+
+    Args:
+        chain (list[tuple]): Filter stages, see _normalize_chain.
+        freqs (np.ndarray): Frequencies in Hz.
+        sample_rate (float): Sample rate in Hz.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Candidate cutoffs with shape (candidates, stages) and
+        the complex response with shape (candidates, len(freqs)).
+    """
+    stages = _normalize_chain(chain)
+    grid = _candidate_grid(stages)
+    response = np.ones((len(grid), len(freqs)), dtype=complex)
+    for column, (kind, _, q) in enumerate(stages):
+        response *= FILTER_RESPONSES[kind](grid[:, column:column + 1], freqs[None, :], sample_rate, q)
+    return grid, response
+
+
+def estimate_sample_rate(time_ms):
+    """Returns the logging rate in Hz from the median spacing of "time_ms"."""
+    step_ms = np.median(np.diff(np.asarray(time_ms, dtype=float)))
+    if not step_ms > 0:
+        raise ValueError("Cannot infer the sample rate from 'time_ms'.")
+    return 1000.0 / step_ms
+
+
+def _spectrum(signal):
+    """Hann-windowed one-sided spectrum and the scale that turns |X|^2 sums into mean power."""
+    x = np.asarray(signal, dtype=float)
+    x = np.nan_to_num(x - np.nanmean(x))
+    window = np.hanning(len(x))
+    spectrum = np.fft.rfft(x * window)
+    weights = np.full(len(spectrum), 2.0)
+    weights[0] = 1.0
+    if len(x) % 2 == 0:
+        weights[-1] = 1.0
+    scale = weights / (len(x) ** 2 * np.mean(window ** 2))
+    return spectrum, scale
+
+
+def _weighted_delay_ms(phase, freqs, weights):
+    """Signal-weighted phase delay in ms from a phase lag (radians) per frequency."""
+    total = weights.sum(axis=-1)
+    delay = -(phase / (2 * np.pi * freqs)) * weights
+    return np.where(total > 0, delay.sum(axis=-1) / np.where(total > 0, total, 1), np.nan) * 1000.0
+
+
+def sweep_filter_cutoffs(df, chain, axes=(0, 1, 2), noise_floor_hz=NOISE_FLOOR_HZ,
+                         signal_band_hz=SIGNAL_BAND_HZ, sample_rate=None):
+    """
+    Simulates a gyro filter chain on "gyroUnfilt[*]" for a batch of candidate cutoffs.
+
+    All candidates are evaluated together as a (candidates x frequencies) array: the
+    unfiltered gyro is transformed once per axis and each candidate's residual noise
+    power and phase delay follow from its frequency response, so hundreds of
+    configurations cost about as much as a few FFTs.
+
+    The filters run at the logging rate, which is usually lower than the flight
+    controller's gyro loop, so cutoffs at or above the logging Nyquist frequency are
+    reported as NaN.
+
+    Args:
+        df (pd.DataFrame): Cleaned log with "time_ms", "gyroUnfilt[i]" and "gyroADC[i]".
+        chain (list[tuple]): Filter stages such as [("pt1", [100, 150, 200]), ("notch", 180, 4)].
+        axes (tuple[int]): Gyro axes to evaluate.
+        noise_floor_hz (float): Energy above this frequency counts as noise.
+        signal_band_hz (tuple[float, float]): Band used to measure phase delay.
+        sample_rate (float | None): Logging rate in Hz, inferred from "time_ms" if None.
+
+    Returns:
+        pd.DataFrame: One row per axis and candidate with the stage cutoffs, "noise_power",
+        "delay_ms", and the logged gyroADC baseline ("logged_noise_power", "logged_delay_ms",
+        "noise_vs_logged").
+    """
+    if sample_rate is None:
+        sample_rate = estimate_sample_rate(df["time_ms"])
+    nyquist = sample_rate / 2
+    stages = _normalize_chain(chain)
+    stage_columns = [f"stage{position}_{kind}_hz" for position, (kind, _, _) in enumerate(stages, start=1)]
+
+    results = []
+    for axis in axes:
+        raw_col, filtered_col = f"gyroUnfilt[{axis}]", f"gyroADC[{axis}]"
+        if raw_col not in df.columns:
+            raise ValueError(f"Column '{raw_col}' is required for filter simulation.")
+
+        raw_spectrum, scale = _spectrum(df[raw_col])
+        freqs = np.fft.rfftfreq(len(df), d=1.0 / sample_rate)
+        raw_power = np.abs(raw_spectrum) ** 2 * scale
+        noise_band = freqs >= noise_floor_hz
+        signal_band = (freqs >= signal_band_hz[0]) & (freqs <= min(signal_band_hz[1], nyquist))
+
+        # Baseline: what the flight controller's own filters produced
+        logged_noise = logged_delay = np.nan
+        if filtered_col in df.columns:
+            logged_spectrum, _ = _spectrum(df[filtered_col])
+            logged_noise = float((np.abs(logged_spectrum[noise_band]) ** 2 * scale[noise_band]).sum())
+            cross = logged_spectrum[signal_band] * np.conj(raw_spectrum[signal_band])
+            logged_delay = float(_weighted_delay_ms(np.angle(cross), freqs[signal_band], raw_power[signal_band]))
+
+        # Only the bins that feed a metric are evaluated
+        band = noise_band | signal_band
+        band_freqs = freqs[band]
+        band_power = raw_power[band]
+        in_noise = noise_band[band]
+        in_signal = signal_band[band]
+
+        grid = _candidate_grid(stages)
+        noise_power = np.empty(len(grid))
+        delay_ms = np.empty(len(grid))
+        chunk = max(1, MAX_CHUNK_ELEMENTS // max(1, len(band_freqs)))
+        for first in range(0, len(grid), chunk):
+            rows = grid[first:first + chunk]
+            response = np.ones((len(rows), len(band_freqs)), dtype=complex)
+            for column, (kind, _, q) in enumerate(stages):
+                response *= FILTER_RESPONSES[kind](rows[:, column:column + 1], band_freqs[None, :], sample_rate, q)
+            gain = np.abs(response) ** 2
+            noise_power[first:first + chunk] = (gain[:, in_noise] * band_power[in_noise]).sum(axis=1)
+            delay_ms[first:first + chunk] = _weighted_delay_ms(
+                np.angle(response[:, in_signal]), band_freqs[in_signal], band_power[in_signal][None, :]
+            )
+
+        invalid = (grid >= nyquist).any(axis=1) | (grid <= 0).any(axis=1)
+        noise_power[invalid] = np.nan
+        delay_ms[invalid] = np.nan
+
+        axis_results = pd.DataFrame(grid, columns=stage_columns)
+        axis_results.insert(0, "axis", axis)
+        axis_results["noise_power"] = noise_power
+        axis_results["delay_ms"] = delay_ms
+        axis_results["logged_noise_power"] = logged_noise
+        axis_results["logged_delay_ms"] = logged_delay
+        axis_results["noise_vs_logged"] = noise_power / logged_noise if logged_noise else np.nan
+        results.append(axis_results)
+
+    return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+
+
+def apply_filter_chain(signal, chain, sample_rate):
+    """
+    Filters a signal with a single filter configuration (one cutoff per stage).
+
+    The chain is applied in the frequency domain with zero padding, which matches the
+    steady-state output of the recursive filters without a per-sample Python loop.
+
+    Args:
+        signal (array-like): Samples to filter, e.g. df["gyroUnfilt[0]"].
+        chain (list[tuple]): Filter stages with a single cutoff each.
+        sample_rate (float): Sample rate in Hz.
+
+    Returns:
+        np.ndarray: Filtered samples.
+    """
+    x = np.nan_to_num(np.asarray(signal, dtype=float))
+    padded = 1 << int(np.ceil(np.log2(max(2, 2 * len(x)))))
+    freqs = np.fft.rfftfreq(padded, d=1.0 / sample_rate)
+    grid, response = chain_response(chain, freqs, sample_rate)
+    if len(grid) != 1:
+        raise ValueError("apply_filter_chain expects exactly one cutoff per stage.")
+    offset = x[0] if len(x) else 0.0  # start from rest at the first sample instead of zero
+    filtered = np.fft.irfft(np.fft.rfft(x - offset, n=padded) * response[0], n=padded)
+    return filtered[:len(x)] + offset
@@ -0,0 +1,243 @@
+import numpy as np
+import pandas as pd
+
+PHASE_DISARMED = "Disarmed"
+PHASE_ARMED_IDLE = "Armed idle"
+PHASE_HOVER = "Hover"
+PHASE_FLIGHT = "Flight"
+PHASE_PUNCH_OUT = "Punch-out"
+PHASE_LANDING = "Landing"
+PHASE_FAILSAFE = "Failsafe"
+
+# Order matters: the position of a phase in this list is its integer code
+PHASE_NAMES = [
+    PHASE_DISARMED,
+    PHASE_ARMED_IDLE,
+    PHASE_HOVER,
+    PHASE_FLIGHT,
+    PHASE_PUNCH_OUT,
+    PHASE_LANDING,
+    PHASE_FAILSAFE,
+]
+
+IDLE_STICK = 0.05       # rcCommand[3] at or below 5% is treated as throttle idle
+PUNCH_STICK = 0.70      # rcCommand[3] at or above 70% is treated as a punch-out
+HOVER_BAND = 0.15       # +-15% around the hover throttle level counts as hover
+MIN_PHASE_MS = 100.0    # shorter runs are absorbed into the preceding phase
+
+
+def _run_starts(codes):
+    """Returns the start positions of each run of equal values in an integer array."""
+    if len(codes) == 0:
+        return np.empty(0, dtype=np.int64)
+    change = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    return np.concatenate(([0], change))
+
+
+def _flag_tokens_present(series, token):
+    """Returns a boolean array telling whether `token` appears in each flags cell."""
+    values = series.astype(str).str.strip().str.upper()
+    return values.str.contains(rf"(?:^|\|){token}(?:\||$)", regex=True).to_numpy()
+
+
+def _armed_mask(df):
+    """
+    Detects armed rows from "stateFlags (flags)".
+
+    Logs whose flags never carry an ARMED token fall back to the motor outputs:
+    a craft is considered armed while any motor is commanded above zero.
+    """
+    n = len(df)
+    if "stateFlags (flags)" in df.columns:
+        armed = _flag_tokens_present(df["stateFlags (flags)"], "ARMED")
+        if armed.any():
+            return armed
+    motor_columns = [f"motor[{i}]" for i in range(4) if f"motor[{i}]" in df.columns]
+    if motor_columns:
+        motors = df[motor_columns].apply(pd.to_numeric, errors="coerce").to_numpy()
+        return np.nan_to_num(motors).max(axis=1) > 0
+    return np.zeros(n, dtype=bool)
+
+
+def _failsafe_mask(df):
+    """Returns a boolean array that is True wherever a failsafe phase is active."""
+    if "failsafePhase (flags)" not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    values = df["failsafePhase (flags)"].astype(str).str.strip().str.upper()
+    return ~values.isin(["IDLE", "0", "", "NAN"]).to_numpy()
+
+
+def throttle_stick(df):
+    """Returns the throttle stick position (rcCommand[3]) scaled to 0..1, zeros if it is not logged."""
+    if "rcCommand[3]" not in df.columns:
+        return np.zeros(len(df))
+    stick = (pd.to_numeric(df["rcCommand[3]"], errors="coerce").to_numpy(dtype=float) - 1000.0) / 1000.0
+    return np.clip(np.nan_to_num(stick), 0.0, 1.0)
+
+
+def arming_row(df):
+    """Returns the first armed row of a log (see _armed_mask), or None if it never arms."""
+    armed = np.flatnonzero(_armed_mask(df))
+    return int(armed[0]) if len(armed) else None
+
+
+def classify_rows(df):
+    """
+    Classifies every row of a cleaned log into a flight phase.
+
+    Args:
+        df (pd.DataFrame): DataFrame returned by load_and_clean_csv.
+
+    Returns:
+        np.ndarray: Integer phase codes (indices into PHASE_NAMES), one per row.
+    """
+    n = len(df)
+    armed = _armed_mask(df)
+    failsafe = _failsafe_mask(df)
+
+    stick = throttle_stick(df)
+
+    if "throttle" in df.columns:
+        throttle = np.nan_to_num(pd.to_numeric(df["throttle"], errors="coerce").to_numpy(dtype=float))
+    else:
+        throttle = np.zeros(n)
+
+    codes = np.full(n, PHASE_NAMES.index(PHASE_DISARMED), dtype=np.int8)
+    codes[armed] = PHASE_NAMES.index(PHASE_FLIGHT)
+    codes[armed & (stick <= IDLE_STICK)] = PHASE_NAMES.index(PHASE_ARMED_IDLE)
+
+    # Hover level: median motor throttle while airborne but below punch-out stick
+    airborne = armed & (stick > IDLE_STICK) & (stick < PUNCH_STICK)
+    hover_level = float(np.median(throttle[airborne])) if airborne.any() else 0.0
+    if hover_level > 0:
+        hovering = airborne & (np.abs(throttle - hover_level) <= HOVER_BAND * hover_level)
+        codes[hovering] = PHASE_NAMES.index(PHASE_HOVER)
+    codes[armed & (stick >= PUNCH_STICK)] = PHASE_NAMES.index(PHASE_PUNCH_OUT)
+
+    # Landing: the tail of every armed run after the last row at or above hover level
+    if hover_level > 0:
+        lifted = armed & (throttle >= (1 - HOVER_BAND) * hover_level)
+        starts = _run_starts(armed.astype(np.int8))
+        ends = np.append(starts[1:], n)
+        armed_runs = armed[starts]
+        # Position of the last lifted row up to and including each row
+        last_lifted = np.maximum.accumulate(np.where(lifted, np.arange(n), -1))
+        for start, end in zip(starts[armed_runs], ends[armed_runs]):
+            last = last_lifted[end - 1]
+            if last >= start and last + 1 < end:
+                codes[last + 1:end] = PHASE_NAMES.index(PHASE_LANDING)
+
+    codes[failsafe] = PHASE_NAMES.index(PHASE_FAILSAFE)
+    return codes
+
+
+def _absorb_short_runs(codes, time_ms, min_ms):
+    """Merges non-failsafe runs shorter than `min_ms` into the run before them (vectorized)."""
+    starts = _run_starts(codes)
+    if len(starts) <= 1:
+        return codes
+    ends = np.append(starts[1:], len(codes))
+    end_times = np.append(time_ms[starts[1:]], time_ms[-1])
+    short = (end_times - time_ms[starts]) < min_ms
+    short[0] = False  # nothing precedes the first run
+    short &= codes[starts] != PHASE_NAMES.index(PHASE_FAILSAFE)  # never hide a failsafe
+    if not short.any():
+        return codes
+    # Replace each short run's code with the code of the closest preceding long run
+    run_codes = np.where(short, -1, codes[starts])
+    keep = np.maximum.accumulate(np.where(run_codes >= 0, np.arange(len(run_codes)), 0))
+    run_codes = codes[starts][keep]
+    return np.repeat(run_codes, ends - starts).astype(codes.dtype)
+
+
+class FlightPhases:
+    """
+    Run-length encoded flight phases of a single log.
+
+    `intervals` is a DataFrame indexed by a left-closed pd.IntervalIndex of row
+    positions, with "phase", "start_ms" and "end_ms" columns. Row positions for
+    each phase are built once on first request and reused afterwards.
+    """
+
+    def __init__(self, intervals, row_count):
+        self.intervals = intervals
+        self.row_count = row_count
+        self._rows_cache = {}
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def names(self):
+        """Returns the phases present in the log, in PHASE_NAMES order."""
+        present = set(self.intervals["phase"])
+        return [name for name in PHASE_NAMES if name in present]
+
+    def rows(self, phase):
+        """Returns the sorted row positions that belong to `phase`."""
+        if phase not in self._rows_cache:
+            selected = self.intervals[self.intervals["phase"] == phase]
+            starts = selected.index.left.to_numpy()
+            lengths = selected.index.right.to_numpy() - starts
+            if len(starts):
+                # Concatenated aranges without a Python loop
+                offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+                rows = np.arange(lengths.sum()) + offsets
+            else:
+                rows = np.empty(0, dtype=np.int64)
+            self._rows_cache[phase] = rows
+        return self._rows_cache[phase]
+
+    def mask(self, phase):
+        """Returns a boolean row mask for `phase`."""
+        mask = np.zeros(self.row_count, dtype=bool)
+        mask[self.rows(phase)] = True
+        return mask
+
+    def duration_s(self, phase):
+        """Returns the total time spent in `phase`, in seconds."""
+        selected = self.intervals[self.intervals["phase"] == phase]
+        return float((selected["end_ms"] - selected["start_ms"]).sum()) / 1000.0
+
+    def phase_at(self, row):
+        """Returns the phase name of a row position."""
+        position = self.intervals.index.get_loc(row)
+        return self.intervals["phase"].iloc[position]
+
+
+def segment_flight_phases(df, min_phase_ms=MIN_PHASE_MS):
+    """
+    Splits a log into flight phases using run-length encoding.
+
+    Uses "stateFlags (flags)" for the armed state, the derived "throttle" and
+    "rcCommand[3]" for hover and punch-outs, and "failsafePhase (flags)" for
+    failsafe intervals.
+
+    Args:
+        df (pd.DataFrame): DataFrame returned by load_and_clean_csv.
+        min_phase_ms (float): Runs shorter than this are merged into the previous phase.
+
+    Returns:
+        FlightPhases: Interval index of the phases found in the log.
+    """
+    n = len(df)
+    codes = classify_rows(df)
+    if "time_ms" in df.columns:
+        time_ms = df["time_ms"].to_numpy(dtype=float)
+    else:
+        time_ms = np.arange(n, dtype=float)
+    if n and min_phase_ms > 0:
+        codes = _absorb_short_runs(codes, time_ms, min_phase_ms)
+
+    starts = _run_starts(codes)
+    ends = np.append(starts[1:], n)
+    index = pd.IntervalIndex.from_arrays(starts, ends, closed="left", name="rows")
+    intervals = pd.DataFrame(
+        {
+            "phase": np.array(PHASE_NAMES, dtype=object)[codes[starts]] if n else [],
+            "start_ms": time_ms[starts] if n else [],
+            # A phase ends where the next one starts; the last one ends at the last sample
+            "end_ms": np.append(time_ms[starts[1:]], time_ms[-1]) if n else [],
+        },
+        index=index,
+    )
+    return FlightPhases(intervals, n)
@@ -0,0 +1,126 @@
+import base64
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from PIL import Image, features
+
+DEFAULT_MAX_SIDE = 1024     # Longest side sent for plot snapshots
+ATTACHMENT_MAX_SIDE = 2048  # Vision models downscale anything larger anyway
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+CACHE_SIZE = 32
+
+# Formats vision models accept, by Pillow format name
+MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp", "GIF": "image/gif"}
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _fit(image, max_side):
+    if max_side and max(image.size) > max_side:
+        scale = max_side / max(image.size)
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+    return image
+
+
+def encode_image(image, max_side=DEFAULT_MAX_SIDE):
+    """
+    Re-encodes an image as compactly as possible for a vision model.
+
+    The image is downscaled to `max_side` and encoded as a 256-color PNG (lossless
+    for flat plot colors), a JPEG and, when Pillow supports it, a WebP; the
+    smallest result wins.
+
+    Args:
+        image (PIL.Image.Image): Image to encode.
+        max_side (int | None): Longest side in pixels; None keeps the size.
+
+    Returns:
+        tuple[str, bytes]: MIME type and encoded bytes.
+    """
+    image = _fit(image, max_side)
+    rgb = image.convert("RGB") if image.mode != "RGB" else image
+    candidates = []
+
+    buffer = io.BytesIO()
+    rgb.quantize(colors=256, method=Image.Quantize.MEDIANCUT).save(buffer, format="PNG", optimize=True)
+    candidates.append(("image/png", buffer.getvalue()))
+
+    buffer = io.BytesIO()
+    rgb.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    candidates.append(("image/jpeg", buffer.getvalue()))
+
+    if features.check("webp"):
+        buffer = io.BytesIO()
+        rgb.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+        candidates.append(("image/webp", buffer.getvalue()))
+
+    return min(candidates, key=lambda candidate: len(candidate[1]))
+
+
+def image_block(mime, data):
+    """Returns an OpenAI "image_url" content block with the image inlined as a data URL."""
+    return {
+        "type": "image_url",
+        "image_url": {"url": f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"},
+    }
+
+
+def encode_image_file(path, max_side=ATTACHMENT_MAX_SIDE):
+    """
+    Prepares an image file for the chat with its real MIME type.
+
+    The file is sent as-is when it is already in an accepted format, small enough and
+    smaller than a compact re-encoding; otherwise the re-encoding is sent.
+
+    Args:
+        path (str): Image file path.
+        max_side (int): Longest side in pixels.
+
+    Returns:
+        tuple[str, bytes]: MIME type and bytes.
+    """
+    with open(path, "rb") as f:
+        original = f.read()
+    with Image.open(io.BytesIO(original)) as image:
+        image.load()
+        mime, data = encode_image(image, max_side)
+        if image.format in MIME_TYPES and max(image.size) <= max_side and len(original) <= len(data):
+            return MIME_TYPES[image.format], original
+    return mime, data
+
+
+def snapshot_payload(rgba, width, height, max_side=DEFAULT_MAX_SIDE):
+    """
+    Encodes a rendered plot, reusing the previous result for identical pixels.
+
+    The cache key is a hash of the pixels and the requested size, so asking about
+    the same plot state again costs no rendering work and sends the same bytes.
+
+    Args:
+        rgba (bytes): Raw RGBA pixels, row by row from the top.
+        width (int): Image width.
+        height (int): Image height.
+        max_side (int): Longest side in pixels.
+
+    Returns:
+        tuple[str, bytes, str]: MIME type, encoded bytes and the pixel digest.
+    """
+    digest = hashlib.sha1(rgba).hexdigest()
+    key = (digest, width, height, max_side)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    image = Image.frombuffer("RGBA", (width, height), rgba, "raw", "RGBA", 0, 1)
+    mime, data = encode_image(image, max_side)
+    result = (mime, data, digest)
+
+    with _lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
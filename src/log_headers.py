@@ -0,0 +1,47 @@
+import os
+
+
+def headers_file_for(csv_file):
+    """Returns the path of the headers.txt written by convert_bbl_to_csv next to a CSV log."""
+    return os.path.join(os.path.dirname(os.path.abspath(csv_file)), "headers.txt")
+
+
+def load_log_headers(headers_file):
+    """
+    Parses a headers.txt file into a dictionary.
+
+    Args:
+        headers_file (str): Path to headers.txt.
+
+    Returns:
+        dict[str, str]: Header name -> raw value (e.g. "motor_poles" -> "14").
+        Empty if the file does not exist.
+    """
+    headers = {}
+    if not os.path.exists(headers_file):
+        return headers
+    with open(headers_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if ":" in line:
+                name, value = line.strip().split(":", 1)
+                headers.setdefault(name.strip(), value.strip())
+    return headers
+
+
+def header_number(headers, name, default=None, index=0):
+    """
+    Reads a numeric header value, e.g. "motor_poles" or one entry of "rollPID".
+
+    Args:
+        headers (dict): Parsed headers from load_log_headers.
+        name (str): Header name.
+        default: Value returned if the header is missing or not numeric.
+        index (int): Position in comma-separated values such as "45,80,40".
+
+    Returns:
+        float | default: The parsed value.
+    """
+    try:
+        return float(headers[name].split(",")[index])
+    except (KeyError, IndexError, ValueError):
+        return default
@@ -0,0 +1,200 @@
+import os
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from src.data_processor import load_and_clean_csv
+from src.filter_sim import estimate_sample_rate
+from src.log_headers import headers_file_for, load_log_headers, header_number
+
+ERPM_SCALE = 100            # Blackbox logs eRPM divided by 100
+DEFAULT_MOTOR_POLES = 14
+DEFAULT_HARMONICS = 3       # Betaflight's rpm_filter_harmonics default
+FRAME_SIZE = 256            # STFT frame length in samples
+LINE_HALF_WIDTH_HZ = 10.0   # Bins within +-10 Hz of a harmonic count as "on the line"
+MIN_NOISE_HZ = 50.0         # Energy below this is stick motion, not motor noise
+CACHE_SIZE = 64
+
+_cache = OrderedDict()
+
+
+def erpm_to_hz(erpm, motor_poles):
+    """
+    Converts logged eRPM values to mechanical rotation frequency.
+
+    Args:
+        erpm (np.ndarray): Values of the "eRPM[i]" columns (eRPM / 100).
+        motor_poles (int): Number of magnet poles (the "motor_poles" header).
+
+    Returns:
+        np.ndarray: Mechanical frequency in Hz.
+    """
+    return np.asarray(erpm, dtype=float) * ERPM_SCALE / 60.0 / (motor_poles / 2.0)
+
+
+def _frames(values, frame_size, hop):
+    """Returns a (frames, frame_size) strided view of a 1-D array."""
+    return sliding_window_view(values, frame_size)[::hop]
+
+
+def _line_mask(freqs, line_hz, half_width_hz):
+    """
+    Marks the bins within +-half_width_hz of any line, per frame.
+
+    The band edges of each line are found with searchsorted and painted into a
+    (frames x bins) difference array, so memory grows with frames x bins rather
+    than frames x lines x bins.
+    """
+    frames, bins = len(line_hz), len(freqs)
+    lo = np.searchsorted(freqs, line_hz - half_width_hz, side="left")
+    hi = np.searchsorted(freqs, line_hz + half_width_hz, side="right")
+    rows = np.broadcast_to(np.arange(frames)[:, None], line_hz.shape)
+    edges = np.zeros((frames, bins + 1), dtype=np.int32)
+    np.add.at(edges, (rows, lo), 1)
+    np.add.at(edges, (rows, hi), -1)
+    return np.cumsum(edges[:, :-1], axis=1) > 0
+
+
+def track_motor_harmonics(df, motor_poles=DEFAULT_MOTOR_POLES, harmonics=DEFAULT_HARMONICS,
+                          frame_size=FRAME_SIZE, line_half_width_hz=LINE_HALF_WIDTH_HZ,
+                          min_noise_hz=MIN_NOISE_HZ, sample_rate=None):
+    """
+    Tracks motor fundamentals and harmonics and measures the gyro noise sitting on them.
+
+    Every STFT frame is processed at once: frames are strided views of the log,
+    the motor frequency of each frame is the mean of its eRPM samples, and the
+    per-frame energy within +-line_half_width_hz of every harmonic is summed with
+    a (frames x bins) mask.
+
+    Args:
+        df (pd.DataFrame): Cleaned log with "time_ms", "eRPM[i]" and gyro columns.
+        motor_poles (int): Magnet pole count from the headers.
+        harmonics (int): Number of harmonics to track, the fundamental included.
+        frame_size (int): STFT frame length in samples (50% overlap).
+        line_half_width_hz (float): Half-width of the band around each line.
+        min_noise_hz (float): Lower bound of the band counted as noise.
+        sample_rate (float | None): Logging rate in Hz, inferred from "time_ms" if None.
+
+    Returns:
+        dict: "lines" - DataFrame of tracked frequencies per frame/motor/harmonic;
+        "energy" - DataFrame with one row per axis and signal ("gyroUnfilt"/"gyroADC")
+        giving the noise energy on the lines, the total noise energy and their ratio;
+        "reduction_db" - dict axis -> on-line energy reduction from unfiltered to filtered gyro.
+    """
+    erpm_columns = [f"eRPM[{i}]" for i in range(4) if f"eRPM[{i}]" in df.columns]
+    if not erpm_columns:
+        raise ValueError("The log has no eRPM columns (bidirectional DShot telemetry is required).")
+    if sample_rate is None:
+        sample_rate = estimate_sample_rate(df["time_ms"])
+    frame_size = min(frame_size, len(df))
+    hop = max(1, frame_size // 2)
+
+    # Frame-averaged motor frequencies: (frames, motors) -> (frames, motors * harmonics)
+    motor_hz = erpm_to_hz(df[erpm_columns].to_numpy(dtype=float), motor_poles)
+    frame_motor_hz = np.stack([_frames(motor_hz[:, m], frame_size, hop).mean(axis=1)
+                               for m in range(len(erpm_columns))], axis=1)
+    orders = np.arange(1, harmonics + 1)
+    line_hz = (frame_motor_hz[:, :, None] * orders[None, None, :]).reshape(len(frame_motor_hz), -1)
+
+    freqs = np.fft.rfftfreq(frame_size, d=1.0 / sample_rate)
+    noise_bins = freqs >= min_noise_hz
+    on_line = _line_mask(freqs, line_hz, line_half_width_hz)
+    on_line &= noise_bins[None, :] & (line_hz.max(axis=1, keepdims=True) > 0)
+    window = np.hanning(frame_size)
+
+    frame_start = np.arange(len(frame_motor_hz)) * hop
+    time_ms = df["time_ms"].to_numpy(dtype=float)
+    lines = pd.DataFrame({
+        "time_ms": time_ms[np.minimum(frame_start + frame_size // 2, len(df) - 1)],
+    })
+    for m, column in enumerate(erpm_columns):
+        for order in orders:
+            lines[f"motor{m}_h{order}_hz"] = frame_motor_hz[:, m] * order
+
+    energy_rows = []
+    reduction_db = {}
+    for axis in range(3):
+        on_line_energy = {}
+        for signal in ("gyroUnfilt", "gyroADC"):
+            column = f"{signal}[{axis}]"
+            if column not in df.columns:
+                continue
+            frames = _frames(np.nan_to_num(df[column].to_numpy(dtype=float)), frame_size, hop)
+            frames = (frames - frames.mean(axis=1, keepdims=True)) * window
+            power = np.abs(np.fft.rfft(frames, axis=1)) ** 2
+            line_energy = float((power * on_line).sum())
+            noise_energy = float(power[:, noise_bins].sum())
+            on_line_energy[signal] = line_energy
+            energy_rows.append({
+                "axis": axis,
+                "signal": signal,
+                "line_energy": line_energy,
+                "noise_energy": noise_energy,
+                "line_fraction": line_energy / noise_energy if noise_energy else np.nan,
+            })
+        if on_line_energy.get("gyroUnfilt") and "gyroADC" in on_line_energy:
+            reduction_db[axis] = float(10 * np.log10(max(on_line_energy["gyroADC"], 1e-12) / on_line_energy["gyroUnfilt"]))
+
+    return {"lines": lines, "energy": pd.DataFrame(energy_rows), "reduction_db": reduction_db}
+
+
+def analyze_motor_harmonics(csv_file, harmonics=DEFAULT_HARMONICS, frame_size=FRAME_SIZE):
+    """
+    Runs track_motor_harmonics on a decoded CSV, reading the pole count from headers.txt.
+
+    Results are cached per file (path, size and modification time) and parameters, so
+    re-running across a fleet of logs only analyzes new or changed files.
+
+    Args:
+        csv_file (str): Path to the decoded CSV file.
+        harmonics (int): Number of harmonics to track.
+        frame_size (int): STFT frame length in samples.
+
+    Returns:
+        dict: See track_motor_harmonics.
+    """
+    stat = os.stat(csv_file)
+    key = (os.path.abspath(csv_file), stat.st_size, stat.st_mtime_ns, harmonics, frame_size)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    headers = load_log_headers(headers_file_for(csv_file))
+    motor_poles = int(header_number(headers, "motor_poles", DEFAULT_MOTOR_POLES))
+    df = load_and_clean_csv(csv_file)
+    result = track_motor_harmonics(df, motor_poles=motor_poles, harmonics=harmonics, frame_size=frame_size)
+
+    _cache[key] = result
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
+
+
+def analyze_fleet(csv_files, harmonics=DEFAULT_HARMONICS):
+    """
+    Summarizes motor-line noise for many logs.
+
+    Args:
+        csv_files (list[str]): Decoded CSV files.
+        harmonics (int): Number of harmonics to track.
+
+    Returns:
+        pd.DataFrame: One row per file and axis with the on-line energy fraction before
+        and after filtering and the reduction in dB. Logs without eRPM data are skipped.
+    """
+    rows = []
+    for csv_file in csv_files:
+        try:
+            result = analyze_motor_harmonics(csv_file, harmonics=harmonics)
+        except ValueError:
+            continue
+        energy = result["energy"].set_index(["axis", "signal"])
+        for axis, reduction in result["reduction_db"].items():
+            rows.append({
+                "file": os.path.basename(csv_file),
+                "axis": axis,
+                "unfiltered_line_fraction": energy.loc[(axis, "gyroUnfilt"), "line_fraction"],
+                "filtered_line_fraction": energy.loc[(axis, "gyroADC"), "line_fraction"],
+                "reduction_db": reduction,
+            })
+    return pd.DataFrame(rows)
@@ -0,0 +1,158 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+import numpy as np
+from bokeh.models import ColumnDataSource, HoverTool, Span
+from bokeh.palettes import Category10
+from bokeh.plotting import figure
+from src.data_processor import load_and_clean_csv
+from src.decimation import decimation_indices
+from src.derived_channels import add_derived_columns, log_key_for, raw_dependencies
+from src.flight_phases import arming_row, throttle_stick
+from src.time_index import load_events
+
+ANCHOR_START = "Log start"
+ANCHOR_ARMING = "Arming"
+ANCHOR_EVENT = "Event"
+ANCHOR_THROTTLE = "Throttle threshold"
+ANCHORS = [ANCHOR_ARMING, ANCHOR_EVENT, ANCHOR_THROTTLE, ANCHOR_START]
+
+# Columns read besides the plotted one, so every anchor can be located
+ANCHOR_COLUMNS = ["rcCommand[3]", "motor[0]", "motor[1]", "motor[2]", "motor[3]", "stateFlags (flags)"]
+
+
+def anchor_time_ms(df, csv_file, anchor, event_name=None, throttle=0.5):
+    """
+    Locates the alignment anchor of one log.
+
+    Args:
+        df (pd.DataFrame): Cleaned log data.
+        csv_file (str): Path to the CSV file; its .event file is used for event anchors.
+        anchor (str): One of ANCHORS.
+        event_name (str | None): Event to align on (first occurrence) for ANCHOR_EVENT.
+        throttle (float): Stick position (0..1) for ANCHOR_THROTTLE; the first row at or
+            above it is the anchor.
+
+    Returns:
+        float | None: Anchor time in milliseconds, or None if the log has no such anchor.
+    """
+    time_ms = df["time_ms"].to_numpy(dtype=float)
+    if not len(time_ms):
+        return None
+    if anchor == ANCHOR_START:
+        return float(time_ms[0])
+    if anchor == ANCHOR_ARMING:
+        row = arming_row(df)
+    elif anchor == ANCHOR_THROTTLE:
+        above = np.flatnonzero(throttle_stick(df) >= throttle)
+        row = int(above[0]) if len(above) else None
+    elif anchor == ANCHOR_EVENT:
+        events = load_events(csv_file)
+        matches = events.loc[events["name"] == event_name, "time_ms"]
+        # Events such as "Sync beep" are often logged just before the first frame
+        return float(matches.iloc[0]) if len(matches) else None
+    else:
+        raise ValueError(f"Unknown anchor '{anchor}'.")
+    return float(time_ms[row]) if row is not None else None
+
+
+def prepare_overlay_trace(csv_file, column, anchor, event_name=None, throttle=0.5, width=900, check=None):
+    """
+    Loads one log and returns its decimated trace on a time axis relative to the anchor.
+
+    Only the plotted column (or the raw inputs of a derived channel) and the anchor
+    columns are read from the CSV.
+
+    Args:
+        csv_file (str): Path to the decoded CSV file.
+        column (str): Raw or derived column to plot.
+        anchor, event_name, throttle: See anchor_time_ms.
+        width (int): Plot width in pixels, the decimation target.
+        check (callable | None): Raises when the request was cancelled; called before
+            and after the read.
+
+    Returns:
+        dict: "name", "x" (ms relative to the anchor), "y", "anchor_ms", and "error"
+        (None, or the reason the log was left out).
+    """
+    name = os.path.splitext(os.path.basename(csv_file))[0]
+    trace = {"name": name, "x": np.empty(0), "y": np.empty(0), "anchor_ms": None, "error": None}
+    if check is not None:
+        check()
+    df = load_and_clean_csv(csv_file, load_non_numeric=True, columns=raw_dependencies(column) + ANCHOR_COLUMNS)
+    if check is not None:
+        check()
+    log_key = log_key_for(csv_file)
+    add_derived_columns(df, [column], log_key)
+    if column not in df.columns or "time_ms" not in df.columns:
+        trace["error"] = f"no '{column}' column"
+        return trace
+    anchor_ms = anchor_time_ms(df, csv_file, anchor, event_name, throttle)
+    if anchor_ms is None:
+        trace["error"] = f"no {anchor.lower()} anchor"
+        return trace
+
+    indices = decimation_indices(df, column, width, log_key)
+    trace["x"] = df["time_ms"].to_numpy(dtype=np.float64)[indices] - anchor_ms
+    trace["y"] = df[column].to_numpy(dtype=np.float64)[indices]
+    trace["anchor_ms"] = anchor_ms
+    return trace
+
+
+def load_overlay_traces(csv_files, column, anchor, event_name=None, throttle=0.5, width=900, max_workers=None,
+                        check=None):
+    """
+    Prepares the traces of several logs concurrently (see prepare_overlay_trace).
+
+    CSV parsing and the NumPy work release the GIL for most of their run time, so a
+    thread per log lets the reads overlap instead of adding up. Once `check` raises
+    in one log, the logs not started yet are dropped and the error is re-raised.
+
+    Returns:
+        list[dict]: Traces in the order of csv_files.
+    """
+    workers = max_workers or min(len(csv_files), (os.cpu_count() or 1) + 4) or 1
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        return list(pool.map(
+            lambda csv_file: prepare_overlay_trace(csv_file, column, anchor, event_name, throttle, width, check),
+            csv_files))
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def build_overlay_figure(traces, column, anchor_label, title=None, width=900, height=600):
+    """
+    Plots prepared traces over each other, with the anchor at 0 ms.
+
+    Each trace keeps its own source because the logs have different time axes.
+
+    Args:
+        traces (list[dict]): Output of load_overlay_traces; traces with an error are skipped.
+        column (str): Plotted column, used for the axis label.
+        anchor_label (str): Text shown at the anchor marker.
+        title (str | None): Plot title.
+        width (int): Plot width in pixels.
+        height (int): Plot height in pixels.
+
+    Returns:
+        bokeh.plotting.figure: The figure.
+    """
+    p = figure(title=title or f"{column} aligned on {anchor_label}", x_axis_label=f"Time from {anchor_label} (ms)",
+               y_axis_label=column, width=width, height=height)
+    renderers = []
+    for trace, color in zip([t for t in traces if t["error"] is None], cycle(Category10[10])):
+        source = ColumnDataSource(data={"time_ms": trace["x"], "value": trace["y"]})
+        renderers.append(p.line("time_ms", "value", source=source, legend_label=trace["name"], name=trace["name"],
+                                line_width=2, color=color))
+    p.add_tools(HoverTool(renderers=renderers, tooltips=[
+        ("Log", "$name"),
+        ("Time (ms)", "$snap_x"),
+        ("Value", "$snap_y"),
+    ]))
+    p.add_layout(Span(location=0, dimension="height", line_color="gray", line_dash="dashed", line_width=1))
+    if renderers:
+        p.legend.title = "Logs"
+        p.legend.location = "top_left"
+        p.legend.click_policy = "hide"
+    return p
@@ -0,0 +1,103 @@
+from src.data_processor import load_and_clean_csv, load_log_events
+from src.decimation import decimated_columns
+from src.derived_channels import add_derived_columns, log_key_for, raw_dependencies
+from src.plot_server import make_plot_spec
+from src.session_cache import get_session_cache
+
+PLOT_WIDTH = 900
+
+
+class PlotCancelled(Exception):
+    """Raised inside a data-preparation job whose request was cancelled or superseded."""
+
+
+def _never_cancelled():
+    pass
+
+
+def load_plot_frame(csv_file, columns, check=_never_cancelled):
+    """
+    Loads only what a plot of `columns` needs: their raw inputs and the time column.
+
+    A session in the session cache is projected from memory instead of the file.
+
+    Args:
+        csv_file (str): Path to the decoded CSV file.
+        columns (list[str]): Raw or derived columns to plot.
+        check (callable): Raises PlotCancelled when the request was cancelled; called
+            between stages.
+
+    Returns:
+        tuple[pd.DataFrame, tuple]: The projected frame with the derived columns added,
+        and the log key.
+    """
+    needed = []
+    for column in columns:
+        needed += [col for col in raw_dependencies(column) if col not in needed]
+    cache = get_session_cache()
+    schema = cache.schema(csv_file)
+    df = None
+    if schema is not None:
+        df = cache.columns(csv_file, [col for col in schema if col in needed or col == "time_ms"])
+    if df is None:
+        df = load_and_clean_csv(csv_file, columns=needed)
+    check()
+    log_key = log_key_for(csv_file)
+    add_derived_columns(df, columns, log_key)
+    check()
+    if "time_ms" not in df.columns:
+        raise ValueError("No valid 'time_ms' column found.")
+    return df, log_key
+
+
+def prepare_line_plot(csv_file, columns, labels, colors, title, width=PLOT_WIDTH, check=_never_cancelled):
+    """
+    Data-preparation stage of a line plot: load, project and decimate.
+
+    Everything expensive happens here, off the GUI thread; the result only holds
+    small NumPy arrays ready for build_line_figure.
+
+    Returns:
+        dict: "kind" ("lines"), "data" (decimated arrays, see decimated_columns), "columns",
+        "labels", "colors", "events" and "title".
+    """
+    df, log_key = load_plot_frame(csv_file, columns, check)
+    present = [col for col in columns if col in df.columns]
+    data = decimated_columns(df, present, width, log_key)
+    check()
+    return {
+        "kind": "lines",
+        "data": data,
+        "columns": present,
+        "labels": labels,
+        "colors": [color for col, color in zip(columns, colors) if col in present],
+        "events": load_log_events(csv_file, df),
+        "title": title,
+    }
+
+
+def prepare_live_plot(csv_file, columns, labels, colors, title, raster=False, check=_never_cancelled):
+    """
+    Data-preparation stage of a live-zoom or raster plot.
+
+    Returns:
+        dict: "kind" ("live") and "spec", a plot spec for PlotServer.show_live built on
+        the projected frame.
+    """
+    df, log_key = load_plot_frame(csv_file, columns, check)
+    spec = make_plot_spec(df, columns, labels=labels, colors=colors, title=title, raster=raster, log_key=log_key)
+    return {"kind": "live", "spec": spec, "title": title}
+
+
+def plot_request_key(csv_files, *parts):
+    """
+    Identifies a plot request; requests with equal keys are prepared once.
+
+    Args:
+        csv_files (str | list[str]): Log(s) the plot reads; their size and modification
+            time are part of the key, so a rewritten file is prepared again.
+        *parts: Anything else that changes the result (columns, mode, anchor, ...).
+    """
+    if isinstance(csv_files, str):
+        csv_files = [csv_files]
+    return tuple(log_key_for(f) for f in csv_files) + tuple(parts)
@@ -0,0 +1,398 @@
+import asyncio
+import socket
+import threading
+import uuid
+import numpy as np
+from bokeh.application import Application
+from bokeh.application.handlers.function import FunctionHandler
+from bokeh.events import MouseMove, RangesUpdate
+from bokeh.layouts import column
+from bokeh.models import ColumnDataSource, Div, HoverTool, Range1d
+from bokeh.plotting import figure
+from bokeh.server.server import Server
+from tornado.ioloop import IOLoop
+from src.decimation import bucket_x, min_max_pairs, min_max_pyramid
+from src.rasterize import MAX_SAMPLES_PER_PIXEL, rasterize, shade
+from src.time_index import build_time_index
+
+APP_PATH = "/plot"
+EDGE_ROWS = 1           # Extra rows on each side so lines run to the plot border
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def visible_columns(df, columns, time_index, start_ms, end_ms, width):
+    """
+    Returns the rows of several columns inside a time window, decimated to `width`.
+
+    The window is located with binary search on the time index, so the cost depends
+    on the number of visible rows, not on the log length. Windows with no more than
+    two samples per pixel are returned at full resolution. Otherwise each column keeps
+    its minimum and maximum of every pixel bucket, and all columns share one
+    "time_ms" array of the buckets' first and last times, as in decimated_columns.
+
+    Args:
+        df (pd.DataFrame): Cleaned log data.
+        columns (list[str]): Columns plotted on the y axis.
+        time_index (TimeIndex): Index over df["time_ms"].
+        start_ms (float): Visible range start.
+        end_ms (float): Visible range end.
+        width (int): Plot width in pixels.
+
+    Returns:
+        dict[str, np.ndarray]: float64 arrays for "time_ms" and each column, at most
+        2 * width points each.
+    """
+    start, stop = time_index.row_range(start_ms, end_ms)
+    start = max(0, start - EDGE_ROWS)
+    stop = min(len(time_index), stop + EDGE_ROWS)
+    data = {"time_ms": bucket_x(time_index.time_ms[start:stop], width)}
+    for column in columns:
+        values = df[column].to_numpy(dtype=np.float64)[start:stop]
+        data[column] = values[min_max_pairs(values, width)]
+    return data
+
+
+def make_plot_spec(df, columns, labels=None, colors=None, title="", width=900, height=600, raster=False,
+                   log_key=None):
+    """
+    Describes a live plot: the data, the series to draw and how to draw them.
+
+    Args:
+        df (pd.DataFrame): Cleaned log data with a "time_ms" column.
+        columns (list[str]): Columns to plot.
+        labels (dict | None): Legend label per column.
+        colors (list[str] | None): Line color per column.
+        title (str): Plot title.
+        width (int): Plot width in pixels, also the decimation target.
+        height (int): Plot height in pixels.
+        raster (bool): Draw the series as a server-side density image (RasterPlot)
+            instead of decimated lines.
+        log_key (tuple | None): Cache key of the log, so a raster plot reuses the
+            min/max pyramids of its series.
+
+    Returns:
+        dict: Plot spec for PlotServer.show_live.
+    """
+    columns = [col for col in columns if col in df.columns]
+    return {
+        "df": df,
+        "columns": columns,
+        "labels": labels or {},
+        "colors": colors or ["#1f77b4"] * len(columns),
+        "title": title,
+        "width": width,
+        "height": height,
+        "time_index": build_time_index(df),
+        "raster": raster,
+        "log_key": log_key,
+    }
+
+
+class LivePlot:
+    """A figure whose series are re-decimated to the visible x range on every pan and zoom."""
+
+    def __init__(self, spec):
+        time_index = spec["time_index"]
+        self.root = figure(
+            title=spec["title"],
+            x_axis_label="Time (ms)",
+            y_axis_label="Values",
+            width=spec["width"], height=spec["height"],
+            # Fixed x range: replacing the data on zoom must not re-fit the view
+            x_range=Range1d(time_index.start_ms, time_index.end_ms, bounds="auto"),
+            tools="xpan,xwheel_zoom,box_zoom,reset,save",
+            active_scroll="xwheel_zoom",
+        )
+        # One shared source; series are addressed by position so swapped specs can reuse it
+        self.source = ColumnDataSource(data={"time_ms": np.empty(0)})
+        self.renderers = []
+        for position, (column, color) in enumerate(zip(spec["columns"], spec["colors"])):
+            label = spec["labels"].get(column, column)
+            renderer = self.root.line("time_ms", f"y{position}", source=self.source,
+                                      legend_label=label, name=label, line_width=2, color=color)
+            self.renderers.append(renderer)
+        self.root.add_tools(HoverTool(renderers=self.renderers, tooltips=[
+            ("Column", "$name"),
+            ("Time (ms)", "$snap_x"),
+            ("Value", "$snap_y"),
+        ]))
+        if self.renderers:
+            self.root.legend.location = "top_left"
+            self.root.legend.click_policy = "hide"
+        self.root.on_event(RangesUpdate, self.on_ranges_update)
+        self.spec = None
+        self.swap(spec)
+
+    def can_swap(self, spec):
+        """True if `spec` has as many series, so its data can replace this plot's in place."""
+        return len(spec["columns"]) == len(self.renderers)
+
+    def swap(self, spec):
+        """Replaces the plotted data without rebuilding the figure or reloading the page."""
+        self.spec = spec
+        time_index = spec["time_index"]
+        self.root.title.text = spec["title"]
+        self.root.x_range.update(start=time_index.start_ms, end=time_index.end_ms,
+                                 bounds=(time_index.start_ms, time_index.end_ms))
+        items = self.root.legend.items if self.renderers else []
+        for position, (renderer, column, color) in enumerate(zip(self.renderers, spec["columns"], spec["colors"])):
+            label = spec["labels"].get(column, column)
+            renderer.glyph.line_color = color
+            renderer.name = label
+            if position < len(items):
+                items[position].label = label
+        self.update_range(time_index.start_ms, time_index.end_ms)
+
+    def update_range(self, start_ms, end_ms):
+        spec = self.spec
+        data = visible_columns(spec["df"], spec["columns"], spec["time_index"], start_ms, end_ms, spec["width"])
+        self.source.data = {"time_ms": data["time_ms"],
+                            **{f"y{position}": data[column] for position, column in enumerate(spec["columns"])}}
+
+    def on_ranges_update(self, event):
+        if event.x0 is None or event.x1 is None:
+            return
+        self.update_range(event.x0, event.x1)
+
+
+class RasterPlot:
+    """
+    A figure showing its series as one density image rendered on the server.
+
+    The visible window is binned into a width x height grid on every pan and zoom,
+    so the browser always receives one fixed-size image however many samples or
+    series are plotted. Exact values under the pointer are looked up in the time
+    index and shown in a readout above the plot.
+    """
+
+    def __init__(self, spec):
+        time_index = spec["time_index"]
+        self.root_figure = figure(
+            title=spec["title"],
+            x_axis_label="Time (ms)",
+            y_axis_label="Values",
+            width=spec["width"], height=spec["height"],
+            x_range=Range1d(time_index.start_ms, time_index.end_ms, bounds="auto"),
+            y_range=Range1d(0, 1),
+            tools="pan,wheel_zoom,box_zoom,reset,save",
+            active_scroll="wheel_zoom",
+        )
+        self.image_source = ColumnDataSource(data={"image": [], "x": [], "y": [], "dw": [], "dh": []})
+        self.root_figure.image_rgba(image="image", x="x", y="y", dw="dw", dh="dh", source=self.image_source)
+        # Empty lines only carry the legend entries; the data is in the image
+        self.legend_renderers = [
+            self.root_figure.line([], [], legend_label=spec["labels"].get(col, col), color=color, line_width=4)
+            for col, color in zip(spec["columns"], spec["colors"])
+        ]
+        if self.legend_renderers:
+            self.root_figure.legend.location = "top_left"
+        self.readout = Div(text="", width=spec["width"])
+        self.root = column(self.readout, self.root_figure)
+        self.root_figure.on_event(RangesUpdate, self.on_ranges_update)
+        self.root_figure.on_event(MouseMove, self.on_mouse_move)
+        self.spec = None
+        self.swap(spec)
+
+    def can_swap(self, spec):
+        """True if `spec` is a raster spec with as many series as this plot's legend."""
+        return spec.get("raster", False) and len(spec["columns"]) == len(self.legend_renderers)
+
+    def swap(self, spec):
+        """Replaces the plotted data and resets the view to the whole log."""
+        self.spec = spec
+        time_index = spec["time_index"]
+        self.root_figure.title.text = spec["title"]
+        self.values = [spec["df"][col].to_numpy(dtype=np.float64) for col in spec["columns"]]
+        log_key = spec.get("log_key")
+        self.pyramids = [min_max_pyramid(values, (log_key, col) if log_key is not None else None)
+                         for col, values in zip(spec["columns"], self.values)]
+        low = min((np.nanmin(v) for v in self.values if np.isfinite(v).any()), default=0.0)
+        high = max((np.nanmax(v) for v in self.values if np.isfinite(v).any()), default=1.0)
+        pad = (high - low) * 0.05 or 1.0
+        self.root_figure.x_range.update(start=time_index.start_ms, end=time_index.end_ms,
+                                        bounds=(time_index.start_ms, time_index.end_ms))
+        self.root_figure.y_range.update(start=low - pad, end=high + pad)
+        items = self.root_figure.legend.items if self.legend_renderers else []
+        for position, (renderer, col, color) in enumerate(zip(self.legend_renderers, spec["columns"], spec["colors"])):
+            renderer.glyph.line_color = color
+            if position < len(items):
+                items[position].label = spec["labels"].get(col, col)
+        self.readout.text = ""
+        self.update_range(time_index.start_ms, time_index.end_ms, low - pad, high + pad)
+
+    def update_range(self, x0, x1, y0, y1):
+        spec = self.spec
+        time_index = spec["time_index"]
+        start, stop = time_index.row_range(x0, x1)
+        start = max(0, start - EDGE_ROWS)
+        stop = min(len(time_index), stop + EDGE_ROWS)
+        extremes = None
+        if stop - start > MAX_SAMPLES_PER_PIXEL * spec["width"]:
+            extremes = [pyramid.extremes(values, start, stop, spec["width"]) - start
+                        for pyramid, values in zip(self.pyramids, self.values)]
+        counts = rasterize(time_index.time_ms[start:stop], [v[start:stop] for v in self.values],
+                           (x0, x1), (y0, y1), spec["width"], spec["height"], extremes)
+        self.image_source.data = {"image": [shade(counts, spec["colors"])],
+                                  "x": [x0], "y": [y0], "dw": [x1 - x0], "dh": [y1 - y0]}
+
+    def on_ranges_update(self, event):
+        if None in (event.x0, event.x1, event.y0, event.y1):
+            return
+        self.update_range(event.x0, event.x1, event.y0, event.y1)
+
+    def on_mouse_move(self, event):
+        time_index = self.spec["time_index"]
+        if event.x is None or not len(time_index):
+            return
+        row = time_index.row_at(event.x)
+        values = ", ".join(f"<b>{self.spec['labels'].get(col, col)}</b>: {v[row]:.4g}"
+                           for col, v in zip(self.spec["columns"], self.values))
+        self.readout.text = f"Time (ms): {time_index.time_at(row):.3f} | {values}"
+
+
+class PlotServer:
+    """
+    Local Bokeh server backing the embedded plot views.
+
+    Runs on 127.0.0.1 in a background thread with its own event loop. Each view
+    keeps one long-lived document; new plots replace its root or, for live and
+    raster plots with the same number of series, just swap the data in place.
+    """
+
+    def __init__(self):
+        self.port = None
+        self._server = None
+        self._thread = None
+        self._views = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def start(self):
+        """Starts the server thread if it is not running yet."""
+        if self._thread is None:
+            self.port = _free_port()
+            self._thread = threading.Thread(target=self._run, name="PlotServer", daemon=True)
+            self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        self._server = Server(
+            {APP_PATH: Application(FunctionHandler(self._make_document))},
+            io_loop=IOLoop.current(),
+            address="127.0.0.1",
+            port=self.port,
+            allow_websocket_origin=[f"127.0.0.1:{self.port}", f"localhost:{self.port}"],
+        )
+        self._server.start()
+        self._ready.set()
+        self._server.io_loop.start()
+
+    def create_view(self):
+        """
+        Creates a view that an embedded web page can attach to.
+
+        Returns:
+            tuple[str, str]: The view id and the local URL to load.
+        """
+        self.start()
+        view_id = uuid.uuid4().hex
+        with self._lock:
+            self._views[view_id] = {"doc": None, "content": None}
+        return view_id, f"http://127.0.0.1:{self.port}{APP_PATH}?view={view_id}"
+
+    def show_figure(self, view_id, p):
+        """Shows a ready-made Bokeh figure in a view, replacing what it showed before."""
+        self._update_view(view_id, lambda view: self._render(view, p))
+
+    def show_live(self, view_id, spec):
+        """Shows a live plot in a view, swapping data sources in place when possible."""
+        def update(view):
+            content = view["content"]
+            plot_class = RasterPlot if spec.get("raster") else LivePlot
+            if isinstance(content, plot_class) and content.can_swap(spec):
+                content.swap(spec)
+            else:
+                self._render(view, plot_class(spec))
+        self._update_view(view_id, update)
+
+    def _update_view(self, view_id, update):
+        # Checked and stored under the lock, so a page connecting meanwhile either
+        # finds the update pending or its document is the one the update goes to
+        with self._lock:
+            view = self._views.get(view_id)
+            if view is None:
+                raise KeyError(f"Unknown plot view '{view_id}'.")
+            doc = view["doc"]
+            if doc is None:
+                # The page has not connected yet; render once its session starts
+                view["pending"] = update
+                return
+        # Documents may only be modified from the server's event loop
+        doc.add_next_tick_callback(lambda: update(view))
+
+    def _render(self, view, content):
+        doc = view["doc"]
+        view["content"] = content
+        if doc is None:
+            return
+        doc.clear()
+        if isinstance(content, (LivePlot, RasterPlot)):
+            doc.add_root(content.root)
+            doc.title = content.spec["title"]
+        else:
+            doc.add_root(content)
+            doc.title = content.title.text if getattr(content, "title", None) is not None else "Plot"
+
+    def _make_document(self, doc):
+        arguments = doc.session_context.request.arguments
+        view_id = arguments.get("view", [b""])[0].decode()
+        with self._lock:
+            view = self._views.get(view_id)
+            if view is None:
+                return
+            previous, view["doc"] = view["doc"], None
+            view["connecting"] = doc
+            if previous is not None and previous is not doc:
+                # A reloaded page: the old document is cleared on its own session's tick,
+                # which frees its models, and only then does this one take them over.
+                # Updates sent meanwhile wait in "pending".
+                def hand_over():
+                    previous.clear()
+                    doc.add_next_tick_callback(lambda: self._attach(view, doc))
+                try:
+                    previous.add_next_tick_callback(hand_over)
+                    return
+                except RuntimeError:
+                    pass  # Its session is gone and its models with it
+        self._attach(view, doc)
+
+    def _attach(self, view, doc):
+        """Makes `doc` the view's document and shows the latest update or content in it."""
+        with self._lock:
+            if view.get("connecting") is not doc:
+                return  # The page was reloaded again meanwhile
+            view["doc"] = doc
+            pending = view.pop("pending", None)
+        # The content first: a pending update may only swap data inside it
+        if view["content"] is not None:
+            self._render(view, view["content"])
+        if pending is not None:
+            pending(view)
+
+
+_plot_server = None
+
+
+def get_plot_server():
+    """Returns the process-wide PlotServer, started on first use."""
+    global _plot_server
+    if _plot_server is None:
+        _plot_server = PlotServer()
+    _plot_server.start()
+    return _plot_server
@@ -0,0 +1,157 @@
+import fnmatch
+from bokeh.layouts import column
+from src.data_processor import read_csv_columns, load_and_clean_csv, build_line_figure, load_log_events, draw_event_markers
+from src.decimation import decimated_columns
+from src.derived_channels import log_key_for
+
+# name -> panel declaration. Column entries may be fnmatch patterns such as "motor[[]*".
+PRESETS = {}
+
+
+def register_preset(name, columns, legend_title=None, y_axis_label="Values", title=None):
+    """
+    Registers a preset panel for the dashboard.
+
+    Args:
+        name (str): Preset name shown on its button.
+        columns (list[str]): Columns to plot, in legend order. Entries containing
+            "*" or "?" are shell-style patterns matched against the log's columns.
+        legend_title (str | None): Title shown above the legend.
+        y_axis_label (str): Label of the y axis.
+        title (str | None): Panel title, defaults to the preset name.
+    """
+    PRESETS[name] = {
+        "columns": list(columns),
+        "legend_title": legend_title,
+        "y_axis_label": y_axis_label,
+        "title": title or name,
+    }
+
+
+register_preset("PID Loop Analysis",
+                ["gyroADC[0]", "setpoint[0]", "axisP[0]", "axisI[0]", "axisD[0]", "axisF[0]"],
+                legend_title="PID Components", title="PID Loop Analysis (Roll)")
+register_preset("Throttle and Voltage Drop",
+                ["motor[0]", "motor[1]", "motor[2]", "motor[3]", "vbatLatest (V)"],
+                legend_title="Throttle and Voltage")
+register_preset("Motor Desync or Oscillations",
+                ["motor[[]*"],  # motor[0], motor[1], ...; not the derived motorSpread
+                legend_title="Motor Outputs", y_axis_label="Motor Outputs")
+register_preset("Stick Input vs. Actual Movement",
+                ["rcCommand[0]", "rcCommand[1]", "rcCommand[2]", "gyroADC[0]", "gyroADC[1]", "gyroADC[2]"],
+                legend_title="Stick Input and Movement")
+
+
+def resolve_preset_columns(name, available):
+    """
+    Returns the columns of a preset present in a log, patterns expanded in log order.
+
+    Args:
+        name (str): Registered preset name.
+        available (list[str]): Stripped column names of the log.
+
+    Returns:
+        list[str]: Matching columns without duplicates.
+    """
+    resolved = []
+    for entry in PRESETS[name]["columns"]:
+        if any(ch in entry for ch in "*?"):
+            matches = fnmatch.filter(available, entry)
+        else:
+            matches = [entry] if entry in available else []
+        resolved += [col for col in matches if col not in resolved]
+    return resolved
+
+
+def prepare_dashboard(csv_file, names=None, width=900, df=None, check=None):
+    """
+    Data stage of build_dashboard: reads the CSV once and decimates every panel.
+
+    Builds no Bokeh models, so it can run off the GUI thread; the result holds only
+    small NumPy arrays for build_dashboard_layout.
+
+    Args:
+        csv_file (str): Path to the decoded CSV file.
+        names (list[str] | None): Presets to show, in order. All registered presets if None.
+        width (int): Panel width in pixels, also the decimation target.
+        df (pd.DataFrame | None): Already loaded log data to plot instead of reading
+            the CSV again.
+        check (callable | None): Raises when the request was cancelled; called after
+            the read and between panels.
+
+    Returns:
+        dict: "panels" (list of (name, columns, decimated arrays), empty if no preset
+        has any of its columns in the log), "events", "width" and "skipped" (the names
+        of the presets left out).
+    """
+    names = list(PRESETS) if names is None else names
+    available = read_csv_columns(csv_file) if df is None else list(df.columns)
+    panels = {name: resolve_preset_columns(name, available) for name in names}
+    skipped = [name for name, cols in panels.items() if not cols]
+    panels = {name: cols for name, cols in panels.items() if cols}
+    prepared = {"panels": [], "events": [], "width": width, "skipped": skipped}
+    if not panels:
+        return prepared
+
+    if df is None:
+        df = load_and_clean_csv(csv_file, columns=sorted({col for cols in panels.values() for col in cols}))
+    log_key = log_key_for(csv_file)
+    prepared["events"] = load_log_events(csv_file, df)
+    for name, cols in panels.items():
+        if check is not None:
+            check()
+        prepared["panels"].append((name, cols, decimated_columns(df, cols, width, log_key)))
+    return prepared
+
+
+def build_dashboard_layout(prepared, panel_height=300):
+    """
+    Figure stage of build_dashboard: stacks the prepared panels with linked x ranges.
+
+    Args:
+        prepared (dict): Output of prepare_dashboard.
+        panel_height (int): Height of each panel in pixels.
+
+    Returns:
+        bokeh.layouts.column | None: The layout, or None if there is no panel.
+    """
+    figures = []
+    for name, cols, data in prepared["panels"]:
+        preset = PRESETS[name]
+        p = build_line_figure(
+            None, cols, preset["title"], legend_title=preset["legend_title"],
+            y_axis_label=preset["y_axis_label"], width=prepared["width"], height=panel_height,
+            x_range=figures[0].x_range if figures else None, data=data,
+        )
+        draw_event_markers(p, prepared["events"])
+        figures.append(p)
+    if not figures:
+        return None
+
+    # Only the bottom panel needs the time axis label
+    for p in figures[:-1]:
+        p.xaxis.axis_label = None
+    return column(*figures)
+
+
+def build_dashboard(csv_file, names=None, width=900, panel_height=300, df=None):
+    """
+    Builds stacked preset panels with linked x ranges from a single CSV read.
+
+    The union of the columns every panel needs is read once, the .event markers are
+    loaded once, and each panel draws from its own shared, decimated source.
+
+    Args:
+        csv_file (str): Path to the decoded CSV file.
+        names (list[str] | None): Presets to show, in order. All registered presets if None.
+        width (int): Panel width in pixels.
+        panel_height (int): Height of each panel in pixels.
+        df (pd.DataFrame | None): Already loaded log data to plot instead of reading
+            the CSV again.
+
+    Returns:
+        tuple: (layout, skipped) - the Bokeh column layout, or None if no preset has
+        any of its columns in the log, and the names of the presets left out.
+    """
+    prepared = prepare_dashboard(csv_file, names, width, df)
+    return build_dashboard_layout(prepared, panel_height), prepared["skipped"]
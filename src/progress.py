@@ -0,0 +1,164 @@
+import io
+import os
+import time
+
+REPORT_INTERVAL_S = 0.1   # Least time between two reports of the same stage
+MIN_RATE_TIME_S = 0.5     # Stage time before a throughput and ETA are shown
+
+
+def format_amount(value, unit):
+    if unit == "B":
+        return f"{value / 1e6:.1f} MB" if value >= 1e6 else f"{value / 1e3:.0f} KB"
+    return f"{value:g} {unit}".rstrip()
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes} min {seconds:02d} s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} h {minutes:02d} min"
+
+
+class ProgressReporter:
+    """
+    The `progress` callable handed to long-running work.
+
+    Work calls progress(done, total, stage, unit) as often as it likes; reports are
+    forwarded to `send(stage, done, total, unit)` at most every `interval` seconds
+    per stage. The first and final report of a stage are always forwarded.
+
+    Args:
+        send (callable): Receives the forwarded reports; may be called from any thread.
+        interval (float): Seconds between forwarded reports.
+    """
+
+    def __init__(self, send, interval=REPORT_INTERVAL_S):
+        self.send = send
+        self.interval = interval
+        self._stage = None
+        self._last = 0.0
+        self._finished = False
+
+    def __call__(self, done, total, stage="", unit="B"):
+        now = time.monotonic()
+        if stage == self._stage:
+            if self._finished or (done < total and now - self._last < self.interval):
+                return
+        self._stage = stage
+        self._last = now
+        self._finished = done >= total
+        self.send(stage, done, total, unit)
+
+
+class ProgressState:
+    """
+    The latest progress of one piece of work, with its throughput and ETA.
+
+    Throughput is measured from the start of the current stage, so a quick header
+    scan does not distort the rate of the decode that follows it.
+    """
+
+    def __init__(self):
+        self.stage = None
+        self.done = 0
+        self.total = 0
+        self.unit = "B"
+        self._stage_started = None
+        self._stage_start_done = 0
+
+    def update(self, stage, done, total, unit="B"):
+        now = time.monotonic()
+        if stage != self.stage or done < self.done:
+            self._stage_started = now
+            self._stage_start_done = done
+        self.stage = stage
+        self.done = done
+        self.total = total
+        self.unit = unit
+
+    def fraction(self):
+        """Completed share of the current stage in [0, 1], or None if the total is unknown."""
+        if not self.total:
+            return None
+        return min(1.0, max(0.0, self.done / self.total))
+
+    def throughput(self):
+        """Units per second in the current stage, or None until it has run long enough."""
+        if self._stage_started is None:
+            return None
+        elapsed = time.monotonic() - self._stage_started
+        if elapsed < MIN_RATE_TIME_S:
+            return None
+        return (self.done - self._stage_start_done) / elapsed
+
+    def eta(self):
+        """Estimated seconds until the current stage completes, or None."""
+        rate = self.throughput()
+        if not rate or not self.total:
+            return None
+        return max(0.0, (self.total - self.done) / rate)
+
+    def describe(self):
+        """E.g. "Decoding: 12.3 / 40.0 MB (31%), 5.1 MB/s, ETA 5 s"."""
+        if self.stage is None:
+            return ""
+        text = f"{self.stage}: " if self.stage else ""
+        if self.unit == "B":
+            text += f"{format_amount(self.done, self.unit)} / {format_amount(self.total, self.unit)}"
+        else:
+            text += f"{self.done:g}/{format_amount(self.total, self.unit)}"
+        fraction = self.fraction()
+        if fraction is not None:
+            text += f" ({fraction:.0%})"
+        rate = self.throughput()
+        if rate and self.unit == "B":
+            text += f", {format_amount(rate, self.unit)}/s"
+        eta = self.eta()
+        if eta is not None:
+            text += f", ETA {format_duration(eta)}"
+        return text
+
+
+class ProgressFile(io.BufferedReader):
+    """
+    A binary file that reports the bytes read so far through progress(done, total, stage).
+
+    pandas reads CSV files in large blocks, so passing this to read_csv reports
+    load progress without slowing the parser down.
+    """
+
+    def __init__(self, path, progress, stage=""):
+        super().__init__(io.FileIO(path, "r"))
+        self.progress = progress
+        self.stage = stage
+        self.size = os.fstat(self.fileno()).st_size
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.progress(self.tell(), self.size, self.stage)
+        return data
+
+    def read1(self, size=-1):
+        data = super().read1(size)
+        self.progress(self.tell(), self.size, self.stage)
+        return data
+
+
+# Worker processes send their reports to the scheduler through this queue
+_report_queue = None
+
+
+def install_report_queue(queue):
+    """Process pool initializer: sets the queue that run_reporting sends reports to."""
+    global _report_queue
+    _report_queue = queue
+
+
+def run_reporting(job_id, fn, args, kwargs):
+    """Runs fn(*args, progress=..., **kwargs) in a worker process, sending its reports tagged with job_id."""
+    progress = ProgressReporter(lambda *report: _report_queue.put((job_id,) + report))
+    return fn(*args, progress=progress, **kwargs)
@@ -0,0 +1,147 @@
+import numpy as np
+from src.decimation import min_max_indices
+
+SPAN_FILL_SAMPLES_PER_PIXEL = 4   # Below this density, segments are drawn as vertical spans
+MAX_SAMPLES_PER_PIXEL = 32        # Above this density, an evenly strided subset is binned
+MIN_ALPHA = 60                    # Alpha of the faintest non-empty pixel (0-255)
+
+
+def _pixel_positions(values, lo, hi, size):
+    """Maps values in [lo, hi] onto integer pixel positions 0..size-1; others become -1."""
+    span = hi - lo if hi > lo else 1.0
+    with np.errstate(invalid="ignore"):
+        pos = np.floor((values - lo) / span * size)
+    pos = np.where(np.isfinite(pos), pos, -1)
+    pos = np.where((pos >= 0) & (pos <= size), np.minimum(pos, size - 1), -1)
+    return pos.astype(np.int64)
+
+
+def _span_cells(px, py):
+    """
+    Returns the flat (row, column) cells covered by vertical spans joining consecutive samples.
+
+    Every segment i -> i+1 fills the pixel column of sample i from the lower to the
+    higher of the two y pixels, so sparse traces stay connected.
+    """
+    valid = (px[:-1] >= 0) & (py[:-1] >= 0) & (py[1:] >= 0)
+    x = px[:-1][valid]
+    lo = np.minimum(py[:-1], py[1:])[valid]
+    hi = np.maximum(py[:-1], py[1:])[valid]
+    lengths = hi - lo + 1
+    if not len(lengths):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # Expand [lo, hi] ranges without a Python loop: repeat each start, then add 0..len-1
+    starts = np.repeat(lo, lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return starts + offsets, np.repeat(x, lengths)
+
+
+def rasterize(x, ys, x_range, y_range, width, height, extremes=None):
+    """
+    Bins samples of several series into per-series pixel count grids.
+
+    Binning is a single np.bincount over flat (series, row, column) indices, so the
+    output size depends only on the grid, never on the number of samples. Sparse
+    series (under SPAN_FILL_SAMPLES_PER_PIXEL samples per pixel column) are resampled
+    to two samples per column and joined with vertical spans so they read as lines.
+    Dense series are binned from an evenly strided subset of at most
+    MAX_SAMPLES_PER_PIXEL samples per column plus every column's min/max rows, which
+    keeps the density shape and the spikes while bounding the binning work. Callers
+    that redraw the same series often pass those rows from a MinMaxPyramid instead
+    of having them searched for in every sample.
+
+    Args:
+        x (np.ndarray): Shared x values (e.g. "time_ms"), sorted.
+        ys (list[np.ndarray]): y values per series, same length as x.
+        x_range (tuple[float, float]): Visible x interval.
+        y_range (tuple[float, float]): Visible y interval.
+        width (int): Grid width in pixels.
+        height (int): Grid height in pixels.
+        extremes (list[np.ndarray] | None): Per series, rows of x holding its per-pixel
+            minima and maxima (see MinMaxPyramid.extremes); searched for if None.
+
+    Returns:
+        np.ndarray: float32 counts of shape (series, height, width); row 0 is the bottom.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    cells = height * width
+    flat = []
+    for series, y in enumerate(ys):
+        y = np.asarray(y, dtype=np.float64)
+        sparse = len(x) < SPAN_FILL_SAMPLES_PER_PIXEL * width
+        if sparse and len(x) > 1:
+            grid = np.linspace(x_range[0], x_range[1], 2 * width)
+            grid = grid[(grid >= x[0]) & (grid <= x[-1])]
+            sx, sy = grid, np.interp(grid, x, y)
+        elif len(x) > MAX_SAMPLES_PER_PIXEL * width:
+            step = len(x) // (MAX_SAMPLES_PER_PIXEL * width)
+            peaks = extremes[series] if extremes is not None else min_max_indices(y, width)
+            rows = np.union1d(np.arange(0, len(x), step), peaks)
+            sx, sy = x[rows], y[rows]
+        else:
+            sx, sy = x, y
+        px = _pixel_positions(sx, x_range[0], x_range[1], width)
+        py = _pixel_positions(sy, y_range[0], y_range[1], height)
+        if sparse and len(sx) > 1:
+            rows, cols = _span_cells(px, py)
+        else:
+            inside = (px >= 0) & (py >= 0)
+            rows, cols = py[inside], px[inside]
+        flat.append(series * cells + rows * width + cols)
+
+    indices = np.concatenate(flat) if flat else np.empty(0, dtype=np.int64)
+    counts = np.bincount(indices, minlength=len(ys) * cells)
+    return counts.astype(np.float32).reshape(len(ys), height, width)
+
+
+def _hex_to_rgb(color):
+    color = color.lstrip("#")
+    return [int(color[i:i + 2], 16) for i in (0, 2, 4)]
+
+
+def shade(counts, colors):
+    """
+    Turns per-series counts into an RGBA image.
+
+    Each pixel takes the count-weighted mean of the series colors; its opacity grows
+    with the log of the total count, so both single crossings and dense bands stay visible.
+
+    Args:
+        counts (np.ndarray): Output of rasterize, shape (series, height, width).
+        colors (list[str]): "#rrggbb" color per series.
+
+    Returns:
+        np.ndarray: uint32 array of shape (height, width), one packed RGBA value per pixel
+        as expected by Bokeh's image_rgba.
+    """
+    palette = np.array([_hex_to_rgb(c) for c in colors], dtype=np.float32)  # (series, 3)
+    total = counts.sum(axis=0)
+    occupied = total > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rgb = np.tensordot(counts, palette, axes=([0], [0])) / total[..., None]
+    scale = np.log1p(total) / np.log1p(total.max()) if total.max() > 0 else total
+    alpha = np.where(occupied, MIN_ALPHA + (255 - MIN_ALPHA) * scale, 0)
+
+    image = np.zeros(total.shape + (4,), dtype=np.uint8)
+    image[..., :3] = np.where(occupied[..., None], np.nan_to_num(rgb), 0).astype(np.uint8)
+    image[..., 3] = alpha.astype(np.uint8)
+    return image.view(np.uint32).reshape(total.shape)
+
+
+def save_png(image, target, background=(255, 255, 255)):
+    """
+    Writes an image from shade() as a PNG, composited over a solid background.
+
+    Needs Pillow; no browser is involved, so it also works headless.
+
+    Args:
+        image (np.ndarray): Packed RGBA uint32 image, row 0 at the bottom.
+        target (str | file object): Path or binary stream to write to.
+        background (tuple[int, int, int]): Background color.
+    """
+    from PIL import Image
+
+    rgba = image.view(np.uint8).reshape(image.shape + (4,))[::-1]
+    canvas = Image.new("RGBA", (image.shape[1], image.shape[0]), background + (255,))
+    canvas.alpha_composite(Image.fromarray(np.ascontiguousarray(rgba), "RGBA"))
+    canvas.convert("RGB").save(target, format="PNG")
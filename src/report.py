@@ -0,0 +1,291 @@
+import argparse
+import html
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import cycle
+import numpy as np
+import pandas as pd
+from bokeh.embed import components
+from bokeh.palettes import Category10
+from bokeh.resources import INLINE
+from src.analysis import compute_analysis_metrics
+from src.anomalies import summarize_anomalies, CRITICAL, WARNING
+from src.data_processor import load_and_clean_csv
+from src.derived_channels import add_derived_columns, available_channels, log_key_for
+from src.presets import PRESETS, build_dashboard, resolve_preset_columns
+from src.rasterize import rasterize, shade, save_png
+
+FORMATS = ("html", "png", "svg")
+FALLBACK_PANEL_SIZE = (900, 250)   # Pixels per panel of the browser-less PNG
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+{resources}
+<style>
+body {{ font-family: sans-serif; margin: 24px; }}
+table {{ border-collapse: collapse; margin-bottom: 24px; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 8px; text-align: left; }}
+th {{ background: #f0f0f0; }}
+.critical {{ background: #ff7878; }}
+.warning {{ background: #ffff78; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+{body}
+</body>
+</html>
+"""
+
+
+def find_sessions(folder):
+    """Returns every decoded CSV below `folder`, sorted."""
+    sessions = []
+    for root, _, files in os.walk(folder):
+        sessions += [os.path.join(root, f) for f in files if f.endswith(".csv")]
+    return sorted(sessions)
+
+
+def session_name(csv_file, folder):
+    """Returns a file-system safe name of a session, unique within `folder`."""
+    relative = os.path.splitext(os.path.relpath(csv_file, folder))[0]
+    return relative.replace(os.sep, "__")
+
+
+def _table_html(df, severity_column=None):
+    if not len(df):
+        return "<p>None.</p>"
+    rows = []
+    for record in df.itertuples(index=False):
+        css = f' class="{getattr(record, severity_column)}"' if severity_column else ""
+        rows.append(f"<tr{css}>" + "".join(f"<td>{html.escape(str(v))}</td>" for v in record) + "</tr>")
+    header = "".join(f"<th>{html.escape(str(c))}</th>" for c in df.columns)
+    return f"<table><tr>{header}</tr>{''.join(rows)}</table>"
+
+
+def _timings_frame(timings):
+    return pd.DataFrame([[stage, f"{seconds:.3f}"] for stage, seconds in timings.items()], columns=["Stage", "Seconds"])
+
+
+def _export_fallback_png(df, path):
+    """Stacks a density image per preset panel into one PNG without needing a browser."""
+    from PIL import Image
+
+    panel_width, panel_height = FALLBACK_PANEL_SIZE
+    panels = []
+    x = df["time_ms"].to_numpy(dtype=np.float64)
+    for name in PRESETS:
+        columns = resolve_preset_columns(name, list(df.columns))
+        if not columns or not len(x):
+            continue
+        ys = [df[col].to_numpy(dtype=np.float64) for col in columns]
+        low = min(np.nanmin(y) for y in ys)
+        high = max(np.nanmax(y) for y in ys)
+        pad = (high - low) * 0.05 or 1.0
+        colors = [c for c, _ in zip(cycle(Category10[10]), columns)]
+        counts = rasterize(x, ys, (x[0], x[-1]), (low - pad, high + pad), panel_width, panel_height)
+        panel_path = f"{path}.{len(panels)}.tmp"
+        save_png(shade(counts, colors), panel_path)
+        panels.append(panel_path)
+    if not panels:
+        return
+    images = [Image.open(p) for p in panels]
+    sheet = Image.new("RGB", (panel_width, panel_height * len(images)), (255, 255, 255))
+    for position, image in enumerate(images):
+        sheet.paste(image, (0, position * panel_height))
+        image.close()
+    sheet.save(path, format="PNG")
+    for p in panels:
+        os.remove(p)
+
+
+def build_session_report(csv_file, out_dir, formats=FORMATS, name=None):
+    """
+    Builds the report of one session: preset dashboard, metrics and anomaly summary.
+
+    Runs in a worker process, so it only takes and returns picklable values.
+
+    Args:
+        csv_file (str): Path to the decoded CSV file.
+        out_dir (str): Directory the session's files are written to (created if needed).
+        formats (Iterable[str]): Any of "html", "png" and "svg".
+        name (str | None): Session name, defaults to the CSV file name.
+
+    Returns:
+        dict: name, csv_file, files (format -> path), notes, timings (stage -> seconds),
+        rows, duration_s, critical and warning counts.
+    """
+    name = name or os.path.splitext(os.path.basename(csv_file))[0]
+    os.makedirs(out_dir, exist_ok=True)
+    timings = {}
+    notes = []
+    files = {}
+
+    def stage(label):
+        now = time.perf_counter()
+        timings[label] = now - stage.last
+        stage.last = now
+    stage.last = time.perf_counter()
+
+    df = load_and_clean_csv(csv_file)
+    stage("load")
+    log_key = log_key_for(csv_file)
+    add_derived_columns(df, available_channels(df.columns), log_key)
+    stage("derived channels")
+    metrics = pd.DataFrame(compute_analysis_metrics(df), columns=["Metric", "Value"])
+    stage("metrics")
+    anomalies = summarize_anomalies(df)
+    stage("anomalies")
+    layout, skipped = build_dashboard(csv_file, df=df)
+    if skipped:
+        notes.append(f"Presets without data: {', '.join(skipped)}.")
+    stage("plots")
+
+    if layout is not None and "png" in formats:
+        path = os.path.join(out_dir, "dashboard.png")
+        try:
+            from bokeh.io import export_png
+            export_png(layout, filename=path)
+        except Exception as e:  # export needs selenium and a browser driver
+            _export_fallback_png(df, path)
+            notes.append(f"PNG rendered as density images without axes (browser export unavailable: {e}).")
+        files["png"] = path
+        stage("export png")
+
+    if layout is not None and "svg" in formats:
+        path = os.path.join(out_dir, "dashboard.svg")
+        # The layout is embedded in report.html later, which should keep the canvas backend
+        backends = [(p, p.output_backend) for p in layout.children]
+        try:
+            from bokeh.io import export_svg
+            for p, _ in backends:
+                p.output_backend = "svg"
+            export_svg(layout, filename=path)
+            files["svg"] = path
+        except Exception as e:
+            notes.append(f"SVG skipped (browser export unavailable: {e}).")
+        finally:
+            for p, backend in backends:
+                p.output_backend = backend
+        stage("export svg")
+
+    duration_s = (df["time_ms"].iloc[-1] - df["time_ms"].iloc[0]) / 1000 if "time_ms" in df.columns and len(df) else 0.0
+    result = {
+        "name": name,
+        "csv_file": csv_file,
+        "files": files,
+        "notes": notes,
+        "timings": timings,
+        "rows": len(df),
+        "duration_s": float(duration_s),
+        "critical": int(anomalies.loc[anomalies["severity"] == CRITICAL, "rows"].sum()),
+        "warning": int(anomalies.loc[anomalies["severity"] == WARNING, "rows"].sum()),
+    }
+
+    if "html" in formats:
+        path = os.path.join(out_dir, "report.html")
+        # The HTML stage times itself, so its own timing is written before the page
+        html_start = time.perf_counter()
+        script, div = components(layout) if layout is not None else ("", "<p>No preset has data in this log.</p>")
+        body = (
+            f"<p>{html.escape(csv_file)} - {len(df)} rows, {duration_s:.2f} s</p>"
+            + "".join(f"<p><i>{html.escape(n)}</i></p>" for n in notes)
+            + "<h2>Preset plots</h2>" + div + script
+            + "<h2>Metrics</h2>" + _table_html(metrics)
+            + "<h2>Anomalies</h2>" + _table_html(anomalies, severity_column="severity")
+        )
+        timings["export html"] = time.perf_counter() - html_start
+        body += "<h2>Stage timings</h2>" + _table_html(_timings_frame(timings))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(PAGE_TEMPLATE.format(title=html.escape(f"Report - {name}"), resources=INLINE.render(), body=body))
+        files["html"] = path
+
+    return result
+
+
+def generate_reports(folder, out_dir, formats=FORMATS, workers=None, on_done=None):
+    """
+    Builds a report for every decoded session in a folder, in parallel processes.
+
+    Args:
+        folder (str): Decoded folder (searched recursively for CSV files).
+        out_dir (str): Output directory; each session gets a sub-directory and an
+            index.html links them all.
+        formats (Iterable[str]): Any of "html", "png" and "svg".
+        workers (int | None): Number of worker processes, one per CPU if None.
+        on_done (callable | None): Called with each session result as it completes.
+
+    Returns:
+        list[dict]: Session results (see build_session_report), in folder order.
+        Sessions that failed have an "error" entry instead of files.
+    """
+    sessions = find_sessions(folder)
+    os.makedirs(out_dir, exist_ok=True)
+    results = {}
+    started = time.perf_counter()
+    # "spawn" keeps workers free of any Qt state when called from the GUI
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {}
+        for csv_file in sessions:
+            name = session_name(csv_file, folder)
+            futures[pool.submit(build_session_report, csv_file, os.path.join(out_dir, name), tuple(formats), name)] = (name, csv_file)
+        for future in as_completed(futures):
+            name, csv_file = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"name": name, "csv_file": csv_file, "error": str(e), "timings": {}}
+            results[name] = result
+            if on_done:
+                on_done(result)
+
+    ordered = [results[session_name(f, folder)] for f in sessions]
+    _write_index(ordered, out_dir, time.perf_counter() - started)
+    return ordered
+
+
+def _write_index(results, out_dir, total_s):
+    stages = []
+    for result in results:
+        stages += [s for s in result["timings"] if s not in stages]
+    rows = []
+    for result in results:
+        link = result.get("files", {}).get("html")
+        label = html.escape(result["name"])
+        cells = [f'<a href="{html.escape(os.path.relpath(link, out_dir))}">{label}</a>' if link else label]
+        if "error" in result:
+            cells += [f"Failed: {html.escape(result['error'])}"] + [""] * (3 + len(stages))
+        else:
+            cells += [f"{result['duration_s']:.2f}", str(result["critical"]), str(result["warning"]),
+                      ", ".join(sorted(result["files"]))]
+            cells += [f"{result['timings'].get(s, 0.0):.3f}" for s in stages]
+        rows.append("<tr>" + "".join(f"<td>{c}</td>" for c in cells) + "</tr>")
+    header = ["Session", "Duration (s)", "Critical rows", "Warning rows", "Files"] + [f"{s} (s)" for s in stages]
+    body = (f"<p>{len(results)} sessions in {total_s:.2f} s.</p><table><tr>"
+            + "".join(f"<th>{html.escape(h)}</th>" for h in header) + "</tr>" + "".join(rows) + "</table>")
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(PAGE_TEMPLATE.format(title="Flight reports", resources="", body=body))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export tuning reports for every decoded session in a folder.")
+    parser.add_argument("folder", help="Decoded folder containing the CSV files")
+    parser.add_argument("-o", "--output", default="reports", help="Output directory (default: reports)")
+    parser.add_argument("-f", "--formats", default=",".join(FORMATS), help="Comma separated: html,png,svg")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip() for f in args.formats.split(",") if f.strip() in FORMATS]
+    results = generate_reports(args.folder, args.output, formats, args.workers,
+                               on_done=lambda r: print(f"{r['name']}: {r.get('error', 'done')}"))
+    print(f"Wrote {len(results)} reports to {os.path.join(args.output, 'index.html')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bblhelper", "responses")
+TTL_SECONDS = 7 * 24 * 3600
+MAX_BYTES = 32 * 1024 * 1024
+
+_DATA_URL = re.compile(r"^data:[^,]*,(.*)$", re.DOTALL)
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _normalize_text(text):
+    """Whitespace differences do not change the question."""
+    return "\n".join(line.rstrip() for line in text.strip().splitlines())
+
+
+def _normalize_block(block):
+    if block.get("type") == "text":
+        return {"type": "text", "text": _normalize_text(block.get("text", ""))}
+    if block.get("type") == "image_url":
+        # Images enter the key by the hash of their payload, not the whole data URL
+        url = block.get("image_url", {}).get("url", "")
+        match = _DATA_URL.match(url)
+        payload = match.group(1) if match else url
+        return {"type": "image", "sha256": hashlib.sha256(payload.encode("ascii", "ignore")).hexdigest()}
+    return block
+
+
+def cache_key(model, messages, temperature=None, extra=None):
+    """
+    Hashes a chat request into a cache key.
+
+    Message text is compared with trailing whitespace removed, and attached images by
+    the SHA-256 of their encoded payload.
+
+    Args:
+        model (str): Model name.
+        messages (list[dict]): Chat messages as sent to the API.
+        temperature (float | None): Sampling temperature.
+        extra: Anything else the answer depends on, e.g. the log behind tool calls;
+            must be JSON serializable.
+
+    Returns:
+        str: Hex digest.
+    """
+    normalized = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            content = _normalize_text(content)
+        elif isinstance(content, list):
+            content = [_normalize_block(block) for block in content]
+        normalized.append({"role": message.get("role"), "content": content})
+    blob = json.dumps({"model": model, "temperature": temperature, "messages": normalized, "extra": extra},
+                      sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Assistant answers stored on disk, one JSON file per request key.
+
+    Entries expire after `ttl` seconds. When the directory grows past `max_bytes`
+    the least recently used entries are removed; a hit refreshes the entry's
+    modification time.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=TTL_SECONDS, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Returns the cached answer for `key`, or None if missing or expired."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if time.time() - entry.get("created", 0) > self.ttl:
+                self._remove(path)
+                return None
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return entry.get("response")
+
+    def put(self, key, response, model=None):
+        path = self._path(key)
+        entry = {"created": time.time(), "model": model, "response": response}
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, path)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in self._entries():
+                self._remove(path)
+
+    def _entries(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        now = time.time()
+        entries = []
+        for path, size, mtime in self._entries():
+            # Hits refresh the modification time, so an entry untouched for the TTL is expired too
+            if now - mtime > self.ttl:
+                self._remove(path)
+            else:
+                entries.append((path, size, mtime))
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def get_response_cache():
+    """Returns the process-wide response cache; BBL_CACHE_DIR overrides its location."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(os.getenv("BBL_CACHE_DIR") or CACHE_DIR)
+        return _cache
@@ -0,0 +1,162 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from src.derived_channels import log_key_for
+
+CACHE_BUDGET_BYTES = 384 * 1024 * 1024  # Loaded sessions kept in memory, prefetched or opened
+
+
+def compact_frame(df):
+    """
+    Stores integer columns in the smallest integer type that holds them.
+
+    Blackbox logs are almost all integers, so this typically shrinks a session to a
+    quarter of its size. The conversion is lossless; restore_frame undoes it.
+
+    Returns:
+        tuple[pd.DataFrame, dict]: The compacted frame and the original dtypes of the
+        columns that were changed.
+    """
+    compact = df.copy(deep=False)
+    original = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if dtype.kind not in "iu" or not len(df):
+            continue
+        low, high = df[col].min(), df[col].max()
+        for candidate in (np.int8, np.int16, np.int32):
+            info = np.iinfo(candidate)
+            if info.min <= low and high <= info.max:
+                if np.dtype(candidate).itemsize < dtype.itemsize:
+                    compact[col] = df[col].astype(candidate)
+                    original[col] = dtype
+                break
+    return compact, original
+
+
+def restore_frame(df, original):
+    """Returns `df` with the dtypes recorded by compact_frame, so arithmetic cannot overflow."""
+    if not original:
+        return df
+    return df.astype(original)
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=False).sum())
+
+
+class SessionCache:
+    """
+    Loaded sessions (table, analysis and column schema), bounded by memory.
+
+    Entries are the results of load_table. Prefetched entries are stored compacted
+    and are speculative: one is only added while it fits in the budget, and it never
+    evicts anything. Entries of sessions the user opened evict the least recently
+    used ones.
+
+    Thread-safe; the plot pipeline reads it from its worker threads.
+    """
+
+    def __init__(self, budget_bytes=CACHE_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()   # log key -> (entry, original dtypes, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, log_key, entry, original=None, speculative=False):
+        """
+        Stores a load_table result.
+
+        Returns:
+            bool: False if a speculative entry did not fit and was dropped.
+        """
+        size = frame_nbytes(entry["table"])
+        with self._lock:
+            if log_key in self._entries:
+                if speculative:
+                    return True
+                self._bytes -= self._entries.pop(log_key)[2]
+            if speculative and self._bytes + size > self.budget_bytes:
+                return False
+            self._entries[log_key] = (entry, original or {}, size)
+            self._bytes += size
+            while self._bytes > self.budget_bytes and len(self._entries) > 1:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+            return True
+
+    def get(self, csv_file):
+        """Returns the session's load_table result with its original dtypes, or None."""
+        try:
+            log_key = log_key_for(csv_file)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._entries.get(log_key)
+            if cached is None:
+                return None
+            self._entries.move_to_end(log_key)
+        entry, original, _ = cached
+        if not original:
+            return entry
+        table = restore_frame(entry["table"], original)
+        restored = dict(entry, table=table)
+        # Opened sessions are kept at full width from now on
+        self.put(log_key, restored)
+        return restored
+
+    def schema(self, csv_file):
+        """Returns the session's numeric columns as load_and_clean_csv yields them, or None."""
+        try:
+            log_key = log_key_for(csv_file)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._entries.get(log_key)
+        return None if cached is None else cached[0]["schema"]
+
+    def columns(self, csv_file, columns):
+        """
+        Returns `columns` of the session's table with their original dtypes, or None if
+        the session is not cached or lacks one of them.
+        """
+        try:
+            log_key = log_key_for(csv_file)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._entries.get(log_key)
+        if cached is None:
+            return None
+        entry, original, _ = cached
+        if not all(col in entry["table"].columns for col in columns):
+            return None
+        return restore_frame(entry["table"][columns], {col: original[col] for col in columns if col in original})
+
+    def __contains__(self, log_key):
+        with self._lock:
+            return log_key in self._entries
+
+    def has_room(self):
+        with self._lock:
+            return self._bytes < self.budget_bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+
+_session_cache = None
+
+
+def get_session_cache():
+    """Returns the process-wide session cache."""
+    global _session_cache
+    if _session_cache is None:
+        _session_cache = SessionCache()
+    return _session_cache
@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+import numpy as np
+from src.anomalies import CRITICAL, WARNING, anomaly_rules
+import src.data_processor as data_processor
+from src.derived_channels import add_derived_columns, available_channels, log_key_for
+
+SUMMARY_SUFFIX = ".summary.json"
+SUMMARY_VERSION = 1   # Bump when the summary fields change; older sidecars are then recomputed
+FLIGHT_MODE_COLUMN = "flightModeFlags (flags)"
+
+
+def summary_path(csv_file):
+    """The sidecar of "btfl_001.03.csv" is "btfl_001.03.summary.json" in the same folder."""
+    return os.path.splitext(csv_file)[0] + SUMMARY_SUFFIX
+
+
+def _max(df, column):
+    if column not in df.columns or not len(df):
+        return None
+    value = df[column].max()
+    return None if np.isnan(value) else float(value)
+
+
+def _min(df, column):
+    if column not in df.columns or not len(df):
+        return None
+    value = df[column].min()
+    return None if np.isnan(value) else float(value)
+
+
+def _flight_modes(df):
+    """Flight mode flags seen in the log, in order of first appearance."""
+    if FLIGHT_MODE_COLUMN not in df.columns:
+        return []
+    modes = []
+    for value in df[FLIGHT_MODE_COLUMN].dropna().astype(str).unique():
+        for token in value.split("|"):
+            token = token.strip()
+            if token and token != "0" and token not in modes:
+                modes.append(token)
+    return modes
+
+
+def compute_summary(df):
+    """
+    Summarizes a session for the file list.
+
+    Args:
+        df (pd.DataFrame): Cleaned log data, with non-numeric columns and the derived
+            channels it offers, as the raw table shows it.
+
+    Returns:
+        dict: duration_s, max_current_a, min_voltage_v, max_motor_spread (None where
+        the log lacks the channel), anomaly row counts by severity and flight_modes.
+    """
+    duration_s = None
+    if "time_ms" in df.columns and len(df):
+        duration_s = float((df["time_ms"].iloc[-1] - df["time_ms"].iloc[0]) / 1000)
+    # Rows with at least one cell of that severity, as painted in the raw table
+    flagged = {CRITICAL: np.zeros(len(df), dtype=bool), WARNING: np.zeros(len(df), dtype=bool)}
+    for _, severity, _, mask in anomaly_rules(df):
+        flagged[severity] |= mask
+    return {
+        "duration_s": duration_s,
+        "max_current_a": _max(df, "amperageLatest (A)"),
+        "min_voltage_v": _min(df, "vbatLatest (V)"),
+        "max_motor_spread": _max(df, "motorSpread"),
+        "anomalies": {severity: int(mask.sum()) for severity, mask in flagged.items()},
+        "flight_modes": _flight_modes(df),
+    }
+
+
+_write_lock = threading.Lock()
+
+
+def write_summary(csv_file, summary):
+    """Stores `summary` as the CSV's sidecar, tagged with the CSV's size and mtime."""
+    _, size, mtime_ns = log_key_for(csv_file)
+    entry = {"version": SUMMARY_VERSION, "size": size, "mtime_ns": mtime_ns, "summary": summary}
+    path = summary_path(csv_file)
+    with _write_lock:
+        # Written aside and moved into place, so a reader never sees half a file
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+
+def read_summary(csv_file):
+    """
+    Returns the summary stored next to `csv_file`, or None if there is none or the
+    CSV changed since it was written. Only the sidecar is read, never the CSV.
+    """
+    try:
+        _, size, mtime_ns = log_key_for(csv_file)
+        with open(summary_path(csv_file), "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("version") != SUMMARY_VERSION or entry.get("size") != size or entry.get("mtime_ns") != mtime_ns:
+        return None
+    return entry.get("summary")
+
+
+def summary_for(csv_file, df):
+    """Returns the stored summary of a loaded session, computing and storing it if needed."""
+    summary = read_summary(csv_file)
+    if summary is None:
+        summary = compute_summary(df)
+        try:
+            write_summary(csv_file, summary)
+        except OSError:
+            pass  # A read-only folder still gets its summaries shown, just not kept
+    return summary
+
+
+def summarize_session(csv_file):
+    """
+    Returns the session's summary, loading the CSV only if the sidecar is missing or
+    stale.
+
+    Runs as a scheduler job in a worker process, so it must stay a module-level
+    function without Qt imports.
+    """
+    summary = read_summary(csv_file)
+    if summary is not None:
+        return summary
+    df = data_processor.load_and_clean_csv(csv_file, True)
+    # Uncached: the worker process's derived-channel cache would only hold dead entries
+    add_derived_columns(df, available_channels(df.columns))
+    return summary_for(csv_file, df)
@@ -0,0 +1,51 @@
+import importlib
+import time
+
+BENCHMARK_ENV = "BBLHELPER_STARTUP_BENCHMARK"   # Set by src/startup_benchmark.py
+FIRST_PAINT_MARKER = "bblhelper: first paint"   # Written to stderr in benchmark mode
+
+# Loaded on first use rather than before the main window shows, and imported in the
+# background right after it does, so the first table or plot does not wait for them
+WARM_UP_MODULES = (
+    "numpy",
+    "pandas",
+    "bokeh.plotting",
+    "bokeh.models",
+    "markdown",
+    "openai",
+    "src.data_processor",
+    "src.context_processor",
+    "src.plot_pipeline",
+    "src.presets",
+    "src.overlay",
+    "src.assistant_tools",
+    "src.image_payload",
+    "workers.table_loader_worker",
+    "ui.table_window",
+    "ui.file_selection",
+    "ui.column_selection",
+)
+
+
+def import_modules(modules=WARM_UP_MODULES, check=None):
+    """
+    Imports `modules` in order, skipping any that are not installed.
+
+    Runs as a thread job: imported modules are shared with the GUI thread, which
+    then finds them in sys.modules. Qt widget modules only define classes, so
+    importing them off the GUI thread is safe; nothing here creates a widget.
+
+    Returns:
+        dict: Seconds spent per module; already imported modules take none.
+    """
+    timings = {}
+    for name in modules:
+        if check is not None:
+            check()
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        timings[name] = time.perf_counter() - start
+    return timings
@@ -0,0 +1,164 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from src.startup import BENCHMARK_ENV, FIRST_PAINT_MARKER
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_SCRIPT = os.path.join(ROOT, "main.py")
+HISTORY_FILE = os.path.join(ROOT, "startup_times.jsonl")   # Tracked, one record per line
+
+DEFAULT_RUNS = 5
+TOP_MODULES = 15              # Modules listed and recorded per run
+REGRESSION_TOLERANCE = 0.2    # Allowed slowdown against the last comparable record
+RUN_TIMEOUT_S = 120
+
+
+def parse_importtime(lines):
+    """
+    Parses the stderr of `python -X importtime`.
+
+    Returns:
+        dict: module -> (self seconds, cumulative seconds). A module imported in a
+        nested import counts in the cumulative time of its importer as well.
+    """
+    modules = {}
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue   # The header line
+        modules[fields[2].strip()] = (int(fields[0]) / 1e6, int(fields[1]) / 1e6)
+    return modules
+
+
+def run_once(env):
+    """
+    Launches the application once in benchmark mode.
+
+    Returns:
+        tuple: (seconds from launch to first paint, parse_importtime() of the
+        imports done before it).
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-X", "importtime", MAIN_SCRIPT], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    timer = threading.Timer(RUN_TIMEOUT_S, process.kill)
+    timer.start()
+    first_paint = None
+    imports, other = [], []
+    try:
+        for line in process.stderr:
+            if first_paint is None and line.startswith(FIRST_PAINT_MARKER):
+                first_paint = time.perf_counter() - start
+            elif first_paint is None and line.startswith("import time:"):
+                imports.append(line)
+            elif not line.startswith("import time:"):
+                other.append(line)
+        process.wait()
+    finally:
+        timer.cancel()
+    if first_paint is None:
+        raise RuntimeError(f"The application exited with {process.returncode} before its first paint:\n"
+                           + "".join(other[-20:]))
+    return first_paint, parse_importtime(imports)
+
+
+def summarize(runs, top=TOP_MODULES):
+    """Median first paint and the `top` slowest imports by median cumulative time."""
+    times = [first_paint for first_paint, _ in runs]
+    modules = {}
+    for _, imports in runs:
+        for name, timing in imports.items():
+            modules.setdefault(name, []).append(timing)
+    medians = {name: (statistics.median(t[0] for t in timings), statistics.median(t[1] for t in timings))
+               for name, timings in modules.items()}
+    slowest = sorted(medians.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    return {
+        "first_paint_s": round(statistics.median(times), 4),
+        "min_s": round(min(times), 4),
+        "import_s": round(sum(timing[0] for timing in medians.values()), 4),
+        "modules": {name: {"self_ms": round(s * 1000, 1), "cumulative_ms": round(c * 1000, 1)}
+                    for name, (s, c) in slowest},
+    }
+
+
+def read_history(path=HISTORY_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _environment(env):
+    """Records are only compared with records taken on the same machine and Qt platform."""
+    return {"host": platform.node(), "qt_platform": env.get("QT_QPA_PLATFORM", "default"),
+            "python": platform.python_version()}
+
+
+def _previous(history, environment):
+    for record in reversed(history):
+        if all(record.get(key) == value for key, value in environment.items()):
+            return record
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure launch to first paint of the main window and the "
+                                                 "imports done before it.")
+    parser.add_argument("-n", "--runs", type=int, default=DEFAULT_RUNS, help=f"Launches (default: {DEFAULT_RUNS})")
+    parser.add_argument("--offscreen", action="store_true", help="Use Qt's offscreen platform, e.g. without a display")
+    parser.add_argument("--record", action="store_true", help=f"Append the result to {os.path.basename(HISTORY_FILE)}")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ, **{BENCHMARK_ENV: "1"})
+    if args.offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    runs = []
+    for i in range(args.runs):
+        runs.append(run_once(env))
+        print(f"Run {i + 1}: {runs[-1][0]:.3f} s")
+
+    result = summarize(runs)
+    print(f"Launch to first paint: {result['first_paint_s']:.3f} s median, {result['min_s']:.3f} s best "
+          f"of {args.runs}; {result['import_s']:.3f} s of it in imports")
+    print(f"{'Cumulative (ms)':>16} {'Self (ms)':>10}  Module")
+    for name, timing in result["modules"].items():
+        print(f"{timing['cumulative_ms']:>16.1f} {timing['self_ms']:>10.1f}  {name}")
+
+    environment = _environment(env)
+    previous = _previous(read_history(), environment)
+    regressed = False
+    if previous is not None:
+        change = result["first_paint_s"] / previous["first_paint_s"] - 1
+        regressed = change > REGRESSION_TOLERANCE
+        print(f"Last record ({previous.get('commit')}, {previous.get('date')}): {previous['first_paint_s']:.3f} s, "
+              f"now {change:+.0%}" + (" - REGRESSION" if regressed else ""))
+
+    if args.record:
+        record = {"date": datetime.date.today().isoformat(), "commit": _commit(), **environment,
+                  "runs": args.runs, **result}
+        with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"Recorded in {HISTORY_FILE}")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -319,5 +319,28 @@ def paint_table_item(item, col_name, value, rssi_max=None, row=None, df=None):
                     set_color_and_tooltip(QColor(255, 120, 120), "Sudden spike in current draw")
         except Exception:
             set_color_and_tooltip(QColor(255, 255, 120), "Current data issue")
+
+    # Derived channels (see src/derived_channels.py)
+    elif col_name == "motorSpread":
+        try:
+            v = float(value)
+            if v > 750:
+                set_color_and_tooltip(QColor(255, 255, 120), "Persistent large difference between motors (>750)")
+            else:
+                item.setBackground(QColor(180, 255, 180))
+        except Exception:
+            item.setBackground(QColor(180, 255, 180))
+
+    elif col_name.startswith("trackingError["):
+        try:
+            v = float(value)
+            if abs(v) > 200:
+                set_color_and_tooltip(QColor(255, 120, 120), "Gyro far from setpoint (>200 deg/s tracking error)")
+            elif abs(v) > 100:
+                set_color_and_tooltip(QColor(255, 255, 120), "Gyro lagging setpoint (>100 deg/s tracking error)")
+            else:
+                item.setBackground(QColor(180, 255, 180))
+        except Exception:
+            item.setBackground(QColor(180, 255, 180))
     else:
         item.setBackground(QColor(255, 255, 255))  # white
\ No newline at end of file
@@ -0,0 +1,125 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+
+class TimeIndex:
+    """
+    Sorted index over a log's "time_ms" column.
+
+    Time-to-row lookups are binary searches (np.searchsorted) and row-to-time
+    lookups are direct array reads, so neither direction scans the log.
+    """
+
+    def __init__(self, time_ms):
+        self.time_ms = np.asarray(time_ms, dtype=float)
+
+    def __len__(self):
+        return len(self.time_ms)
+
+    @property
+    def start_ms(self):
+        return float(self.time_ms[0]) if len(self.time_ms) else 0.0
+
+    @property
+    def end_ms(self):
+        return float(self.time_ms[-1]) if len(self.time_ms) else 0.0
+
+    def row_at(self, t_ms):
+        """
+        Returns the row whose timestamp is nearest to `t_ms`.
+
+        Args:
+            t_ms (float | np.ndarray): Time(s) in milliseconds.
+
+        Returns:
+            int | np.ndarray: Row position(s), clipped to the log.
+        """
+        if not len(self.time_ms):
+            raise ValueError("Time index is empty.")
+        t = np.asarray(t_ms, dtype=float)
+        right = np.clip(np.searchsorted(self.time_ms, t, side="left"), 0, len(self.time_ms) - 1)
+        left = np.clip(right - 1, 0, len(self.time_ms) - 1)
+        nearest = np.where(np.abs(self.time_ms[left] - t) <= np.abs(self.time_ms[right] - t), left, right)
+        return int(nearest) if nearest.ndim == 0 else nearest
+
+    def time_at(self, row):
+        """Returns the timestamp in milliseconds of a row position (or array of positions)."""
+        t = self.time_ms[row]
+        return float(t) if np.ndim(t) == 0 else t
+
+    def row_range(self, start_ms, end_ms):
+        """
+        Returns the half-open row range [start, stop) covering a time window.
+
+        Args:
+            start_ms (float): Window start in milliseconds (inclusive).
+            end_ms (float): Window end in milliseconds (inclusive).
+
+        Returns:
+            tuple[int, int]: Row positions usable as a slice.
+        """
+        if start_ms > end_ms:
+            start_ms, end_ms = end_ms, start_ms
+        start = int(np.searchsorted(self.time_ms, start_ms, side="left"))
+        stop = int(np.searchsorted(self.time_ms, end_ms, side="right"))
+        return start, stop
+
+
+def build_time_index(df):
+    """
+    Builds a TimeIndex for a cleaned log.
+
+    Args:
+        df (pd.DataFrame): DataFrame returned by load_and_clean_csv.
+
+    Returns:
+        TimeIndex | None: The index, or None if the log has no "time_ms" column.
+    """
+    if "time_ms" not in df.columns:
+        return None
+    return TimeIndex(df["time_ms"].to_numpy(dtype=float))
+
+
+def event_file_for(csv_file):
+    """Returns the path of the .event file decoded alongside a CSV log."""
+    return os.path.splitext(csv_file)[0] + ".event"
+
+
+def load_events(csv_file, time_index=None):
+    """
+    Loads the .event file of a log and maps each entry onto a row.
+
+    Each line of the file is a JSON object such as {"name":"Sync beep", "time":35799115},
+    with the time in microseconds.
+
+    Args:
+        csv_file (str): Path to the decoded CSV file.
+        time_index (TimeIndex | None): Index used to map event times to rows.
+
+    Returns:
+        pd.DataFrame: Columns "name", "time_ms", and when an index is given, "row" and
+        "in_log" (False for events outside the logged time span).
+    """
+    events = []
+    event_file = event_file_for(csv_file)
+    if os.path.exists(event_file):
+        with open(event_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "time" in entry:
+                    events.append({"name": str(entry.get("name", "Event")), "time_ms": entry["time"] / 1000.0})
+
+    events = pd.DataFrame(events, columns=["name", "time_ms"])
+    if time_index is not None and len(time_index):
+        times = events["time_ms"].to_numpy(dtype=float)
+        events["row"] = time_index.row_at(times) if len(times) else np.empty(0, dtype=np.int64)
+        events["in_log"] = (times >= time_index.start_ms) & (times <= time_index.end_ms)
+    return events
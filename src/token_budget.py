@@ -0,0 +1,9 @@
+# GPT tokenizers split digits into groups of up to three, so numeric tables come out
+# denser than prose; three characters per token keeps the estimate on the safe side.
+CHARS_PER_TOKEN = 3
+DEFAULT_TOKEN_BUDGET = 3000
+
+
+def estimate_tokens(text):
+    """Rough token count of `text`, without needing the model's tokenizer."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
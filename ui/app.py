@@ -1,61 +1,32 @@
 import sys
 import os
-import pandas as pd
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QLabel, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QFileDialog, QMessageBox, QToolBar, QTextEdit, QLineEdit, QComboBox, QMenu, QListWidget, QListWidgetItem, QDialog, QFormLayout
+    QApplication, QMainWindow, QLabel, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QFileDialog, QMessageBox, QToolBar, QTextEdit, QLineEdit, QComboBox, QMenu, QListWidget, QListWidgetItem, QDialog, QFormLayout, QSpinBox, QCheckBox
 )
-from PyQt6.QtGui import QAction  # QAction ONLY from QtGui
-from PyQt6.QtWebEngineWidgets import QWebEngineView
-from PyQt6.QtCore import QUrl, Qt, QThread, pyqtSignal  # Import QUrl, Qt, QThread, and pyqtSignal
-import tempfile
-from itertools import cycle, islice  # Import cycle and islice to repeat and limit colors
+from PyQt6.QtGui import QAction, QTextCursor  # QAction ONLY from QtGui
+from PyQt6.QtCore import QTimer, Qt, pyqtSignal
 import random  # Import random for generating random colors
-import markdown  # Add this import at the top
-import base64  # Import base64 for encoding images
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from ui.table_window import TableWindow
-from ui.file_selection import FileSelectionWindow
-from ui.column_selection import ColumnSelectionWindow
-from workers.chat_worker import ChatWorker  # Import the ChatWorker class
-from src.context_processor import tsv_to_markdown  # Import the context processor
-import plotly.express as px
-from src.converter import convert_bbl_to_csv  # Import the converter logic
-from bokeh.plotting import figure, output_file, show  # Import Bokeh for plotting
-from bokeh.palettes import Category10  # Import a color palette
-from src.data_processor import load_and_clean_csv  # Import the data processing logic
-from src.data_processor import (
-    plot_pid_loop_analysis,
-    plot_throttle_voltage,
-    plot_motor_desync,
-    plot_stick_input_vs_movement,  # Import the Stick Input vs. Actual Movement plot function
-)
-from src.assistant import ask_chatgpt
-from ui.column_selection import FRIENDLY_COLUMN_NAMES
-
-class DecodeWorker(QThread):
-    finished = pyqtSignal(str)  # emits output_dir on success
-    error = pyqtSignal(str)     # emits error message
-
-    def __init__(self, file_path, output_dir):
-        super().__init__()
-        self.file_path = file_path
-        self.output_dir = output_dir
-
-    def run(self):
-        try:
-            from src.converter import convert_bbl_to_csv
-            generated_dir = convert_bbl_to_csv(self.file_path, self.output_dir)
-            if generated_dir:
-                self.finished.emit(generated_dir)
-            else:
-                self.error.emit("Failed to convert the .bbl file. Please check the file and try again.")
-        except Exception as e:
-            self.error.emit(str(e))
+# Only what the main window needs to show is imported here. Windows, plotting and
+# pandas-backed processing are imported where they are first used, and warmed up in
+# the background once the window is painted (see warm_up).
+from workers.chat_worker import ChatQueue
+from workers.scheduler import IO, PRIORITY_LOW, get_scheduler
+from ui.jobs_window import JobsWindow
+from src.chat_history import ChatHistory
+from src.converter import decode_bbl  # Import the converter logic
+from src.startup import import_modules
+from src.token_budget import DEFAULT_TOKEN_BUDGET
+from workers.plot_worker import PlotPipeline
+from workers.prefetch_worker import SessionPrefetcher
 
 class MainWindow(QMainWindow):
     """Main Window with file selection, processing, and AI assistant chat."""
+    first_painted = pyqtSignal()  # Emitted once, after the window is first drawn
+
     def __init__(self):
         super().__init__()
+        self._painted = False
 
         self.setWindowTitle("UAV Blackbox Analyzer")
         self.setGeometry(100, 100, 800, 600)
@@ -73,6 +44,10 @@ class MainWindow(QMainWindow):
         open_folder_action.triggered.connect(self.open_decoded_folder)
         self.toolbar.addAction(open_folder_action)
 
+        jobs_action = QAction("Jobs", self)
+        jobs_action.triggered.connect(self.show_jobs_window)
+        self.toolbar.addAction(jobs_action)
+
         settings_action = QAction("Settings", self)
         settings_action.triggered.connect(self.open_settings_dialog)
         self.toolbar.addAction(settings_action)
@@ -115,15 +90,48 @@ class MainWindow(QMainWindow):
         self.context_selector.customContextMenuRequested.connect(self.show_context_selector_menu)
         input_row.addWidget(self.context_selector)
 
+        # Larger selections are compressed to this many tokens before they are sent
+        self.context_budget = QSpinBox()
+        self.context_budget.setRange(500, 100000)
+        self.context_budget.setSingleStep(500)
+        self.context_budget.setValue(DEFAULT_TOKEN_BUDGET)
+        self.context_budget.setSuffix(" tokens")
+        self.context_budget.setToolTip("Token budget for the selected context")
+        self.context_budget.setVisible(False)
+        input_row.addWidget(self.context_budget)
+
         self.clear_contexts_button = QPushButton("Clear Contexts")
         self.clear_contexts_button.setVisible(False)
         self.clear_contexts_button.clicked.connect(self.clear_chat_contexts)
         input_row.addWidget(self.clear_contexts_button)
 
+        # Unchecked, the question is sent again and the fresh answer replaces the cached one
+        self.use_cache_checkbox = QCheckBox("Use cached answers")
+        self.use_cache_checkbox.setChecked(True)
+        input_row.addWidget(self.use_cache_checkbox)
+
+        # The assistant reads the most recently opened table's log through tool calls
+        self.use_tools_checkbox = QCheckBox("Query open log")
+        self.use_tools_checkbox.setChecked(True)
+        self.use_tools_checkbox.setToolTip("Let the assistant fetch metrics, anomalies, channel summaries "
+                                           "and header values from the last opened table window")
+        input_row.addWidget(self.use_tools_checkbox)
+
         self.attach_image_button = QPushButton("Attach Image")
         self.attach_image_button.clicked.connect(self.attach_image_to_chat)
         input_row.addWidget(self.attach_image_button)
 
+        self.stop_chat_button = QPushButton("Stop")
+        self.stop_chat_button.setToolTip("Cancel the questions still being answered")
+        self.stop_chat_button.setEnabled(False)
+        self.stop_chat_button.clicked.connect(lambda: self.chat_queue.cancel_all())
+        input_row.addWidget(self.stop_chat_button)
+
+        new_conversation_button = QPushButton("New Conversation")
+        new_conversation_button.setToolTip("Stop sending the earlier questions and answers along")
+        new_conversation_button.clicked.connect(self.new_conversation)
+        input_row.addWidget(new_conversation_button)
+
         layout.addLayout(input_row)
 
         self.image_list = QListWidget()
@@ -138,8 +146,32 @@ class MainWindow(QMainWindow):
         self.open_file_selection_windows = []  # Track multiple file selection windows
         self.open_column_selection_windows = []  # Track multiple column selection windows
         self.open_table_windows = []  # Track multiple table windows
+        self.plot_window = None  # Embedded plot view, created on first plot and reused
+
+        # Plot data is prepared off the GUI thread; identical requests share one job
+        self.plot_pipeline = PlotPipeline(parent=self)
+        self.plot_pipeline.ready.connect(self.on_plot_prepared)
+        self.plot_pipeline.failed.connect(self.on_plot_failed)
+        self.plot_pipeline.cancelled.connect(self.on_plot_cancelled)
+        self.plot_presenters = {}
 
         self.chat_contexts = []  # List to store context strings
+        self.chat_history = ChatHistory()  # Turns sent along with follow-up questions
+        self.chat_requests = {}  # request id -> question and cursors on its AI block
+
+        # Decoding, table loads and chat requests share one scheduler with bounded pools
+        self.scheduler = get_scheduler()
+        self.jobs_window = None
+        # Sessions of opened folders are loaded ahead of use on an otherwise idle worker
+        self.prefetcher = SessionPrefetcher(self.scheduler, parent=self)
+
+        # Questions run in parallel as high-priority jobs and can be stopped while running
+        self.chat_queue = ChatQueue(self.scheduler, parent=self)
+        self.chat_queue.token.connect(self.append_ai_token)
+        self.chat_queue.tool_called.connect(self.show_ai_tool_call)
+        self.chat_queue.finished.connect(self.on_ai_response)
+        self.chat_queue.error.connect(self.on_ai_error)
+        self.chat_queue.cancelled.connect(self.on_ai_cancelled)
         self.attached_images = []  # Store attached images for the next chat message
 
         self.all_models = [
@@ -155,6 +187,24 @@ class MainWindow(QMainWindow):
             # Add other vision-capable models here
         ]
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            # Queued, so the rest of the window is drawn before anything reacts
+            QTimer.singleShot(0, self.first_painted.emit)
+
+    def warm_up(self):
+        """
+        Imports what startup left out on an idle I/O worker, so the first table, plot
+        or answer does not wait for pandas, bokeh or openai to load. The plot view
+        follows on the GUI thread, which creates Qt's web engine.
+        """
+        self.scheduler.submit(
+            "Warm up", import_modules, pool=IO, priority=PRIORITY_LOW, key=("warm-up",), cancellable=True,
+            on_done=lambda timings: import_modules(("ui.plot_window",)),
+        )
+
     def closeEvent(self, event):
         """Closes all child windows when the main window is closed."""
         # Close all file selection windows
@@ -169,11 +219,21 @@ class MainWindow(QMainWindow):
         for window in self.open_table_windows:
             window.close()
 
+        if self.plot_window is not None:
+            self.plot_window.close()
+        self.plot_pipeline.shutdown()
+        self.chat_queue.cancel_all()
+        if self.jobs_window is not None:
+            self.jobs_window.close()
+        self.scheduler.shutdown()
+
         # Accept the close event to proceed with closing the main window
         event.accept()
 
     def open_file_dialog(self):
         """Opens a file dialog to select a .bbl log file and process it in a thread."""
+        from ui.file_selection import FileSelectionWindow
+
         bbl_path, decoded_path = self.load_paths()
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Select Blackbox Log File", bbl_path, "Blackbox Logs (*.bbl);;All Files (*)"
@@ -191,19 +251,28 @@ class MainWindow(QMainWindow):
             # Show FileSelectionWindow with "decoding" message
             file_selection_window = FileSelectionWindow(output_dir, self)
             file_selection_window.setWindowTitle("Decoding in Progress")
-            file_selection_window.list_widget.clear()
-            file_selection_window.list_widget.addItem(f"{os.path.basename(file_path)} is being decoded. This may take some time...")
+            file_selection_window.show_message(f"{os.path.basename(file_path)} is being decoded...")
             file_selection_window.show()
             self.open_file_selection_windows.append(file_selection_window)
             file_selection_window.destroyed.connect(
                 lambda: self.open_file_selection_windows.remove(file_selection_window)
             )
 
-            # Start decoding in a thread
-            self.decode_worker = DecodeWorker(file_path, output_dir)
-            self.decode_worker.finished.connect(lambda gen_dir: self.on_decode_finished(gen_dir, file_selection_window))
-            self.decode_worker.error.connect(lambda msg: self.on_decode_error(msg, file_selection_window))
-            self.decode_worker.start()
+            # The decoder is an external program, so waiting for it is I/O work
+            self.scheduler.submit(
+                f"Decode {os.path.basename(file_path)}", decode_bbl, file_path, output_dir,
+                pool=IO, key=("decode", os.path.abspath(file_path), os.path.abspath(output_dir)),
+                cancellable=True, reports_progress=True,
+                on_done=lambda gen_dir: self.on_decode_finished(gen_dir, file_selection_window),
+                on_error=lambda msg: self.on_decode_error(msg, file_selection_window),
+                on_progress=file_selection_window.show_progress,
+            )
+
+    def show_jobs_window(self):
+        if self.jobs_window is None:
+            self.jobs_window = JobsWindow(self.scheduler)
+        self.jobs_window.show()
+        self.jobs_window.raise_()
 
     def open_decoded_folder(self):
         """Opens a file dialog to select an already decoded folder."""
@@ -216,6 +285,8 @@ class MainWindow(QMainWindow):
 
     def show_file_selection(self, output_dir):
         """Opens a new file selection window."""
+        from ui.file_selection import FileSelectionWindow
+
         file_selection_window = FileSelectionWindow(output_dir, self)
         self.open_file_selection_windows.append(file_selection_window)
         file_selection_window.show()
@@ -227,6 +298,8 @@ class MainWindow(QMainWindow):
 
     def show_table(self, csv_file):
         """Opens a new window displaying the CSV data as a table."""
+        from ui.table_window import TableWindow
+
         table_window = TableWindow(csv_file)
         table_window.context_extracted.connect(self.add_chat_context)  # Connect the signal
         self.open_table_windows.append(table_window)
@@ -239,6 +312,8 @@ class MainWindow(QMainWindow):
 
     def show_column_selection(self, csv_file):
         """Opens a new column selection window."""
+        from ui.column_selection import ColumnSelectionWindow
+
         column_selection_window = ColumnSelectionWindow(csv_file, self)
         self.open_column_selection_windows.append(column_selection_window)
         column_selection_window.show()
@@ -248,72 +323,128 @@ class MainWindow(QMainWindow):
             lambda: self.open_column_selection_windows.remove(column_selection_window)
         )
 
-    def plot_graph(self, csv_file, columns):
-        """Plots the selected columns from the CSV file using Bokeh."""
-        # Load and clean the CSV file
-        df = load_and_clean_csv(csv_file)
+    def plot_graph(self, csv_file, columns, live=False, raster=False):
+        """
+        Plots the selected columns from the CSV file using Bokeh.
 
-        # Ensure "time_us" column exists after cleaning
-        if "time_ms" not in df.columns:
-            QMessageBox.criitical(self,"Error", "No valid 'time_ms' column found.")
-            return
+        Plots are shown in the embedded plot window. With live=True the visible range
+        is re-decimated on every pan and zoom; with raster=True it is drawn as a
+        density image rendered on the server. Loading and decimation run in the plot
+        pipeline; on_plot_prepared only builds the view.
+        """
+        from src.plot_pipeline import plot_request_key, prepare_line_plot, prepare_live_plot
+        from ui.column_selection import FRIENDLY_COLUMN_NAMES
 
         if len(columns) > 50:
             QMessageBox.warning(self, "Too many columns selected for plotting.",  "Please select fewer columns.")
             return
 
-        # Create a Bokeh figure
-        p = figure(
-            title=f"Graph for {os.path.basename(csv_file)}",
-            x_axis_label="Time (ms)",
-            y_axis_label="Values",
-            tooltips=[
-                ("Time (ms)", "$x"),
-                ("Value", "$y"),
-                ("Column", "@legend_label")  # This works if you use ColumnDataSource with a 'legend_label' field
-            ],
-            width=900, height=600
-        )
-
         # Generate random colors for each column
         colors = ["#" + ''.join(random.choices("0123456789ABCDEF", k=6)) for _ in columns]
 
         # Friendly names mapping
         friendly_names = {col: FRIENDLY_COLUMN_NAMES.get(col, col) for col in columns}
 
-        # Add lines for each selected column with a unique color
-        for i, column in enumerate(columns):
-            if column in df.columns:
-                p.line(
-                    df["time_ms"], df[column],
-                    legend_label=friendly_names[column],  # Use friendly name
-                    line_width=2,
-                    color=colors[i]
-                )
-
-        # Customize the legend
-        p.legend.title = "Columns"
-        p.legend.location = "top_left"
-
-        # Save the plot to an HTML file and open it in the browser
-        output_file("plot.html")
-        show(p)
-
-    def plot_pid_loop_analysis(self, csv_file):
-        """Calls the PID Loop Analysis plot function."""
-        plot_pid_loop_analysis(csv_file)
+        title = f"Graph for {os.path.basename(csv_file)}"
+        key = plot_request_key(csv_file, "graph", tuple(columns), live, raster)
+        if live or raster:
+            prepare = lambda check: prepare_live_plot(csv_file, columns, friendly_names, colors, title, raster, check)
+        else:
+            prepare = lambda check: prepare_line_plot(csv_file, columns, friendly_names, colors, title, check=check)
+        self.submit_plot(key, prepare, self.present_graph)
 
-    def plot_throttle_voltage(self, csv_file):
-        """Calls the Throttle and Voltage Drop plot function."""
-        plot_throttle_voltage(csv_file)
+    def present_graph(self, prepared):
+        """GUI-thread stage of plot_graph: hands the prepared arrays or spec to the plot view."""
+        from src.data_processor import build_line_figure, draw_event_markers
 
-    def plot_motor_desync(self, csv_file):
-        """Calls the Motor Desync or Oscillations plot function."""
-        plot_motor_desync(csv_file)
+        if prepared["kind"] == "live":
+            self.get_plot_window().show_live(prepared["spec"], prepared["title"])
+            return
+        # One shared source: two points per pixel per series on a single time axis
+        p = build_line_figure(
+            None, prepared["columns"], prepared["title"], labels=prepared["labels"], colors=prepared["colors"],
+            legend_title="Columns", data=prepared["data"],
+        )
+        draw_event_markers(p, prepared["events"])
+        self.get_plot_window().show_figure(p, prepared["title"])
+
+    def submit_plot(self, key, prepare, present):
+        """Queues a plot in the pipeline; present(prepared) runs on the GUI thread when it is ready."""
+        self.plot_presenters[key] = present
+        self.plot_pipeline.submit(key, prepare)
+        if self.plot_pipeline.is_busy():
+            self.statusBar().showMessage("Preparing plot...")
+
+    def on_plot_prepared(self, key, prepared):
+        self.statusBar().clearMessage()
+        present = self.plot_presenters.pop(key, None)
+        if present is not None:
+            present(prepared)
+
+    def on_plot_failed(self, key, msg):
+        self.statusBar().clearMessage()
+        self.plot_presenters.pop(key, None)
+        QMessageBox.critical(self, "Error", f"Could not prepare the plot: {msg}")
+
+    def on_plot_cancelled(self, key):
+        self.plot_presenters.pop(key, None)
+
+    def get_plot_window(self):
+        """Returns the embedded plot window, creating it on first use."""
+        from ui.plot_window import PlotWindow
+
+        if self.plot_window is None:
+            self.plot_window = PlotWindow()
+            self.plot_window.snapshot_ready.connect(self.attach_plot_snapshot)
+        return self.plot_window
+
+    def plot_overlay(self, csv_files, column, anchor, event_name=None, throttle=0.5):
+        """Plots one column of several logs over each other, aligned on the chosen anchor."""
+        from src.overlay import load_overlay_traces
+        from src.plot_pipeline import plot_request_key
+
+        key = plot_request_key(csv_files, "overlay", column, anchor, event_name, throttle)
+        prepare = lambda check: load_overlay_traces(csv_files, column, anchor, event_name, throttle, check=check)
+        self.submit_plot(key, prepare, lambda traces: self.present_overlay(traces, column, anchor, event_name, throttle))
+
+    def present_overlay(self, traces, column, anchor, event_name, throttle):
+        from src.overlay import ANCHOR_EVENT, ANCHOR_THROTTLE, build_overlay_figure
+        from ui.column_selection import FRIENDLY_COLUMN_NAMES
+
+        if anchor == ANCHOR_EVENT:
+            anchor_label = f'"{event_name}"'
+        elif anchor == ANCHOR_THROTTLE:
+            anchor_label = f"throttle {throttle:.0%}"
+        else:
+            anchor_label = anchor.lower()
+        skipped = [f"{t['name']}: {t['error']}" for t in traces if t["error"]]
+        if len(skipped) == len(traces):
+            QMessageBox.warning(self, "Nothing to Plot", "No selected log could be aligned.\n" + "\n".join(skipped))
+            return
+        label = FRIENDLY_COLUMN_NAMES.get(column, column)
+        p = build_overlay_figure(traces, label, anchor_label)
+        self.get_plot_window().show_figure(p, f"Overlay of {len(traces) - len(skipped)} logs")
+        if skipped:
+            QMessageBox.information(self, "Some Logs Skipped", "\n".join(skipped))
+
+    def show_dashboard(self, csv_file, names=None):
+        """Shows preset panels (all registered presets if names is None) stacked with a linked time axis."""
+        from src.plot_pipeline import plot_request_key
+        from src.presets import prepare_dashboard  # Preset panels decimated from a single CSV read
+
+        title = names[0] if names and len(names) == 1 else "Preset Dashboard"
+        key = plot_request_key(csv_file, "dashboard", tuple(names) if names else None)
+
+        def present(prepared):
+            from src.presets import build_dashboard_layout
+
+            layout = build_dashboard_layout(prepared)
+            if layout is None:
+                QMessageBox.warning(self, "Nothing to Plot", f"No valid columns for {', '.join(prepared['skipped'])}.")
+                return
+            self.get_plot_window().show_figure(layout, f"{title} - {os.path.basename(csv_file)}")
 
-    def plot_stick_input_vs_movement(self, csv_file):
-        """Calls the Stick Input vs. Actual Movement plot function."""
-        plot_stick_input_vs_movement(csv_file)
+        self.submit_plot(key, lambda check: prepare_dashboard(csv_file, names, check=check), present)
 
     def handle_chat_input(self):
         """Handles user input in the chat interface."""
@@ -323,6 +454,7 @@ class MainWindow(QMainWindow):
                 '<div style="color:#1565c0;">'
                 '<b>You:</b> {}</div>'
             ).format(user_message)
+            self.chat_display.moveCursor(QTextCursor.MoveOperation.End)
             self.chat_display.insertHtml(user_html)
             self.chat_display.insertPlainText("\n")
             self.chat_input.clear()
@@ -332,10 +464,14 @@ class MainWindow(QMainWindow):
             # --- Context handling ---
             context_idx = self.context_selector.currentIndex() - 1  # -1 because "No context" is at 0
             messages = [{"role": "system", "content": "You are a helpful assistant for UAV data analysis."}]
-            if context_idx >= 0:
-                context_str = self.chat_contexts[context_idx]
-                context_md = tsv_to_markdown(context_str)
-                messages.append({"role": "user", "content": f"Here is some context data:\n{context_md}"})
+            toolbox = self.assistant_toolbox()
+            if toolbox is not None:
+                messages.append({"role": "system", "content": (
+                    f"The user has the log {os.path.basename(toolbox.csv_file)} open. Use the tools to read "
+                    "the data you need from it instead of asking for pasted values."
+                )})
+            # Earlier turns as they are now; requests still running are not part of them
+            messages += self.chat_history.messages()
 
             user_content = user_message
 
@@ -349,65 +485,136 @@ class MainWindow(QMainWindow):
             if current_images:
                 content_blocks = [{"type": "text", "text": user_content}]
                 content_blocks.extend(current_images)
-                messages.append({
-                    "role": "user",
-                    "content": content_blocks
-                })
+                user_entry = {"role": "user", "content": content_blocks}
                 self.attached_images = [
                     (fname, img) for fname, img in self.attached_images if fname not in current_filenames
                 ]
                 self.update_image_list()
             else:
-                messages.append({"role": "user", "content": user_content})
+                user_entry = {"role": "user", "content": user_content}
 
-            # Disable input while waiting
-            self.chat_input.setDisabled(True)
-            self.attach_image_button.setDisabled(True)
-            self.model_selector.setDisabled(True)
-            self.context_selector.setDisabled(True)
+            context_str = self.chat_contexts[context_idx] if context_idx >= 0 else None
+            budget = self.context_budget.value()
 
-            # Start worker thread
-            self.chat_worker = ChatWorker(messages, selected_model)
-            self.chat_worker.finished.connect(self.on_ai_response)
-            self.chat_worker.error.connect(self.on_ai_response)
-            self.chat_worker.start()
+            def build_messages():
+                # Runs on the chat pool, so compressing a large context does not block the GUI;
+                # it only uses the values above, never the window
+                if context_str is None:
+                    return messages + [user_entry]
+                from src.context_processor import fit_context
 
-    def on_ai_response(self, ai_response):
+                context_entry = {"role": "user", "content": f"Here is some context data:\n{fit_context(context_str, budget)}"}
+                return messages + [context_entry, user_entry]
+
+            request_id = self.chat_queue.submit(
+                build_messages, selected_model, use_cache=self.use_cache_checkbox.isChecked(), toolbox=toolbox
+            )
+            self.chat_requests[request_id] = {"question": user_message, **self.open_ai_block()}
+            self.stop_chat_button.setEnabled(True)
+
+    def assistant_toolbox(self):
+        """Tools over the most recently opened table's log, or None if tools are off or no table is open."""
+        if not self.use_tools_checkbox.isChecked():
+            return None
+        for table_window in reversed(self.open_table_windows):
+            if hasattr(table_window, "analysis_df"):
+                return table_window.assistant_toolbox()
+        return None
+
+    def open_ai_block(self):
+        """
+        Adds an empty AI block at the end of the chat for an answer still to come.
+
+        Returns cursors on the block's start and on its insertion point. Text edits
+        move QTextCursors along, so both stay on the block while other answers are
+        streamed into blocks before or after it.
+        """
+        self.chat_display.moveCursor(QTextCursor.MoveOperation.End)
+        block_start = self.chat_display.textCursor().position()
+        self.chat_display.insertHtml('<div style="color:#388e3c;"><b>AI:</b> </div>')
+        self.chat_display.insertPlainText(" \n")
+        # Placed after inserting: a cursor at an insertion point would be pushed past the new text
+        start = QTextCursor(self.chat_display.document())
+        start.setPosition(block_start)
+        end = QTextCursor(self.chat_display.document())
+        end.setPosition(self.chat_display.textCursor().position() - 1)
+        return {"start": start, "end": end}
+
+    def append_ai_token(self, request_id, fragment):
+        """Appends a streamed fragment as plain text; it is re-rendered as markdown when complete."""
+        request = self.chat_requests.get(request_id)
+        if request is not None:
+            request["end"].insertText(fragment)
+            self.chat_display.ensureCursorVisible()
+
+    def show_ai_tool_call(self, request_id, name, arguments):
+        self.statusBar().showMessage(f"Assistant is reading {name} {arguments}")
+
+    def on_ai_response(self, request_id, ai_response, cached=False):
         """Handles the AI response and updates the chat display."""
+        request = self.chat_requests.pop(request_id, None)
+        if request is None:
+            return
+        self.chat_history.add(request["question"], ai_response)
+        self.render_ai_block(request, ai_response, " (cached)" if cached else "")
+
+    def on_ai_error(self, request_id, message):
+        request = self.chat_requests.pop(request_id, None)
+        if request is not None:
+            self.render_ai_block(request, message)
+
+    def on_ai_cancelled(self, request_id):
+        request = self.chat_requests.pop(request_id, None)
+        if request is not None:
+            self.render_ai_block(request, "*Cancelled.*", " (stopped)")
+
+    def render_ai_block(self, request, ai_response, label=""):
+        """Replaces the streamed plain text of a request's block with the rendered answer."""
+        import markdown
+
+        self.statusBar().clearMessage()
+        cursor = QTextCursor(self.chat_display.document())
+        cursor.setPosition(request["start"].position())
+        cursor.setPosition(request["end"].position(), QTextCursor.MoveMode.KeepAnchor)
+        cursor.removeSelectedText()
         ai_html_content = markdown.markdown(ai_response, extensions=['tables'])
         ai_html = (
             '<div style="color:#388e3c;">'
-            '<b>AI:</b> {}</div>'
-        ).format(ai_html_content)
-        self.chat_display.insertHtml(ai_html)
+            '<b>AI{}:</b> {}</div>'
+        ).format(label, ai_html_content)
+        cursor.insertHtml(ai_html)
+        self.stop_chat_button.setEnabled(bool(self.chat_requests))
+
+    def new_conversation(self):
+        """Forgets the conversation so far; later questions start without history."""
+        self.chat_history.clear()
+        self.chat_display.moveCursor(QTextCursor.MoveOperation.End)
+        self.chat_display.insertHtml('<div style="color:#757575;"><i>New conversation</i></div>')
         self.chat_display.insertPlainText("\n")
 
-        # Re-enable input
-        self.chat_input.setDisabled(False)
-        self.attach_image_button.setDisabled(False)
-        self.model_selector.setDisabled(False)
-        self.context_selector.setDisabled(False)
-        self.chat_input.setFocus()
-
     def attach_image_to_chat(self):
+        from src.image_payload import encode_image_file, image_block
+
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Select Image", "", "Images (*.png *.jpg *.jpeg *.bmp *.gif)"
         )
         if file_path:
-            with open(file_path, "rb") as img_file:
-                b64_img = base64.b64encode(img_file.read()).decode("utf-8")
-            image_data = {
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:image/png;base64,{b64_img}"
-                }
-            }
+            # Sent with its real MIME type, re-encoded only when that is smaller
+            mime, data = encode_image_file(file_path)
+            image_data = image_block(mime, data)
             self.attached_images.append((os.path.basename(file_path), image_data))
             self.update_image_list()
             QMessageBox.information(self, "Image Attached", "Image will be sent with your next message.")
         # Always update model selector, even if no file selected (in case of removal)
         self.update_model_selector()
 
+    def attach_plot_snapshot(self, label, image_data):
+        """Attaches a plot snapshot to the next chat message, once per plot state."""
+        if any(img == image_data for _, img in self.attached_images):
+            return
+        self.attached_images.append((label, image_data))
+        self.update_image_list()
+
     def remove_selected_image(self, item):
         """Removes the selected image from the list and updates attached_images."""
         row = self.image_list.row(item)
@@ -436,6 +643,7 @@ class MainWindow(QMainWindow):
         self.chat_contexts.append(context_str)
         # Show the context selector and clear button if hidden
         self.context_selector.setVisible(True)
+        self.context_budget.setVisible(True)
         self.clear_contexts_button.setVisible(True)
         # Add a preview (first line or first 40 chars) as the dropdown entry
         preview = context_str.splitlines()[0] if context_str else "Context"
@@ -452,6 +660,7 @@ class MainWindow(QMainWindow):
         self.context_selector.addItem("No context")
         if self.context_selector.count() <= 1:
             self.context_selector.setVisible(False)
+            self.context_budget.setVisible(False)
             self.clear_contexts_button.setVisible(False)
         QMessageBox.information(self, "Contexts Cleared", "All chat contexts have been cleared.")
         self.update_model_selector()  # <-- Add this line
@@ -472,6 +681,7 @@ class MainWindow(QMainWindow):
             self.context_selector.removeItem(idx)
             if self.context_selector.count() <= 1:
                 self.context_selector.setVisible(False)
+                self.context_budget.setVisible(False)
                 self.clear_contexts_button.setVisible(False)
         self.update_model_selector()  # <-- Add this line
 
@@ -560,6 +770,7 @@ class MainWindow(QMainWindow):
     def on_decode_finished(self, generated_dir, file_selection_window):
         # Update the file selection window with real CSV files
         file_selection_window.setWindowTitle("Select a CSV File")
+        file_selection_window.hide_progress()
         file_selection_window.list_widget.clear()
         file_selection_window.load_csv_files()
         QMessageBox.information(self, "Decoding Complete", "Decoding finished successfully.")
@@ -1,7 +1,10 @@
 import os
 import pandas as pd
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QPushButton, QMessageBox, QLabel
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QPushButton, QMessageBox, QLabel, QCheckBox
 from src.data_processor import load_and_clean_csv
+from src.derived_channels import DERIVED_CHANNELS, available_channels
+from src.session_cache import get_session_cache
+from src.presets import PRESETS
 
 FRIENDLY_COLUMN_NAMES = {
     "axisP[0]": "PID proportional term for roll axis",
@@ -53,6 +56,9 @@ FRIENDLY_COLUMN_NAMES = {
     "rxFlightChannelsValid": "Are all RC channels valid (0 = no, 1 = yes)",
 }
 
+# Derived channels are listed next to the raw columns with their own descriptions
+FRIENDLY_COLUMN_NAMES.update({name: description for name, (_, description) in DERIVED_CHANNELS.items()})
+
 class ColumnSelectionWindow(QWidget):
     """Allows the user to select columns for graphing and view raw CSV, with a section for preset plots."""
     def __init__(self, csv_file, parent=None):
@@ -76,34 +82,34 @@ class ColumnSelectionWindow(QWidget):
         self.plot_button = QPushButton("Plot Graph")
         self.plot_button.clicked.connect(self.plot_graph)
 
+        # Serve the plot from the local plot server so zooming re-decimates the data
+        self.live_zoom_checkbox = QCheckBox("Live zoom (full detail when zoomed in)")
+
+        # Render a server-side density image instead of lines (full flights, many channels)
+        self.raster_checkbox = QCheckBox("Rasterize (dense traces and many channels)")
+
         # Button to view the raw CSV
         self.view_button = QPushButton("View Raw CSV")
         self.view_button.clicked.connect(self.view_csv)
 
         left_layout.addWidget(self.list_widget)
+        left_layout.addWidget(self.live_zoom_checkbox)
+        left_layout.addWidget(self.raster_checkbox)
         left_layout.addWidget(self.plot_button)
         left_layout.addWidget(self.view_button)
 
         # Right section: Preset plots
         right_layout = QVBoxLayout()
 
-        # Add buttons for preset plots
-        self.pid_button = QPushButton("PID Loop Analysis")
-        self.pid_button.clicked.connect(self.plot_pid_loop_analysis)
-        right_layout.addWidget(self.pid_button)
+        # One button per registered preset, plus one stacking them all
+        for name in PRESETS:
+            button = QPushButton(name)
+            button.clicked.connect(lambda _, name=name: self.plot_presets([name]))
+            right_layout.addWidget(button)
 
-        self.throttle_button = QPushButton("Throttle and Voltage Drop")
-        self.throttle_button.clicked.connect(self.plot_throttle_voltage)
-        right_layout.addWidget(self.throttle_button)
-
-        self.motor_button = QPushButton("Motor Desync or Oscillations")
-        self.motor_button.clicked.connect(self.plot_motor_desync)
-        right_layout.addWidget(self.motor_button)
-
-        # Add button for Stick Input vs. Actual Movement
-        self.stick_input_button = QPushButton("Stick Input vs. Actual Movement")
-        self.stick_input_button.clicked.connect(self.plot_stick_input_vs_movement)
-        right_layout.addWidget(self.stick_input_button)
+        self.dashboard_button = QPushButton("All Presets (Linked Dashboard)")
+        self.dashboard_button.clicked.connect(lambda: self.plot_presets(None))
+        right_layout.addWidget(self.dashboard_button)
 
         # Add left and right sections to the main layout
         main_layout.addLayout(left_layout)
@@ -113,8 +119,12 @@ class ColumnSelectionWindow(QWidget):
 
     def load_columns(self):
         """Loads column names from the CSV file, excluding 'time (us)'."""
-        df = load_and_clean_csv(self.csv_file)
-        columns = [col for col in df.columns if col != "time (us)"]  # Exclude 'time (us)'
+        # A prefetched session already knows its columns; otherwise the file is parsed
+        schema = get_session_cache().schema(self.csv_file)
+        if schema is None:
+            schema = list(load_and_clean_csv(self.csv_file).columns)
+        columns = [col for col in schema if col != "time (us)"]  # Exclude 'time (us)'
+        columns += available_channels(schema)  # Computed lazily when plotted
 
         # Build mapping: friendly name -> raw name
         self.friendly_to_raw = {}
@@ -137,7 +147,8 @@ class ColumnSelectionWindow(QWidget):
         selected_columns = [self.friendly_to_raw[name] for name in selected_friendly]
 
         if self.parent:
-            self.parent.plot_graph(self.csv_file, selected_columns)
+            self.parent.plot_graph(self.csv_file, selected_columns, live=self.live_zoom_checkbox.isChecked(),
+                                   raster=self.raster_checkbox.isChecked())
 
         self.list_widget.clearSelection()
 
@@ -146,22 +157,7 @@ class ColumnSelectionWindow(QWidget):
         if self.parent:
             self.parent.show_table(self.csv_file)
 
-    def plot_pid_loop_analysis(self):
-        """Plots the PID Loop Analysis preset."""
-        if self.parent:
-            self.parent.plot_pid_loop_analysis(self.csv_file)
-
-    def plot_throttle_voltage(self):
-        """Plots the Throttle and Voltage Drop preset."""
-        if self.parent:
-            self.parent.plot_throttle_voltage(self.csv_file)
-
-    def plot_motor_desync(self):
-        """Plots the Motor Desync or Oscillations preset."""
-        if self.parent:
-            self.parent.plot_motor_desync(self.csv_file)
-
-    def plot_stick_input_vs_movement(self):
-        """Plots the Stick Input vs. Actual Movement preset."""
+    def plot_presets(self, names):
+        """Plots the given presets (all of them if None) as one linked dashboard."""
         if self.parent:
-            self.parent.plot_stick_input_vs_movement(self.csv_file)
\ No newline at end of file
+            self.parent.show_dashboard(self.csv_file, names)
@@ -1,8 +1,55 @@
 import os
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QListWidget, QPushButton, QMessageBox
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTreeWidget, QTreeWidgetItem, QPushButton, QMessageBox, QProgressBar
 from PyQt6.QtWidgets import QTableWidget, QTableWidgetItem
+from PyQt6.QtCore import Qt
 os.sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from ui.header_window import HeaderWindow
+from ui.overlay_dialog import OverlayDialog
+from src.derived_channels import log_key_for
+from src.session_summary import read_summary, summarize_session
+from workers.scheduler import BACKGROUND, QUEUED, get_scheduler
+
+PROGRESS_STEPS = 1000
+SESSION_COLUMNS = ["Session", "Duration (s)", "Max Current (A)", "Min Voltage (V)", "Max Motor Spread",
+                   "Anomalies", "Flight Modes"]
+SORT_ROLE = Qt.ItemDataRole.UserRole
+
+
+def _number(value, digits):
+    return "" if value is None else f"{value:.{digits}f}"
+
+
+class SessionItem(QTreeWidgetItem):
+    """A row of the file list; summary columns sort by value rather than by text."""
+
+    def __init__(self, name):
+        super().__init__([name])
+        self.setData(0, SORT_ROLE, name)
+
+    def __lt__(self, other):
+        column = self.treeWidget().sortColumn() if self.treeWidget() else 0
+        mine, theirs = self.data(column, SORT_ROLE), other.data(column, SORT_ROLE)
+        if mine is None or theirs is None:
+            # Missing values (no summary yet, or no such channel) come first in ascending order
+            return mine is None and theirs is not None
+        return mine < theirs
+
+    def set_summary(self, summary):
+        anomalies = summary.get("anomalies", {})
+        critical, warning = anomalies.get("critical", 0), anomalies.get("warning", 0)
+        modes = summary.get("flight_modes", [])
+        values = [
+            (_number(summary.get("duration_s"), 1), summary.get("duration_s")),
+            (_number(summary.get("max_current_a"), 1), summary.get("max_current_a")),
+            (_number(summary.get("min_voltage_v"), 2), summary.get("min_voltage_v")),
+            (_number(summary.get("max_motor_spread"), 0), summary.get("max_motor_spread")),
+            (f"{critical} / {warning}", (critical, warning)),
+            (", ".join(mode.replace("_MODE", "") for mode in modes), ", ".join(modes)),
+        ]
+        for column, (text, key) in enumerate(values, start=1):
+            self.setText(column, text)
+            self.setData(column, SORT_ROLE, key)
+        self.setToolTip(5, "Rows with critical / warning cells in the raw table")
 
 class FileSelectionWindow(QWidget):
     """Displays a list of CSV files for the user to select."""
@@ -13,32 +60,122 @@ class FileSelectionWindow(QWidget):
         self.open_header_windows = []  # Track multiple header windows
 
         self.setWindowTitle("Select a CSV File")
-        self.setGeometry(200, 200, 400, 300)
+        self.setGeometry(200, 200, 900, 400)
 
         layout = QVBoxLayout()
-        self.list_widget = QListWidget()
+        self.list_widget = QTreeWidget()
+        self.list_widget.setHeaderLabels(SESSION_COLUMNS)
+        self.list_widget.setRootIsDecorated(False)
+        self.list_widget.setSelectionMode(QTreeWidget.SelectionMode.ExtendedSelection)
+        self.summary_jobs = []
         self.load_csv_files()
 
         # Button to show log headers
         self.show_headers_button = QPushButton("Show Log Headers")
         self.show_headers_button.clicked.connect(self.show_log_headers)
 
+        # Button to overlay one column of several logs on a common time axis
+        self.overlay_button = QPushButton("Overlay Selected Logs")
+        self.overlay_button.clicked.connect(self.overlay_selected_logs)
+
         self.list_widget.itemDoubleClicked.connect(self.open_column_selection_window)
+        self.list_widget.currentItemChanged.connect(self.prioritize_prefetch)
+
+        # Shown while the folder's logs are still being decoded
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, PROGRESS_STEPS)
+        self.progress_bar.setVisible(False)
 
         layout.addWidget(self.list_widget)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.overlay_button)
         layout.addWidget(self.show_headers_button)
         self.setLayout(layout)
 
+    def show_progress(self, progress):
+        """Shows the progress of the decode job that fills this folder."""
+        fraction = progress.fraction()
+        if fraction is not None:
+            self.progress_bar.setValue(int(fraction * PROGRESS_STEPS))
+        self.progress_bar.setFormat(progress.describe())
+        self.progress_bar.setVisible(True)
+
+    def hide_progress(self):
+        self.progress_bar.setVisible(False)
+
+    def closeEvent(self, event):
+        # Summaries still queued are only wanted by this window; running ones finish and are kept
+        for job in self.summary_jobs:
+            if job.state == QUEUED:
+                get_scheduler().cancel(job)
+        super().closeEvent(event)
+
+    def show_message(self, text):
+        """Replaces the list with a single line of text, e.g. while the folder is being decoded."""
+        self.list_widget.clear()
+        self.list_widget.addTopLevelItem(QTreeWidgetItem([text]))
+
     def load_csv_files(self):
-        """Loads the list of CSV files from the output directory."""
+        """
+        Loads the list of CSV files from the output directory with their summaries.
+
+        Only the summary sidecars are read here. Sessions without a current sidecar
+        are summarized by background jobs, which fill in their row when done.
+        """
         csv_files = [f for f in os.listdir(self.output_dir) if f.endswith(".csv")]
-        self.list_widget.addItems(csv_files)
+        self.list_widget.setSortingEnabled(False)
+        scheduler = get_scheduler()
+        for name in csv_files:
+            path = os.path.join(self.output_dir, name)
+            item = SessionItem(name)
+            self.list_widget.addTopLevelItem(item)
+            summary = read_summary(path)
+            if summary is not None:
+                item.set_summary(summary)
+                continue
+            try:
+                key = ("summary", log_key_for(path))
+            except OSError:
+                continue
+            self.summary_jobs.append(scheduler.submit(
+                f"Summarize {name}", summarize_session, path, pool=BACKGROUND, key=key,
+                on_done=lambda summary, name=name: self.show_summary(name, summary),
+            ))
+        self.list_widget.setSortingEnabled(True)
+        self.list_widget.sortItems(0, Qt.SortOrder.AscendingOrder)
+        for column in range(len(SESSION_COLUMNS)):
+            self.list_widget.resizeColumnToContents(column)
+        self.parent.prefetcher.prefetch([os.path.join(self.output_dir, f) for f in csv_files])
 
-    def open_column_selection_window(self, item):
+    def show_summary(self, name, summary):
+        for item in self.list_widget.findItems(name, Qt.MatchFlag.MatchExactly, 0):
+            if isinstance(item, SessionItem):
+                item.set_summary(summary)
+
+    def prioritize_prefetch(self, item, previous=None):
+        """The selected session is the likeliest to be opened next."""
+        if item is not None:
+            self.parent.prefetcher.prioritize(os.path.join(self.output_dir, item.text(0)))
+
+    def open_column_selection_window(self, item, column=0):
         """Opens the column selection window for the selected file."""
-        csv_file_path = os.path.join(self.output_dir, item.text())
+        csv_file_path = os.path.join(self.output_dir, item.text(0))
         self.parent.show_column_selection(csv_file_path)
 
+    def overlay_selected_logs(self):
+        """Asks for a column and an anchor, then plots the selected logs over each other."""
+        csv_files = [os.path.join(self.output_dir, item.text(0)) for item in self.list_widget.selectedItems()]
+        if not csv_files:
+            QMessageBox.warning(self, "No Logs Selected", "Select one or more logs to overlay (Ctrl/Shift+click).")
+            return
+        dialog = OverlayDialog(csv_files, self)
+        if dialog.exec():
+            column, anchor, event_name, throttle = dialog.options()
+            if column is None:
+                QMessageBox.warning(self, "No Common Columns", "The selected logs have no column in common.")
+                return
+            self.parent.plot_overlay(csv_files, column, anchor, event_name, throttle)
+
     def show_log_headers(self):
         """Opens a new window to display the log headers."""
         headers_file = os.path.join(self.output_dir, "headers.txt")
@@ -0,0 +1,73 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QPushButton, QHeaderView
+from PyQt6.QtCore import QTimer
+from workers.scheduler import BACKGROUND, CPU, IO, PRIORITY_HIGH, PRIORITY_LOW, RUNNING
+
+PRIORITY_NAMES = {PRIORITY_HIGH: "high", PRIORITY_LOW: "low"}
+REFRESH_MS = 500
+
+
+class JobsWindow(QWidget):
+    """Lists the scheduler's queued, running and recently finished jobs."""
+
+    def __init__(self, scheduler, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.setWindowTitle("Background Jobs")
+        self.setGeometry(200, 200, 900, 400)
+
+        layout = QVBoxLayout()
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(0, 6)
+        self.table.setHorizontalHeaderLabels(["Job", "Pool", "Priority", "State", "Time (s)", "Progress"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        cancel_button = QPushButton("Cancel Selected")
+        cancel_button.clicked.connect(self.cancel_selected)
+        buttons.addStretch(1)
+        buttons.addWidget(cancel_button)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+        self.rows = []
+        self.scheduler.changed.connect(self.refresh)
+        # Run times and progress keep changing between state changes
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(REFRESH_MS)
+        self.refresh()
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        parts = []
+        for pool, label in ((CPU, "CPU"), (IO, "I/O"), (BACKGROUND, "Background")):
+            parts.append(f"{label}: {self.scheduler.running_count(pool)}/{self.scheduler.capacity[pool]} running, "
+                         f"{self.scheduler.queue_depth(pool)} queued")
+        self.summary_label.setText("    ".join(parts))
+
+        self.rows = self.scheduler.jobs() + self.scheduler.finished_jobs()
+        self.table.setRowCount(len(self.rows))
+        for row, job in enumerate(self.rows):
+            # Queued jobs show how long they have waited, the others how long they ran
+            seconds = job.run_time() if job.started_at is not None else job.wait_time()
+            values = [job.name, job.pool, PRIORITY_NAMES.get(job.priority, "normal"), job.state, f"{seconds:.1f}",
+                      job.progress.describe() if job.state == RUNNING else ""]
+            if job.error:
+                values[3] = f"{job.state}: {job.error}"
+            for col, value in enumerate(values):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+
+    def cancel_selected(self):
+        for index in self.table.selectionModel().selectedRows():
+            if index.row() < len(self.rows):
+                self.scheduler.cancel(self.rows[index.row()])
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
@@ -0,0 +1,67 @@
+from PyQt6.QtWidgets import QDialog, QFormLayout, QComboBox, QDoubleSpinBox, QDialogButtonBox
+from src.data_processor import read_csv_columns
+from src.derived_channels import available_channels
+from src.overlay import ANCHORS, ANCHOR_EVENT, ANCHOR_THROTTLE
+from src.time_index import load_events
+from ui.column_selection import FRIENDLY_COLUMN_NAMES
+
+class OverlayDialog(QDialog):
+    """Asks which column to overlay across the selected logs and what to align them on."""
+    def __init__(self, csv_files, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Overlay {len(csv_files)} Logs")
+
+        layout = QFormLayout(self)
+
+        # Only columns present in every selected log can be compared
+        common = None
+        for csv_file in csv_files:
+            columns = read_csv_columns(csv_file)
+            columns += available_channels(columns)
+            common = columns if common is None else [col for col in common if col in columns]
+        self.column_selector = QComboBox()
+        for col in common or []:
+            if col not in ("time (us)", "loopIteration"):
+                self.column_selector.addItem(FRIENDLY_COLUMN_NAMES.get(col, col), col)
+        index = self.column_selector.findData("gyroADC[0]")
+        if index >= 0:
+            self.column_selector.setCurrentIndex(index)
+
+        self.anchor_selector = QComboBox()
+        self.anchor_selector.addItems(ANCHORS)
+        self.anchor_selector.currentTextChanged.connect(self.update_anchor_fields)
+
+        self.event_selector = QComboBox()
+        names = []
+        for csv_file in csv_files:
+            names += [n for n in load_events(csv_file)["name"] if n not in names]
+        self.event_selector.addItems(names)
+
+        self.throttle_input = QDoubleSpinBox()
+        self.throttle_input.setRange(0, 100)
+        self.throttle_input.setSuffix(" %")
+        self.throttle_input.setValue(50)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout.addRow("Column:", self.column_selector)
+        layout.addRow("Align on:", self.anchor_selector)
+        layout.addRow("Event:", self.event_selector)
+        layout.addRow("Throttle stick at:", self.throttle_input)
+        layout.addRow(buttons)
+        self.update_anchor_fields(self.anchor_selector.currentText())
+
+    def update_anchor_fields(self, anchor):
+        self.event_selector.setEnabled(anchor == ANCHOR_EVENT)
+        self.throttle_input.setEnabled(anchor == ANCHOR_THROTTLE)
+
+    def options(self):
+        """Returns (column, anchor, event_name, throttle as 0..1) as chosen in the dialog."""
+        return (
+            self.column_selector.currentData(),
+            self.anchor_selector.currentText(),
+            self.event_selector.currentText() or None,
+            self.throttle_input.value() / 100.0,
+        )
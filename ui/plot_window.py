@@ -0,0 +1,101 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, QLabel
+from PyQt6.QtWebEngineWidgets import QWebEngineView
+from PyQt6.QtGui import QImage
+from PyQt6.QtCore import QUrl, pyqtSignal
+from src.plot_server import get_plot_server
+from src.image_payload import snapshot_payload, image_block
+
+# Longest side of the snapshot sent to the assistant
+SNAPSHOT_SIZES = {"Small (512 px)": 512, "Medium (1024 px)": 1024, "Large (1536 px)": 1536}
+
+class PlotWindow(QWidget):
+    """Embedded plot view backed by the local plot server; reused for every plot."""
+    snapshot_ready = pyqtSignal(str, dict)  # label, image content block for the chat
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.setWindowTitle("Plot")
+        self.setGeometry(250, 150, 1040, 680)  # Wide enough for a Medium snapshot
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.web_view = QWebEngineView()
+        layout.addWidget(self.web_view)
+
+        # Snapshot row: send what is currently shown, at the chosen size
+        snapshot_row = QHBoxLayout()
+        snapshot_row.setContentsMargins(6, 4, 6, 4)
+        snapshot_row.addWidget(QLabel("Snapshot size:"))
+        self.snapshot_size_selector = QComboBox()
+        self.snapshot_size_selector.addItems(SNAPSHOT_SIZES)
+        self.snapshot_size_selector.setCurrentText("Medium (1024 px)")
+        snapshot_row.addWidget(self.snapshot_size_selector)
+        self.send_plot_button = QPushButton("Send Plot to Assistant")
+        self.send_plot_button.clicked.connect(self.send_snapshot)
+        snapshot_row.addWidget(self.send_plot_button)
+        self.snapshot_size_selector.setToolTip("Snapshots are taken at the view's size on screen; "
+                                               "enlarge the window for the larger sizes")
+        snapshot_row.addStretch(1)
+        layout.addLayout(snapshot_row)
+        self.setLayout(layout)
+
+        # The page stays loaded; new plots are pushed into its document over the websocket
+        self.server = get_plot_server()
+        self.view_id, url = self.server.create_view()
+        self.web_view.load(QUrl(url))
+
+    def show_figure(self, p, title="Plot"):
+        """Replaces the current plot with a ready-made Bokeh figure."""
+        self.server.show_figure(self.view_id, p)
+        self.present(title)
+
+    def show_live(self, spec, title="Plot"):
+        """Shows a live (zoom re-decimating) plot, swapping data in place when possible."""
+        self.server.show_live(self.view_id, spec)
+        self.present(title)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_snapshot_sizes()
+
+    def grab_side(self):
+        """Longest side, in device pixels, of what grab() returns for the web view."""
+        return round(max(self.web_view.width(), self.web_view.height()) * self.web_view.devicePixelRatioF())
+
+    def update_snapshot_sizes(self):
+        """
+        Offers only the snapshot sizes the view can deliver.
+
+        grab() captures the view at its size on screen and the snapshot can only be
+        scaled down from there, so a larger size would not add any detail. The
+        smallest size stays available.
+        """
+        available = self.grab_side()
+        model = self.snapshot_size_selector.model()
+        enabled = []
+        for row, max_side in enumerate(SNAPSHOT_SIZES.values()):
+            fits = row == 0 or max_side <= available
+            model.item(row).setEnabled(fits)
+            if fits:
+                enabled.append(row)
+        if self.snapshot_size_selector.currentIndex() not in enabled:
+            self.snapshot_size_selector.setCurrentIndex(enabled[-1])
+
+    def send_snapshot(self):
+        """Renders the plot as currently shown (zoom included) and emits it as a compact image."""
+        image = self.web_view.grab().toImage().convertToFormat(QImage.Format.Format_RGBA8888)
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        max_side = SNAPSHOT_SIZES[self.snapshot_size_selector.currentText()]
+        # Identical pixels at the same size hit the cache and yield the same payload
+        mime, data, digest = snapshot_payload(bytes(bits), image.width(), image.height(), max_side)
+        extension = mime.split("/")[1]
+        label = f"{self.windowTitle()} [{digest[:8]}].{extension} ({len(data) // 1024} KB)"
+        self.snapshot_ready.emit(label, image_block(mime, data))
+
+    def present(self, title):
+        self.setWindowTitle(title)
+        self.show()
+        self.raise_()
+        self.activateWindow()
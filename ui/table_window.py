@@ -1,13 +1,37 @@
 import os
 import pandas as pd
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableView, QTableWidgetItem, QLabel, QProgressDialog, QTableWidget
-from PyQt6.QtCore import pyqtSignal, Qt
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableView, QTableWidgetItem, QLabel, QProgressDialog, QTableWidget, QComboBox, QLineEdit, QPushButton, QMessageBox
+from PyQt6.QtCore import pyqtSignal, Qt, QSortFilterProxyModel, QItemSelection, QItemSelectionModel
 from PyQt6.QtWidgets import QMenu
 from PyQt6.QtGui import QAction
-from src.data_processor import load_and_clean_csv
 from ui.column_selection import FRIENDLY_COLUMN_NAMES  # Add this import at the top
 from src.table_painter import paint_table_item
 from src.pandas_table_model import PandasTableModel
+from src.analysis import compute_analysis_metrics
+from src.time_index import load_events
+from src.assistant_tools import LogToolbox
+from src.derived_channels import log_key_for
+from src.session_cache import get_session_cache, restore_frame
+from workers.scheduler import CPU, get_scheduler
+from workers.table_loader_worker import load_table
+
+ALL_PHASES = "All phases"
+PROGRESS_STEPS = 1000
+
+class PhaseFilterProxyModel(QSortFilterProxyModel):
+    """Hides raw table rows outside the selected flight phase using a precomputed row mask."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.row_mask = None
+
+    def set_row_mask(self, row_mask):
+        self.row_mask = row_mask
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.row_mask is None or source_row >= len(self.row_mask):
+            return True
+        return bool(self.row_mask[source_row])
 
 class TableWindow(QWidget):
     """Displays the processed CSV log data and analysis results."""
@@ -15,6 +39,7 @@ class TableWindow(QWidget):
 
     def __init__(self, csv_file, parent=None):
         super().__init__(parent)
+        self.csv_file = csv_file
 
         self.setWindowTitle(f"Blackbox Log Data - {os.path.basename(csv_file)}")
         self.setGeometry(150, 150, 1200, 600)  # Adjusted width for two sections
@@ -33,17 +58,35 @@ class TableWindow(QWidget):
         font = self.raw_table.font()
         font.setPointSize(7)
         self.raw_table.setFont(font)
-        self.load_table_in_thread(csv_file)
-        left_layout.addWidget(QLabel("Raw CSV Data"))
+        self.time_index = None
+
+        # Time navigation: jump to a time, select a time range, or jump to a logged event
+        time_row = QHBoxLayout()
+        self.time_input = QLineEdit()
+        self.time_input.setPlaceholderText("Time (ms), or start:end to select a range")
+        self.time_input.returnPressed.connect(self.go_to_time_input)
+        go_button = QPushButton("Go")
+        go_button.clicked.connect(self.go_to_time_input)
+        self.event_selector = QComboBox()
+        self.event_selector.setToolTip("Jump to an entry of the log's .event file")
+        time_row.addWidget(QLabel("Raw CSV Data"))
+        time_row.addStretch(1)
+        time_row.addWidget(self.time_input)
+        time_row.addWidget(go_button)
+        time_row.addWidget(self.event_selector)
+        left_layout.addLayout(time_row)
         left_layout.addWidget(self.raw_table)
 
         # Right section: Analysis results
         right_layout = QVBoxLayout()
+        self.phase_selector = QComboBox()
+        self.phase_selector.setToolTip("Restrict metrics and raw table rows to one flight phase")
         self.analysis_table = QTableWidget()
         self.analysis_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.analysis_table.customContextMenuRequested.connect(self.show_metrics_context_menu)
-        self.perform_analysis(csv_file)
+        self.phase_selector.currentTextChanged.connect(self.on_phase_selected)
         right_layout.addWidget(QLabel("Analysis Results"))
+        right_layout.addWidget(self.phase_selector)
         right_layout.addWidget(self.analysis_table)
 
         # Add left and right sections to the main layout
@@ -52,6 +95,14 @@ class TableWindow(QWidget):
 
         self.setLayout(main_layout)
 
+        # A prefetched or recently opened session is shown at once
+        self.table_job = None
+        cached = get_session_cache().get(csv_file)
+        if cached is not None:
+            self.on_table_loaded(cached)
+        else:
+            self.load_table_in_thread(csv_file)
+
     # def load_csv(self, csv_file):
     #     """Loads processed CSV data into the table widget."""
     #     # Use the load_and_clean_csv function to process the DataFrame
@@ -78,10 +129,12 @@ class TableWindow(QWidget):
     #             self.raw_table.setItem(row, col, item)
 
     def load_table_in_thread(self, csv_file):
-        from workers.table_loader_worker import TableLoadWorker
-        self.table_worker = TableLoadWorker(csv_file)
-        self.table_worker.finished.connect(self.on_table_loaded)
-        self.table_worker.error.connect(self.on_table_load_error)
+        # Parsing is CPU-bound, so it runs in a worker process; opening the same log twice shares one job
+        self.table_job = get_scheduler().submit(
+            f"Load table {os.path.basename(csv_file)}", load_table, csv_file,
+            pool=CPU, key=("table", log_key_for(csv_file)), reports_progress=True,
+            on_done=self.on_table_loaded, on_error=self.on_table_load_error, on_progress=self.on_table_progress,
+        )
         # self.raw_table.setRowCount(0)
         # self.raw_table.setColumnCount(0)
         # self.raw_table.clear()
@@ -89,17 +142,39 @@ class TableWindow(QWidget):
         # self.raw_table.setRowCount(1)
         # self.raw_table.setColumnCount(1)
         # self.raw_table.setItem(0, 0, QTableWidgetItem("Loading table, please wait..."))
-        self.progress_dialog = QProgressDialog("Loading table...", None, 0, 0, self)
+        self.progress_dialog = QProgressDialog("Loading table...", None, 0, PROGRESS_STEPS, self)
         self.progress_dialog.setWindowTitle("Please wait")
+        # Each stage runs up to the maximum; the dialog stays until the whole load is done
+        self.progress_dialog.setAutoReset(False)
+        self.progress_dialog.setAutoClose(False)
         self.progress_dialog.setWindowModality(Qt.WindowModality.ApplicationModal)
         self.progress_dialog.show()
-        self.table_worker.start()
 
-    def on_table_loaded(self, df):
+    def on_table_progress(self, progress):
+        fraction = progress.fraction()
+        if fraction is not None:
+            self.progress_dialog.setValue(int(fraction * PROGRESS_STEPS))
+        self.progress_dialog.setLabelText(progress.describe())
+
+    def on_table_loaded(self, result):
+        if "original" in result:
+            # The job was a prefetch, which returns the table compacted
+            result = dict(result, table=restore_frame(result["table"], result["original"]))
+            del result["original"]
+        if self.table_job is not None:
+            # Reopening the session is then instant; the job key holds its log key
+            get_session_cache().put(self.table_job.key[1], result)
+        df = result["table"]
         df.columns = [col.strip() for col in df.columns]
+        self.apply_analysis(df.drop(columns=result["derived"]), result["phases"], result["time_index"],
+                            result["metrics"])
+        self.load_event_list()
         rssi_max = df["rssi"].max() if "rssi" in df.columns else None
         self.model = PandasTableModel(df, rssi_max=rssi_max)
-        self.raw_table.setModel(self.model)
+        self.proxy_model = PhaseFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.model)
+        self.raw_table.setModel(self.proxy_model)
+        self.apply_phase_filter()
         # for col in range(len(df.columns)):
         #     col_name = df.columns[col]
         #     tooltip = FRIENDLY_COLUMN_NAMES.get(col_name)
@@ -116,87 +191,39 @@ class TableWindow(QWidget):
         #         item = QTableWidgetItem(str(df.iloc[row, col]))
         #         paint_table_item(item, df.columns[col].strip(), df.iloc[row, col], rssi_max=rssi_max, row=row, df=df)
                 # self.raw_table.setItem(row, col, item)
-        self.progress_dialog.close()
+        if self.table_job is not None:
+            self.progress_dialog.close()
 
     def on_table_load_error(self, msg):
-        self.raw_table.clear()
-        self.raw_table.setRowCount(1)
-        self.raw_table.setColumnCount(1)
-        self.raw_table.setItem(0, 0, QTableWidgetItem(f"Error loading table: {msg}"))
-
-    def perform_analysis(self, csv_file):
-        """Performs data analysis and displays the results in the analysis table."""
-        df = load_and_clean_csv(csv_file, load_non_numeric=True)
-
-        # Prepare analysis results
-        analysis_results = []
-
-        # 1. Tracking Error (Setpoint vs Gyro) for all axes
-        for axis, axis_name in zip([0, 1, 2], ["Roll", "Pitch", "Yaw"]):
-            setpoint_col = f"setpoint[{axis}]"
-            gyro_col = f"gyroADC[{axis}]"
-            if setpoint_col in df.columns and gyro_col in df.columns:
-                # MAPE
-                setpoint = df[setpoint_col]
-                gyro = df[gyro_col]
-                # Avoid division by zero
-                nonzero_mask = setpoint != 0
-                if nonzero_mask.any():
-                    mape = (abs((setpoint[nonzero_mask] - gyro[nonzero_mask]) / setpoint[nonzero_mask])).mean() * 100
-                    analysis_results.append([f"MAPE ({axis_name})", f"{mape:.2f}%"])
-                else:
-                    analysis_results.append([f"MAPE ({axis_name})", "N/A"])
-                # RMSE
-                rmse = ((setpoint - gyro) ** 2).mean() ** 0.5
-                analysis_results.append([f"RMSE ({axis_name})", f"{rmse:.2f}"])
-                # Max Overshoot
-                overshoot = (gyro - setpoint).max()
-                analysis_results.append([f"Max Overshoot ({axis_name})", f"{overshoot:.2f}"])
-                # Gyro Noise Std
-                noise_std = gyro.diff().std()
-                analysis_results.append([f"Gyro Noise Std ({axis_name})", f"{noise_std:.2f}"])
-
-        # 2. PID Balance Metrics (for roll only, as before)
-        if all(col in df.columns for col in ["axisP[0]", "axisI[0]", "axisD[0]"]):
-            total_pid = df["axisP[0]"].abs().sum() + df["axisI[0]"].abs().sum() + df["axisD[0]"].abs().sum()
-            p_contrib = df["axisP[0]"].abs().sum() / total_pid * 100
-            i_contrib = df["axisI[0]"].abs().sum() / total_pid * 100
-            d_contrib = df["axisD[0]"].abs().sum() / total_pid * 100
-            analysis_results.append(["P Contribution (%)", f"{p_contrib:.2f}%"])
-            analysis_results.append(["I Contribution (%)", f"{i_contrib:.2f}%"])
-            analysis_results.append(["D Contribution (%)", f"{d_contrib:.2f}%"])
-
-        # 3. Battery Voltage Sag
-        if "vbatLatest (V)" in df.columns:
-            min_voltage = df["vbatLatest (V)"].min()
-            voltage_drop = df["vbatLatest (V)"].max() - min_voltage
-            analysis_results.append(["Min Voltage", f"{min_voltage:.2f}V"])
-            analysis_results.append(["Voltage Drop", f"{voltage_drop:.2f}V"])
-
-        if "throttle" in df.columns and "vbatLatest (V)" in df.columns:
-            correlation = df["throttle"].corr(df["vbatLatest (V)"])
-            analysis_results.append(["Throttle-Voltage Correlation", f"{correlation:.2f}"])
-
-        # 5. Motor Output Symmetry
-        motor_columns = [col for col in df.columns if col.startswith("motor[")]
-        if motor_columns:
-            motor_imbalance = df[motor_columns].std(axis=1).mean()
-            analysis_results.append(["Motor Imbalance (Std)", f"{motor_imbalance:.2f}"])
-
-        # 6. Runtime Statistics
-        if "time_ms" in df.columns:
-            flight_time = (df["time_ms"].iloc[-1] - df["time_ms"].iloc[0]) / 1000  # Convert to seconds
-            analysis_results.append(["Flight Time (s)", f"{flight_time:.2f}s"])
-
-        if "throttle" in df.columns:
-            avg_throttle = df["throttle"].mean()
-            analysis_results.append(["Avg Throttle", f"{avg_throttle:.2f}"])
-
-        if "amperageLatest (A)" in df.columns:
-            max_current = df["amperageLatest (A)"].max()
-            analysis_results.append(["Max Current", f"{max_current:.2f}A"])
-
-        # Populate the analysis table
+        self.progress_dialog.close()
+        QMessageBox.warning(self, "Error", f"Error loading table: {msg}")
+
+    def closeEvent(self, event):
+        if self.table_job is not None:
+            get_scheduler().cancel(self.table_job)
+        super().closeEvent(event)
+
+    def apply_analysis(self, analysis_df, phases, time_index, metrics):
+        """Displays the analysis computed by the table load job."""
+        self.analysis_df = analysis_df
+        # Phases are segmented once; metrics and the table filter reuse their row index
+        self.phases = phases
+        self.time_index = time_index
+
+        self.phase_selector.blockSignals(True)
+        self.phase_selector.clear()
+        self.phase_selector.addItem(ALL_PHASES)
+        self.phase_selector.addItems(self.phases.names())
+        self.phase_selector.blockSignals(False)
+
+        self.show_analysis_results(metrics)
+
+    def assistant_toolbox(self):
+        """Returns the tools that let the assistant query this window's log."""
+        return LogToolbox(self.csv_file, self.analysis_df, self.time_index, self.phases)
+
+    def show_analysis_results(self, analysis_results):
+        """Populates the analysis table with [metric, value] pairs."""
         self.analysis_table.setRowCount(len(analysis_results))
         self.analysis_table.setColumnCount(2)
         self.analysis_table.setHorizontalHeaderLabels(["Metric", "Value"])
@@ -205,6 +232,88 @@ class TableWindow(QWidget):
             self.analysis_table.setItem(row, 0, QTableWidgetItem(metric))
             self.analysis_table.setItem(row, 1, QTableWidgetItem(value))
 
+    def on_phase_selected(self, phase):
+        """Recomputes metrics and filters the raw table for the selected flight phase."""
+        if not phase:
+            return
+        if phase == ALL_PHASES:
+            self.show_analysis_results(compute_analysis_metrics(self.analysis_df))
+        else:
+            phase_df = self.analysis_df.iloc[self.phases.rows(phase)]
+            self.show_analysis_results(
+                compute_analysis_metrics(phase_df, flight_time_s=self.phases.duration_s(phase))
+            )
+        self.apply_phase_filter()
+
+    def apply_phase_filter(self):
+        """Shows only the raw table rows of the selected flight phase."""
+        if not hasattr(self, "proxy_model"):
+            return
+        phase = self.phase_selector.currentText()
+        if phase and phase != ALL_PHASES:
+            self.proxy_model.set_row_mask(self.phases.mask(phase))
+        else:
+            self.proxy_model.set_row_mask(None)
+
+    def load_event_list(self):
+        """Fills the event selector with the log's .event entries mapped onto rows."""
+        self.events = load_events(self.csv_file, self.time_index)
+        self.event_selector.clear()
+        self.event_selector.addItem("Events")
+        for name, time_ms in self.events[["name", "time_ms"]].itertuples(index=False):
+            self.event_selector.addItem(f"{name} @ {time_ms:.1f} ms")
+        self.event_selector.setVisible(len(self.events) > 0)
+        self.event_selector.activated.connect(self.on_event_selected)
+
+    def on_event_selected(self, index):
+        if index <= 0 or self.time_index is None:
+            return
+        self.jump_to_row(int(self.events["row"].iloc[index - 1]))
+
+    def go_to_time_input(self):
+        """Parses the time field: a single time jumps, "start:end" selects a range."""
+        if self.time_index is None or not len(self.time_index):
+            return
+        text = self.time_input.text().strip()
+        try:
+            if ":" in text:
+                start_ms, end_ms = (float(part) for part in text.split(":", 1))
+                self.select_time_range(start_ms, end_ms)
+            else:
+                self.jump_to_time(float(text))
+        except ValueError:
+            QMessageBox.warning(self, "Invalid Time", "Enter a time in ms, or start:end in ms.")
+
+    def jump_to_time(self, t_ms):
+        """Scrolls the raw table to the row nearest to `t_ms`."""
+        self.jump_to_row(self.time_index.row_at(t_ms))
+
+    def jump_to_row(self, row):
+        """Scrolls to and selects a source row, leaving the phase filter if it hides the row."""
+        if not hasattr(self, "proxy_model"):
+            return
+        source_index = self.model.index(row, 0)
+        proxy_index = self.proxy_model.mapFromSource(source_index)
+        if not proxy_index.isValid():
+            self.phase_selector.setCurrentText(ALL_PHASES)
+            proxy_index = self.proxy_model.mapFromSource(source_index)
+        self.raw_table.selectRow(proxy_index.row())
+        self.raw_table.scrollTo(proxy_index, QTableView.ScrollHint.PositionAtCenter)
+
+    def select_time_range(self, start_ms, end_ms):
+        """Selects all raw table rows between two times."""
+        if not hasattr(self, "proxy_model"):
+            return
+        start, stop = self.time_index.row_range(start_ms, end_ms)
+        if stop <= start:
+            return
+        last_column = self.model.columnCount() - 1
+        source_selection = QItemSelection(self.model.index(start, 0), self.model.index(stop - 1, last_column))
+        selection = self.proxy_model.mapSelectionFromSource(source_selection)
+        self.raw_table.selectionModel().select(selection, QItemSelectionModel.SelectionFlag.ClearAndSelect)
+        if not selection.isEmpty():
+            self.raw_table.scrollTo(selection.indexes()[0], QTableView.ScrollHint.PositionAtTop)
+
     def add_selection_to_chat_context(self):
         """Extracts selected cells and emits them as context."""
         selected = self.raw_table.selectionModel().selectedIndexes()
@@ -212,13 +321,14 @@ class TableWindow(QWidget):
             return
         rows = sorted(set(idx.row() for idx in selected))
         cols = sorted(set(idx.column() for idx in selected))
-        headers = [self.model.headerData(col, Qt.Orientation.Horizontal, Qt.ItemDataRole.DisplayRole) for col in cols]
+        model = self.raw_table.model()
+        headers = [model.headerData(col, Qt.Orientation.Horizontal, Qt.ItemDataRole.DisplayRole) for col in cols]
         extracted = ["\t".join(headers)]
         for row in rows:
             row_data = []
             for col in cols:
-                idx = self.model.index(row, col)
-                row_data.append(str(self.model.data(idx, Qt.ItemDataRole.DisplayRole)))
+                idx = model.index(row, col)
+                row_data.append(str(model.data(idx, Qt.ItemDataRole.DisplayRole)))
             extracted.append("\t".join(row_data))
         context_str = "\n".join(extracted)
         self.context_extracted.emit(context_str)
@@ -1,18 +1,128 @@
-from PyQt6.QtCore import QThread, pyqtSignal
-from src.assistant import ask_chatgpt
-
-class ChatWorker(QThread):
-    finished = pyqtSignal(str)
-    error = pyqtSignal(str)
-
-    def __init__(self, messages, model):
-        super().__init__()
-        self.messages = messages
-        self.model = model
-
-    def run(self):
-        try:
-            ai_response = ask_chatgpt(self.messages, model=self.model)
-            self.finished.emit(ai_response)
-        except Exception as e:
-            self.error.emit(f"AI: Error communicating with ChatGPT: {e}")
\ No newline at end of file
+import itertools
+from contextlib import closing
+from PyQt6.QtCore import QObject, pyqtSignal
+from src.assistant import DEFAULT_TEMPERATURE, stream_chatgpt
+from src.response_cache import cache_key, get_response_cache
+from workers.scheduler import IO, PRIORITY_HIGH
+
+
+class ChatQueue(QObject):
+    """
+    Runs assistant requests as scheduler jobs and reports them by request id.
+
+    Questions are high-priority I/O jobs, so independent ones run side by side and
+    overtake queued background work. A cancelled request stops at its next
+    streamed fragment and reports nothing but `cancelled`.
+
+    Fragments and tool calls are emitted from pool threads, so connected slots run
+    queued on the GUI thread.
+    """
+    token = pyqtSignal(int, str)               # request id, streamed text fragment
+    tool_called = pyqtSignal(int, str, str)    # request id, tool name, arguments
+    finished = pyqtSignal(int, str, bool)      # request id, full response, answered from the cache
+    error = pyqtSignal(int, str)               # request id, error message
+    cancelled = pyqtSignal(int)                # request id
+
+    def __init__(self, scheduler, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self._ids = itertools.count(1)
+        self._jobs = {}
+
+    def submit(self, build_messages, model, use_cache=True, toolbox=None, name="Chat"):
+        """
+        Queues a request.
+
+        Args:
+            build_messages (callable): Returns the messages to send; runs on the worker
+                thread, so it may do slow preparation such as compressing context.
+            model (str): Model name.
+            use_cache (bool): Answer from the response cache when possible.
+            toolbox (LogToolbox | None): Tools the model may call.
+            name (str): Label in the jobs panel.
+
+        Returns:
+            int: Request id used by the signals.
+        """
+        request_id = next(self._ids)
+        self._jobs[request_id] = self.scheduler.submit(
+            name, self._run, request_id, build_messages, model, use_cache, toolbox,
+            pool=IO, priority=PRIORITY_HIGH, cancellable=True,
+            on_done=lambda result: self._on_done(request_id, result),
+            on_error=lambda message: self._on_error(request_id, message),
+        )
+        return request_id
+
+    def cancel(self, request_id):
+        job = self._jobs.pop(request_id, None)
+        if job is not None:
+            self.scheduler.cancel(job)
+            self.cancelled.emit(request_id)
+
+    def cancel_all(self):
+        for request_id in list(self._jobs):
+            self.cancel(request_id)
+
+    def _on_done(self, request_id, result):
+        if self._jobs.pop(request_id, None) is not None:
+            response, cached = result
+            self.finished.emit(request_id, response, cached)
+
+    def _on_error(self, request_id, message):
+        if self._jobs.pop(request_id, None) is not None:
+            self.error.emit(request_id, f"AI: Error communicating with ChatGPT: {message}")
+
+    def _run(self, request_id, build_messages, model, use_cache, toolbox, check):
+        check()
+        messages = build_messages()
+        # Answers that used tools depend on the log they read
+        key = cache_key(model, messages, DEFAULT_TEMPERATURE, list(toolbox.log_key) if toolbox else None)
+        cache = get_response_cache()
+        response = cache.get(key) if use_cache else None
+        if response is not None:
+            return response, True
+        response = self._converse(request_id, messages, model, toolbox, check)
+        if response:
+            cache.put(key, response, model)
+        return response, False
+
+    def _converse(self, request_id, messages, model, toolbox, check):
+        """
+        Streams the answer, running the tools the model calls on the way.
+
+        Each round the model either answers or asks for tool results; those are
+        computed in-process and sent back. After MAX_TOOL_ROUNDS the model has to
+        answer without tools.
+        """
+        from src.assistant_tools import MAX_TOOL_ROUNDS, TOOL_SPECS
+
+        messages = list(messages)
+        for round_number in range(MAX_TOOL_ROUNDS + 1):
+            tools = TOOL_SPECS if toolbox and round_number < MAX_TOOL_ROUNDS else None
+            calls = []
+            parts = []
+            with closing(stream_chatgpt(messages, model=model, tools=tools, tool_calls=calls)) as stream:
+                for fragment in stream:
+                    check()
+                    parts.append(fragment)
+                    self.token.emit(request_id, fragment)
+            if not calls:
+                return "".join(parts).strip()
+            messages.append({
+                "role": "assistant",
+                "content": "".join(parts) or None,
+                "tool_calls": [
+                    {"id": call["id"], "type": "function",
+                     "function": {"name": call["name"], "arguments": call["arguments"]}}
+                    for call in calls
+                ],
+            })
+            for call in calls:
+                check()
+                self.tool_called.emit(request_id, call["name"], call["arguments"])
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": call["id"],
+                    "content": toolbox.call(call["name"], call["arguments"]),
+                })
+        return ""
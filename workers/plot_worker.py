@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+RESULT_CACHE_SIZE = 4   # Prepared plots kept for instant re-display
+
+
+class PlotPipeline(QObject):
+    """
+    Runs plot data preparation on a small thread pool and delivers results on the GUI thread.
+
+    Every request has a key (see plot_request_key). Submitting a key that is already
+    being prepared does not start a second job, and a recently prepared key is
+    answered from a small cache. Only the newest request is shown: submitting a
+    different key cancels the others, which stop at their next check() call.
+    """
+    ready = pyqtSignal(object, object)   # key, prepared result
+    failed = pyqtSignal(object, str)     # key, error message
+    cancelled = pyqtSignal(object)       # key
+    _finished = pyqtSignal(object, object, object, object)  # key, job, result, error
+
+    def __init__(self, max_workers=2, parent=None):
+        super().__init__(parent)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="PlotPrep")
+        self._jobs = {}
+        self._results = OrderedDict()
+        self._latest = None
+        # Emitted from pool threads, so the slot runs queued on the GUI thread
+        self._finished.connect(self._on_finished)
+
+    def submit(self, key, prepare):
+        """
+        Requests a prepared plot.
+
+        Args:
+            key (tuple): Request identity.
+            prepare (callable): prepare(check) -> result, run on a worker thread.
+                It should call check() between stages; check raises PlotCancelled
+                once the request is cancelled.
+
+        Returns:
+            bool: True if a new job was started, False if the request was served by a
+            running job or the cache.
+        """
+        self._latest = key
+        for other in list(self._jobs):
+            if other != key:
+                self.cancel(other)
+
+        if key in self._results:
+            self._results.move_to_end(key)
+            result = self._results[key]
+            QTimer.singleShot(0, lambda: self._emit_ready(key, result))
+            return False
+        if key in self._jobs:
+            return False
+
+        job = {"event": threading.Event()}
+
+        def check():
+            if job["event"].is_set():
+                from src.plot_pipeline import PlotCancelled
+
+                raise PlotCancelled()
+
+        job["future"] = self._pool.submit(self._run, key, job, prepare, check)
+        self._jobs[key] = job
+        return True
+
+    def cancel(self, key):
+        """Cancels a request; a running job stops at its next check()."""
+        job = self._jobs.pop(key, None)
+        if job is not None:
+            job["event"].set()
+            job["future"].cancel()
+            self.cancelled.emit(key)
+
+    def cancel_all(self):
+        for key in list(self._jobs):
+            self.cancel(key)
+        self._latest = None
+
+    def is_busy(self):
+        return bool(self._jobs)
+
+    def shutdown(self):
+        self.cancel_all()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, key, job, prepare, check):
+        # Imported on the pool thread; the pipeline loads pandas and bokeh
+        from src.plot_pipeline import PlotCancelled
+
+        try:
+            check()
+            result = prepare(check)
+        except PlotCancelled:
+            return
+        except Exception as e:
+            self._finished.emit(key, job, None, str(e))
+            return
+        self._finished.emit(key, job, result, None)
+
+    def _on_finished(self, key, job, result, error):
+        if self._jobs.get(key) is not job:
+            return  # cancelled or superseded meanwhile
+        del self._jobs[key]
+        if error is not None:
+            self.failed.emit(key, error)
+            return
+        self._results[key] = result
+        while len(self._results) > RESULT_CACHE_SIZE:
+            self._results.popitem(last=False)
+        self._emit_ready(key, result)
+
+    def _emit_ready(self, key, result):
+        if key == self._latest:
+            self.ready.emit(key, result)
@@ -0,0 +1,105 @@
+import os
+from PyQt6.QtCore import QObject
+from workers.scheduler import BACKGROUND, PRIORITY_LOW, QUEUED, RUNNING
+
+
+class SessionPrefetcher(QObject):
+    """
+    Loads the sessions of an opened folder into the session cache before they are asked for.
+
+    Sessions are loaded one at a time as BACKGROUND jobs, so they only use a worker
+    nobody else needs. The likely order is the longest sessions first, since short
+    ones are usually ground tests; the session the user selects in the file list
+    moves to the front. A prefetch job has the same key as the table load of its
+    session, so opening a session that is being prefetched waits for that job
+    instead of starting another. Prefetching stops once the cache budget is used up.
+
+    The cache and the loader are imported on first prefetch, as they need numpy and
+    pandas, which the main window does not wait for.
+    """
+
+    def __init__(self, scheduler, cache=None, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.cache = cache
+        self._pending = []
+        self._job = None
+        self._submitting = False
+        # A prefetch job cancelled along with a table window that shared it reports nothing
+        self.scheduler.changed.connect(self._on_scheduler_changed)
+
+    def prefetch(self, csv_files):
+        """Replaces the sessions waiting to be prefetched with `csv_files`."""
+        from src.session_cache import get_session_cache
+
+        if self.cache is None:
+            self.cache = get_session_cache()
+        sizes = {}
+        for csv_file in csv_files:
+            try:
+                sizes[csv_file] = os.path.getsize(csv_file)
+            except OSError:
+                pass
+        self._pending = sorted(sizes, key=sizes.get, reverse=True)
+        self._submit_next()
+
+    def prioritize(self, csv_file):
+        """Prefetches `csv_file` next, if it is waiting."""
+        if csv_file in self._pending:
+            self._pending.remove(csv_file)
+            self._pending.insert(0, csv_file)
+
+    def stop(self):
+        self._pending.clear()
+        if self._job is not None:
+            self.scheduler.cancel(self._job)
+            self._job = None
+
+    def _on_scheduler_changed(self):
+        if self._job is not None and self._job.state not in (QUEUED, RUNNING):
+            self._job = None
+            self._submit_next()
+
+    def _submit_next(self):
+        if self._submitting:
+            return
+        self._submitting = True
+        try:
+            self._submit_one()
+        finally:
+            self._submitting = False
+
+    def _submit_one(self):
+        from src.derived_channels import log_key_for
+        from workers.table_loader_worker import prefetch_table
+
+        while self._job is None and self._pending and self.cache.has_room():
+            csv_file = self._pending.pop(0)
+            try:
+                log_key = log_key_for(csv_file)
+            except OSError:
+                continue
+            if log_key in self.cache:
+                continue
+            self._job = self.scheduler.submit(
+                f"Prefetch {os.path.basename(csv_file)}", prefetch_table, csv_file,
+                pool=BACKGROUND, priority=PRIORITY_LOW, key=("table", log_key), reports_progress=True,
+                on_done=lambda result, log_key=log_key: self._on_done(log_key, result),
+                on_error=lambda message: self._on_error(),
+            )
+
+    def _on_done(self, log_key, result):
+        self._job = None
+        # Compacted in the worker; a table window's load job shared instead returns it full width
+        entry = dict(result)
+        original = entry.pop("original", None)
+        if not self.cache.put(log_key, entry, original, speculative=True):
+            # The budget is used up; evicting one prefetched session for another gains nothing
+            self._pending.clear()
+            return
+        self._submit_next()
+
+    def _on_error(self):
+        # A session that cannot be parsed is skipped; opening it will report the error
+        self._job = None
+        self._submit_next()
@@ -0,0 +1,27 @@
+import os
+import sys
+from src.progress import install_report_queue
+
+BACKGROUND_NICENESS = 19           # Lowest POSIX priority
+IDLE_PRIORITY_CLASS = 0x00000040   # Windows: run only when the machine is otherwise idle
+
+
+def lower_priority():
+    """Lets the operating system run this process only when nothing else wants the CPU."""
+    if hasattr(os, "nice"):
+        os.nice(BACKGROUND_NICENESS)
+    elif sys.platform == "win32":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), IDLE_PRIORITY_CLASS)
+
+
+def init_worker(report_queue, background=False):
+    """
+    Process pool initializer of the job scheduler.
+
+    Runs in each new worker process, which imports only this module, not Qt.
+    """
+    install_report_queue(report_queue)
+    if background:
+        lower_priority()
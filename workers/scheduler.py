@@ -0,0 +1,317 @@
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from PyQt6.QtCore import QObject, pyqtSignal
+from src.progress import ProgressReporter, ProgressState, run_reporting
+from workers.process_init import init_worker
+
+CPU = "cpu"   # Process pool: pure-Python or pandas work that would hold the GIL
+IO = "io"     # Thread pool: file, network and subprocess waits
+BACKGROUND = "background"  # Process pool at the lowest OS priority: speculative work such as prefetching
+POOLS = (CPU, IO, BACKGROUND)
+
+PRIORITY_HIGH = 0     # Interactive requests, e.g. chat questions
+PRIORITY_NORMAL = 1   # Work the user asked for and is waiting on
+PRIORITY_LOW = 2      # Background work nobody waits for yet
+
+IO_WORKERS = 4
+BACKGROUND_WORKERS = 1
+FINISHED_KEPT = 50    # Finished jobs listed in the jobs panel
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    """Raised by check() inside a thread job that was cancelled."""
+
+
+class Job:
+    """One unit of background work and its bookkeeping."""
+
+    def __init__(self, job_id, name, pool, priority, key, fn, args, kwargs, cancellable, reports_progress=False):
+        self.id = job_id
+        self.name = name
+        self.pool = pool
+        self.priority = priority
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.cancellable = cancellable
+        self.reports_progress = reports_progress
+        self.progress = ProgressState()
+        self.state = QUEUED
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.callbacks = []   # (on_done, on_error) pairs; more than one when deduplicated
+        self.progress_callbacks = []
+        self.event = threading.Event()
+
+    def check(self):
+        if self.event.is_set():
+            raise JobCancelled()
+
+    def run_time(self):
+        """Seconds spent running so far, or in total once finished."""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def wait_time(self):
+        return (self.started_at or time.monotonic()) - self.submitted_at
+
+
+def _run_thread_job(job, report):
+    job.check()
+    extra = {}
+    if job.cancellable:
+        extra["check"] = job.check
+    if job.reports_progress:
+        extra["progress"] = ProgressReporter(lambda *progress: report((job.id,) + progress))
+    return job.fn(*job.args, **extra, **job.kwargs)
+
+
+class JobScheduler(QObject):
+    """
+    Runs background work on bounded pools, highest priority first.
+
+    CPU-bound jobs go to a process pool, so they neither block the GUI nor each
+    other through the GIL; their function and arguments must be picklable.
+    I/O-bound jobs go to a thread pool. Each pool gets only as many jobs as it has
+    workers, and the rest wait in a priority queue here, so a later high-priority
+    job overtakes earlier low-priority ones. BACKGROUND jobs run in their own
+    process pool at the lowest OS priority, and only start while no CPU job is
+    queued or running, so speculative work never slows down work the user waits on.
+
+    Submitting a job with the key of a queued or running one does not start it
+    again; the new callbacks are attached to the existing job. A queued job that is
+    cancelled never starts. A running thread job stops at its next check() if it
+    was submitted as cancellable; other running jobs finish, but their result is
+    dropped. Callbacks run on the GUI thread.
+
+    Jobs submitted with reports_progress=True receive progress=, which they call as
+    progress(done, total, stage, unit); the latest report is kept in job.progress.
+    Reports from worker processes come back through a queue read by a listener
+    thread.
+    """
+    changed = pyqtSignal()                   # queue or job states changed
+    _completed = pyqtSignal(object, object)  # job, future; emitted from pool threads
+    _progressed = pyqtSignal(object)         # (job id, stage, done, total, unit); emitted from any thread
+
+    def __init__(self, cpu_workers=None, io_workers=IO_WORKERS, parent=None):
+        super().__init__(parent)
+        self.capacity = {CPU: cpu_workers or max(1, (os.cpu_count() or 2) - 1), IO: io_workers,
+                         BACKGROUND: BACKGROUND_WORKERS}
+        self._executors = {}
+        self._queues = {pool: [] for pool in POOLS}
+        self._running = {pool: [] for pool in POOLS}
+        self._by_key = {}
+        self._finished = deque(maxlen=FINISHED_KEPT)
+        self._ids = itertools.count(1)
+        self._report_queue = None
+        self._completed.connect(self._on_completed)
+        self._progressed.connect(self._on_progressed)
+
+    def _executor(self, pool):
+        # Created on first use; starting worker processes is not free
+        if pool not in self._executors:
+            if pool in (CPU, BACKGROUND):
+                context = multiprocessing.get_context("spawn")
+                if self._report_queue is None:
+                    self._report_queue = context.Queue()
+                    threading.Thread(target=self._listen_for_reports, args=(self._report_queue,),
+                                     name="JobProgress", daemon=True).start()
+                self._executors[pool] = ProcessPoolExecutor(
+                    max_workers=self.capacity[pool], mp_context=context,
+                    initializer=init_worker, initargs=(self._report_queue, pool == BACKGROUND))
+            else:
+                self._executors[pool] = ThreadPoolExecutor(max_workers=self.capacity[IO], thread_name_prefix="Job")
+        return self._executors[pool]
+
+    def submit(self, name, fn, *args, pool=IO, priority=PRIORITY_NORMAL, key=None, on_done=None, on_error=None,
+               cancellable=False, reports_progress=False, on_progress=None, **kwargs):
+        """
+        Queues fn(*args, **kwargs).
+
+        Args:
+            name (str): Label shown in the jobs panel.
+            fn (callable): The work. CPU and BACKGROUND jobs need a picklable,
+                module-level function.
+            pool (str): CPU, IO or BACKGROUND.
+            priority (int): PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW.
+            key (hashable | None): Identity for de-duplication.
+            on_done (callable | None): on_done(result), called on the GUI thread.
+            on_error (callable | None): on_error(message), called on the GUI thread.
+            cancellable (bool): Thread jobs only; fn then receives check=, which raises
+                JobCancelled once the job is cancelled.
+            reports_progress (bool): fn receives progress=, see ProgressReporter.
+            on_progress (callable | None): on_progress(ProgressState), called on the GUI
+                thread after each forwarded report.
+
+        Returns:
+            Job: The new job, or the queued or running job with the same key.
+        """
+        if key is not None and key in self._by_key:
+            job = self._by_key[key]
+            job.callbacks.append((on_done, on_error))
+            if on_progress is not None:
+                job.progress_callbacks.append(on_progress)
+            if job.state == QUEUED and (priority < job.priority or (job.pool == BACKGROUND and pool == CPU)):
+                # Someone now waits for speculative work; it moves to the foreground pool
+                self._requeue(job, min(priority, job.priority), pool if job.pool == BACKGROUND else job.pool)
+                self.changed.emit()
+            return job
+
+        job = Job(next(self._ids), name, pool, priority, key, fn, args, kwargs, cancellable and pool == IO,
+                  reports_progress)
+        job.callbacks.append((on_done, on_error))
+        if on_progress is not None:
+            job.progress_callbacks.append(on_progress)
+        if key is not None:
+            self._by_key[key] = job
+        heapq.heappush(self._queues[pool], (priority, job.id, job))
+        self._dispatch(pool)
+        self.changed.emit()
+        return job
+
+    def cancel(self, job):
+        """Cancels a queued or running job; its callbacks are not called."""
+        if job.state not in (QUEUED, RUNNING):
+            return
+        job.event.set()
+        if job.state == QUEUED:
+            self._queues[job.pool] = [entry for entry in self._queues[job.pool] if entry[2] is not job]
+            heapq.heapify(self._queues[job.pool])
+        else:
+            job.future.cancel()
+        self._finish(job, CANCELLED)
+        if job in self._running[job.pool] and job.future.done():
+            self._running[job.pool].remove(job)
+        # Otherwise its worker stays busy until the function returns or, for a
+        # cancellable thread job, reaches its next check(); _on_completed frees the slot
+        self._dispatch_after(job.pool)
+        self.changed.emit()
+
+    def cancel_all(self):
+        for job in self.jobs():
+            self.cancel(job)
+
+    def jobs(self):
+        """Queued and running jobs, running first."""
+        queued = [entry[2] for pool in POOLS for entry in sorted(self._queues[pool])]
+        return [job for pool in POOLS for job in self._running[pool] if job.state == RUNNING] + queued
+
+    def finished_jobs(self):
+        return list(self._finished)
+
+    def queue_depth(self, pool):
+        return len(self._queues[pool])
+
+    def running_count(self, pool):
+        return len(self._running[pool])
+
+    def shutdown(self):
+        self.cancel_all()
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._executors.clear()
+        if self._report_queue is not None:
+            self._report_queue.put(None)
+            self._report_queue = None
+
+    def _requeue(self, job, priority, pool):
+        self._queues[job.pool] = [entry for entry in self._queues[job.pool] if entry[2] is not job]
+        heapq.heapify(self._queues[job.pool])
+        job.priority = priority
+        job.pool = pool
+        heapq.heappush(self._queues[pool], (priority, job.id, job))
+        self._dispatch(pool)
+
+    def _dispatch(self, pool):
+        if pool == BACKGROUND and (self._queues[CPU] or self._running[CPU]):
+            return
+        while self._queues[pool] and len(self._running[pool]) < self.capacity[pool]:
+            _, _, job = heapq.heappop(self._queues[pool])
+            job.state = RUNNING
+            job.started_at = time.monotonic()
+            if pool != IO and job.reports_progress:
+                job.future = self._executor(pool).submit(run_reporting, job.id, job.fn, job.args, job.kwargs)
+            elif pool != IO:
+                job.future = self._executor(pool).submit(job.fn, *job.args, **job.kwargs)
+            else:
+                job.future = self._executor(pool).submit(_run_thread_job, job, self._progressed.emit)
+            self._running[pool].append(job)
+            job.future.add_done_callback(lambda future, job=job: self._completed.emit(job, future))
+
+    def _dispatch_after(self, pool):
+        self._dispatch(pool)
+        if pool == CPU:
+            # Background work waits for the foreground pool to drain
+            self._dispatch(BACKGROUND)
+
+    def _finish(self, job, state):
+        job.state = state
+        job.finished_at = time.monotonic()
+        if job.key is not None and self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+        self._finished.appendleft(job)
+
+    def _on_completed(self, job, future):
+        if job in self._running[job.pool]:
+            self._running[job.pool].remove(job)
+        if job.state == RUNNING:
+            try:
+                result = future.result()
+            except JobCancelled:
+                self._finish(job, CANCELLED)
+            except Exception as e:
+                job.error = str(e) or type(e).__name__
+                self._finish(job, FAILED)
+                for _, on_error in job.callbacks:
+                    if on_error is not None:
+                        on_error(job.error)
+            else:
+                self._finish(job, DONE)
+                for on_done, _ in job.callbacks:
+                    if on_done is not None:
+                        on_done(result)
+        self._dispatch_after(job.pool)
+        self.changed.emit()
+
+    def _listen_for_reports(self, queue):
+        while True:
+            report = queue.get()
+            if report is None:   # Sent by shutdown()
+                return
+            self._progressed.emit(report)
+
+    def _on_progressed(self, report):
+        job_id, stage, done, total, unit = report
+        for job in [job for pool in POOLS for job in self._running[pool]]:
+            if job.id == job_id and job.state == RUNNING:
+                job.progress.update(stage, done, total, unit)
+                for on_progress in job.progress_callbacks:
+                    on_progress(job.progress)
+                return
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    """Returns the application's job scheduler; create and use it on the GUI thread."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = JobScheduler()
+    return _scheduler
@@ -1,18 +1,52 @@
-from PyQt6.QtCore import QThread, pyqtSignal
-import pandas as pd
 import src.data_processor as data_processor
+from src.analysis import compute_analysis_metrics
+from src.derived_channels import add_derived_columns, available_channels
+from src.flight_phases import segment_flight_phases
+from src.session_cache import compact_frame
+from src.session_summary import summary_for
+from src.time_index import build_time_index
 
-class TableLoadWorker(QThread):
-    finished = pyqtSignal(object)  # emits DataFrame on success
-    error = pyqtSignal(str)        # emits error message
 
-    def __init__(self, csv_file):
-        super().__init__()
-        self.csv_file = csv_file
+def load_table(csv_file, progress=None):
+    """
+    Loads a log for the table window: the raw table with every derived channel it
+    can offer, and the analysis of the log as read. The session's summary sidecar
+    is written on the way if it is missing.
 
-    def run(self):
-        try:
-            df = data_processor.load_and_clean_csv(self.csv_file, True)
-            self.finished.emit(df)
-        except Exception as e:
-            self.error.emit(str(e))
\ No newline at end of file
+    Runs as a CPU job in a worker process, so it must stay a module-level function
+    without Qt imports.
+
+    Args:
+        csv_file (str): Path to the CSV file.
+        progress (callable | None): Receives the byte progress of the CSV read, then
+            the metric groups completed by the analysis.
+
+    Returns:
+        dict: "table" (DataFrame with derived columns), "derived" (their names),
+        "schema" (the numeric raw columns), "phases", "time_index", "metrics" and
+        "summary" of the log.
+    """
+    df = data_processor.load_and_clean_csv(csv_file, True, progress=progress)
+    schema = list(df.select_dtypes(include=["number"]).columns)
+    # The file is parsed once for both; the analysis runs before derived columns are added
+    phases = segment_flight_phases(df)
+    time_index = build_time_index(df)
+    metrics = compute_analysis_metrics(df, progress=progress)
+    derived = [name for name in available_channels(df.columns) if name not in df.columns]
+    # No log key: this runs in a worker process, whose derived-channel cache nothing reads again
+    add_derived_columns(df, derived)
+    return {"table": df, "derived": derived, "schema": schema, "phases": phases, "time_index": time_index,
+            "metrics": metrics, "summary": summary_for(csv_file, df)}
+
+
+def prefetch_table(csv_file, progress=None):
+    """
+    load_table for the session prefetcher, with the table compacted (see
+    session_cache.compact_frame) and its original dtypes under "original".
+
+    Compacting in the worker process keeps speculative work off the GUI thread and
+    makes the frame pickled back to it smaller.
+    """
+    result = load_table(csv_file, progress=progress)
+    table, original = compact_frame(result["table"])
+    return dict(result, table=table, original=original)